@@ -0,0 +1,38 @@
+"""
+Admin building blocks for tables too large to count.
+
+The stock changelist runs ``COUNT(*)`` for the filtered results and again
+for the whole table, both full scans on SQLite. ``LargeTableAdmin`` turns
+the second one off and paginates with ``EstimatedCountPaginator``, and
+orders by the primary key so every page is an index range scan.
+"""
+from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db.models import Max
+from django.utils.functional import cached_property
+
+# Filtered changelists count at most this many rows.
+COUNT_LIMIT = 10000
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator whose count is ``MAX(id)`` for an unfiltered table (read from
+    the primary key index; deleted rows make it an overestimate) and capped
+    at ``COUNT_LIMIT`` rows otherwise.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not hasattr(queryset, 'query'):
+            return super().count
+        if not queryset.query.where:
+            return queryset.aggregate(estimate=Max('pk'))['estimate'] or 0
+        return queryset.order_by()[:COUNT_LIMIT].count()
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ('-id',)
@@ -0,0 +1,14 @@
+"""
+The browsable API root at /api/, linking to each app's router.
+"""
+from django.urls import path
+from rest_framework.routers import APIRootView
+from rest_framework.urlpatterns import format_suffix_patterns
+
+urlpatterns = format_suffix_patterns([
+    path(
+        '',
+        APIRootView.as_view(api_root_dict={'articles': 'article-list', 'posts': 'post-list', 'tags': 'tag-list'}),
+        name='api-root',
+    ),
+])
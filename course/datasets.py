@@ -0,0 +1,195 @@
+"""
+Deterministic benchmark datasets for all apps.
+
+Rows are generated in fixed-size chunks, each from its own random seed
+derived from ``(seed, table, chunk)``, so the data only depends on the
+profile and seed, not on the number of worker processes. Generation (the
+CPU-bound part) runs in a process pool; SQLite takes a single writer, so
+the main process inserts the chunks in order with ``bulk_create``.
+
+Bulk inserts send no model signals, so the generator provides what the
+receivers would have: every Post gets a unique slug up front, and
+``Tag.post_count`` is recounted after the join rows are inserted.
+``auto_now_add`` timestamps are the insert time.
+"""
+import hashlib
+import json
+import random
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+PROFILES = {
+    'small': {
+        'articles': 2_000,
+        'restaurants': 200,
+        'sales': 5_000,
+        'tags': 500,
+        'posts': 2_000,
+    },
+    'medium': {
+        'articles': 200_000,
+        'restaurants': 10_000,
+        'sales': 500_000,
+        'tags': 20_000,
+        'posts': 100_000,
+    },
+    'xl': {
+        'articles': 10_000_000,
+        'restaurants': 100_000,
+        'sales': 10_000_000,
+        'tags': 1_000_000,
+        'posts': 1_000_000,
+    },
+}
+
+CHUNK_SIZE = 5_000
+
+# Tags per post, and the skew of tag popularity (higher is more skewed).
+TAGS_PER_POST = (0, 5)
+TAG_SKEW = 3
+
+PUBLISHED_RATIO = 0.8
+
+AUTHORS = [
+    'John Smith', 'Jane Doe', 'Alice Johnson', 'Bob Wilson', 'Carol Brown', 'David Lee',
+    'Emma Davis', 'Frank Miller', 'Grace Taylor', 'Henry Anderson', 'Ivy Martinez', 'Jack Thompson',
+]
+TOPICS = [
+    'technology', 'science', 'health', 'sports', 'travel', 'food', 'education', 'environment',
+    'art', 'music', 'business', 'politics', 'history', 'literature', 'philosophy',
+]
+WORDS = [
+    'guide', 'future', 'practice', 'insight', 'handbook', 'strategy', 'theory', 'trend',
+    'method', 'review', 'primer', 'notes', 'survey', 'lessons', 'pattern', 'design',
+]
+RESTAURANT_TYPES = ['italian', 'mexican', 'chinese', 'american', 'french', 'indian', 'thai']
+RESTAURANT_WORDS = ['Kitchen', 'Grill', 'Cafe', 'House', 'Bistro', 'Diner', 'Palace', 'Wok']
+
+
+def _rng(seed, table, chunk):
+    return random.Random(f'{seed}:{table}:{chunk}')
+
+
+def _sentence(rng, words=12):
+    return ' '.join(rng.choice(WORDS + TOPICS) for _ in range(words)).capitalize() + '.'
+
+
+def articles(rng, start, count, sizes):
+    rows = []
+    for _ in range(count):
+        topic = rng.choice(TOPICS)
+        rows.append((
+            f'{topic.title()} {rng.choice(WORDS)} {rng.randint(1, 999)}',
+            ' '.join(_sentence(rng) for _ in range(rng.randint(3, 12))),
+            rng.choice(AUTHORS),
+            rng.random() < PUBLISHED_RATIO,
+        ))
+    return rows
+
+
+def restaurants(rng, start, count, sizes):
+    return [
+        (
+            f'{rng.choice(TOPICS).title()} {rng.choice(RESTAURANT_WORDS)} {start + i}',
+            rng.choice(RESTAURANT_TYPES),
+            (date(2020, 1, 1) + timedelta(days=rng.randint(0, 2000))).isoformat(),
+        )
+        for i in range(count)
+    ]
+
+
+def sales(rng, start, count, sizes):
+    rows = []
+    for _ in range(count):
+        income = rng.randint(10_000, 1_000_000)
+        rows.append((
+            rng.randrange(sizes['restaurants']),
+            f'{income / 100:.2f}',
+            f'{rng.randint(5_000, income) / 100:.2f}',
+        ))
+    return rows
+
+
+def tags(rng, start, count, sizes):
+    return [(f'{rng.choice(TOPICS)}-{rng.choice(WORDS)}-{start + i}',) for i in range(count)]
+
+
+def posts(rng, start, count, sizes):
+    return [
+        (
+            f'{rng.choice(TOPICS).title()} {rng.choice(WORDS)}',
+            f'post-{start + i}',
+            ' '.join(_sentence(rng) for _ in range(rng.randint(1, 6))),
+        )
+        for i in range(count)
+    ]
+
+
+def post_tags(rng, start, count, sizes):
+    """``(post, tag)`` positions; low tag positions are the popular ones."""
+    rows = []
+    for post in range(start, start + count):
+        picked = {
+            int(sizes['tags'] * rng.random() ** TAG_SKEW)
+            for _ in range(rng.randint(*TAGS_PER_POST))
+        }
+        rows.extend((post, tag) for tag in sorted(picked))
+    return rows
+
+
+GENERATORS = {
+    'articles': articles,
+    'restaurants': restaurants,
+    'sales': sales,
+    'tags': tags,
+    'posts': posts,
+    # One chunk of post_tags covers CHUNK_SIZE posts.
+    'post_tags': post_tags,
+}
+
+
+def generate_chunk(table, seed, chunk, sizes, chunk_size=CHUNK_SIZE):
+    total = sizes['posts'] if table == 'post_tags' else sizes[table]
+    start = chunk * chunk_size
+    count = min(chunk_size, total - start)
+    return GENERATORS[table](_rng(seed, table, chunk), start, count, sizes)
+
+
+def chunks(table, seed, sizes, executor=None, window=8):
+    """Yield the chunks of ``table`` in order, generated ``window`` at a time on ``executor``."""
+    # Read here and passed on: worker processes don't share this module's state.
+    chunk_size = CHUNK_SIZE
+    total = sizes['posts'] if table == 'post_tags' else sizes[table]
+    count = -(-total // chunk_size)
+    if executor is None:
+        for chunk in range(count):
+            yield generate_chunk(table, seed, chunk, sizes, chunk_size)
+        return
+    pending = []
+    for chunk in range(count):
+        pending.append(executor.submit(generate_chunk, table, seed, chunk, sizes, chunk_size))
+        if len(pending) >= window:
+            yield pending.pop(0).result()
+    for future in pending:
+        yield future.result()
+
+
+class Checksum:
+    """SHA-256 over the generated rows, independent of database ids."""
+
+    def __init__(self):
+        self.digest = hashlib.sha256()
+        self.rows = 0
+
+    def update(self, rows):
+        for row in rows:
+            self.digest.update(json.dumps(row, separators=(',', ':')).encode())
+            self.digest.update(b'\n')
+        self.rows += len(rows)
+
+    def hexdigest(self):
+        return self.digest.hexdigest()
+
+
+def make_executor(workers):
+    return ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
@@ -0,0 +1,71 @@
+"""
+Selectable SQLite configurations for ``DATABASES``.
+
+``stock`` is Django's default: a new connection per request and SQLite's
+default rollback journal. ``production`` turns on WAL so readers and the
+writer don't block each other, waits on locks instead of failing with
+``database is locked``, starts write transactions with ``BEGIN IMMEDIATE``,
+and keeps connections open across requests with health checks.
+
+This module is imported by settings, so it must not import Django settings.
+"""
+
+PROFILES = {
+    'stock': {
+        'pragmas': {},
+        'persistent': False,
+    },
+    'production': {
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'busy_timeout': 5000,
+            'cache_size': -20000,  # KiB, i.e. about 20 MB per connection
+            'mmap_size': 128 * 1024 * 1024,
+            'temp_store': 'MEMORY',
+        },
+        'persistent': True,
+    },
+}
+
+# Pragmas that change the database file or need write access.
+WRITE_ONLY_PRAGMAS = {'journal_mode', 'synchronous'}
+
+
+def pragma_statements(profile, read_only=False):
+    pragmas = PROFILES[profile]['pragmas']
+    return [
+        f'PRAGMA {name}={value}'
+        for name, value in pragmas.items()
+        if not (read_only and name in WRITE_ONLY_PRAGMAS)
+    ]
+
+
+def sqlite_database(name, profile='stock', read_only=False, persistent=None):
+    """
+    A ``DATABASES`` entry for the SQLite file ``name`` using ``profile``.
+
+    ``persistent=False`` opens a new connection per request even if the
+    profile keeps them, e.g. for a file that is replaced by renaming a new
+    copy over it: a kept connection would read the old inode forever.
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown database profile '{profile}'; choose from {', '.join(PROFILES)}")
+    config = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f'file:{name}?mode=ro' if read_only else name,
+        'OPTIONS': {},
+    }
+    statements = pragma_statements(profile, read_only)
+    if statements:
+        config['OPTIONS']['init_command'] = ';'.join(statements)
+    if persistent is None:
+        persistent = PROFILES[profile]['persistent']
+    if 'busy_timeout' in PROFILES[profile]['pragmas']:
+        config['OPTIONS']['timeout'] = PROFILES[profile]['pragmas']['busy_timeout'] / 1000
+    if PROFILES[profile]['persistent'] and not read_only:
+        config['OPTIONS']['transaction_mode'] = 'IMMEDIATE'
+    if persistent:
+        config['CONN_MAX_AGE'] = 600
+        config['CONN_HEALTH_CHECKS'] = True
+    return config
@@ -0,0 +1,141 @@
+"""
+Read/write split between the primary database and a read replica.
+
+Reads are only sent to the ``replica`` alias inside ``replica_reads()``
+(used by the read-only viewsets through ``ReplicaReadMixin``, and available
+to analytics code), and only while the replica is fresh enough. Any write
+pins the rest of the request, or command, to the primary so it reads its own
+writes; ``ReplicaPinningMiddleware`` scopes the pin to a request and carries
+it over to the client's next requests for ``REPLICA_MAX_LAG`` seconds after
+its last write.
+
+Replica modes (``DB_REPLICA_MODE``):
+
+``wal``
+    A read-only connection to the primary file. With the primary in WAL
+    journal mode readers don't block the writer and there is no lag.
+``snapshot``
+    A separate file refreshed with the SQLite backup API by
+    ``manage.py refresh_replica``. The lag is the age of the snapshot the
+    replica connection actually reads, from the marker row the refresh
+    writes into it (a connection opened before a refresh keeps reading the
+    replaced file).
+"""
+import contextvars
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+from course.sqlite_snapshots import snapshot_taken_at
+
+REPLICA_ALIAS = 'replica'
+PIN_COOKIE = 'db_pin_primary'
+# Same as rest_framework.permissions.SAFE_METHODS, without importing DRF
+# into every process that loads the middleware.
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_replica_reads = contextvars.ContextVar('replica_reads', default=False)
+_pinned = contextvars.ContextVar('pinned_to_primary', default=False)
+_wrote = contextvars.ContextVar('wrote_to_primary', default=False)
+_lag_cache = {'checked_at': 0.0, 'lag': None}
+
+
+def replica_configured():
+    return bool(settings.DB_REPLICA_MODE) and REPLICA_ALIAS in settings.DATABASES
+
+
+@contextmanager
+def replica_reads():
+    """Let reads in this block go to the replica when it is healthy."""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def pin_to_primary():
+    _pinned.set(True)
+
+
+def replica_lag():
+    """Seconds the replica is behind the primary, or ``None`` if it is unusable."""
+    if settings.DB_REPLICA_MODE == 'wal':
+        return 0.0
+    try:
+        taken_at = snapshot_taken_at(connections[REPLICA_ALIAS])
+    except DatabaseError:
+        return None
+    return None if taken_at is None else max(0.0, time.time() - taken_at)
+
+
+def replica_healthy():
+    """Whether the replica lag is known and within ``REPLICA_MAX_LAG``; cached briefly."""
+    now = time.monotonic()
+    if now - _lag_cache['checked_at'] > settings.REPLICA_CHECK_INTERVAL:
+        _lag_cache['lag'] = replica_lag()
+        _lag_cache['checked_at'] = now
+    lag = _lag_cache['lag']
+    return lag is not None and lag <= settings.REPLICA_MAX_LAG
+
+
+class ReadReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if (
+            _replica_reads.get()
+            and not _pinned.get()
+            and replica_configured()
+            and replica_healthy()
+        ):
+            return REPLICA_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        _wrote.set(True)
+        pin_to_primary()
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != REPLICA_ALIAS
+
+
+class ReplicaPinningMiddleware:
+    """
+    Scope read-your-writes pinning to the request. Unsafe requests are pinned
+    from the start, and a request that writes sets a cookie for
+    ``REPLICA_MAX_LAG`` seconds so the client's next reads see its write.
+    The cookie pins those requests but isn't renewed by them, so a client
+    that keeps polling goes back to the replica once its write is old enough.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        unsafe = request.method not in SAFE_METHODS
+        pinned_token = _pinned.set(unsafe or PIN_COOKIE in request.COOKIES)
+        wrote_token = _wrote.set(unsafe)
+        try:
+            response = self.get_response(request)
+            if _wrote.get() and replica_configured() and settings.DB_REPLICA_MODE != 'wal':
+                response.set_cookie(PIN_COOKIE, '1', max_age=settings.REPLICA_MAX_LAG, httponly=True)
+            return response
+        finally:
+            _wrote.reset(wrote_token)
+            _pinned.reset(pinned_token)
+
+
+class ReplicaReadMixin:
+    """Serve safe (read-only) requests of a view from the replica."""
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method in SAFE_METHODS:
+            with replica_reads():
+                return super().dispatch(request, *args, **kwargs)
+        return super().dispatch(request, *args, **kwargs)
@@ -0,0 +1,16 @@
+"""
+Base class for commands run by cron and workers rather than by hand.
+"""
+from django.core.management.base import BaseCommand
+
+
+class JobCommand(BaseCommand):
+    """
+    A command that skips the system checks.
+
+    The checks import the whole URLconf, and with it DRF and every viewset
+    and serializer, which costs a job more than its own work. Deploys and
+    ``manage.py check`` still run them.
+    """
+
+    requires_system_checks = []
@@ -0,0 +1,118 @@
+import json
+import os
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import CommandError
+
+from course.management.base import JobCommand
+from course.sqlite_snapshots import backup, compress, database_path, install, restore_blocks, store_blocks
+
+
+class Command(JobCommand):
+    help = (
+        'Back up the SQLite database online with the backup API, optionally gzipped or as '
+        'incremental content-addressed blocks, and refresh the replica snapshot from the same copy'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'destination',
+            help='Backup file, or the backup directory with --incremental',
+        )
+        parser.add_argument(
+            '--database',
+            default='default',
+            help='Database alias to back up (default: default)',
+        )
+        parser.add_argument(
+            '--pages',
+            type=int,
+            default=256,
+            help='Pages copied per backup step (default: 256)',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0.005,
+            help='Seconds to pause between backup steps and before retrying a busy one (default: 0.005)',
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Compress the backup file or the new blocks with gzip',
+        )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Store content-addressed blocks and a timestamped manifest under DESTINATION',
+        )
+        parser.add_argument(
+            '--snapshot',
+            action='store_true',
+            help='Also install the copy as the snapshot replica (DJANGO_DB_REPLICA=snapshot)',
+        )
+        parser.add_argument(
+            '--restore',
+            metavar='MANIFEST',
+            help='Rebuild DESTINATION from an incremental manifest instead of backing up',
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Print the statistics as JSON',
+        )
+
+    def handle(self, *args, **options):
+        destination = Path(options['destination'])
+        if options['restore']:
+            restore_blocks(options['restore'], destination)
+            self.stdout.write(self.style.SUCCESS(f'Restored {destination} from {options["restore"]}'))
+            return
+        if options['snapshot'] and settings.DB_REPLICA_MODE != 'snapshot':
+            raise CommandError('Set DJANGO_DB_REPLICA=snapshot to use --snapshot')
+
+        if options['incremental']:
+            destination.mkdir(parents=True, exist_ok=True)
+            copy = destination / 'backup.sqlite3.copy'
+        else:
+            copy = Path(f'{destination}.copy')
+        name = time.strftime('%Y%m%dT%H%M%S')
+        taken_at = time.time()
+        stats = backup(database_path(options['database']), copy, pages=options['pages'], sleep=options['sleep'])
+        result = stats.as_dict()
+        try:
+            # Every output comes from the same copy, so they are the same point in time.
+            if options['snapshot']:
+                install(copy, settings.DB_REPLICA_PATH, taken_at)
+                result['snapshot'] = str(settings.DB_REPLICA_PATH)
+            if options['incremental']:
+                blocks, new_blocks = store_blocks(copy, destination, name, compressed=options['gzip'])
+                result.update(manifest=str(destination / f'{name}.json'), blocks=blocks, new_blocks=new_blocks)
+            elif options['gzip']:
+                compress(copy, destination)
+                result['file'] = str(destination)
+            else:
+                os.replace(copy, destination)
+                result['file'] = str(destination)
+        finally:
+            if copy.exists():
+                copy.unlink()
+
+        if options['json']:
+            self.stdout.write(json.dumps(result, indent=2))
+            return
+        self.stdout.write(
+            f"{result['pages']} pages ({result['bytes'] / 1e6:.1f} MB) in {result['elapsed_ms']:.0f} ms, "
+            f"{result['throughput_mb_s']:.1f} MB/s"
+        )
+        self.stdout.write(
+            f"{result['steps']} steps, {result['busy_steps']} busy, {result['restarts']} restarts, "
+            f"{result['lock_wait_ms']:.1f} ms waiting on locks"
+        )
+        if options['incremental']:
+            self.stdout.write(f"{result['new_blocks']} of {result['blocks']} blocks new")
+        if options['snapshot']:
+            self.stdout.write(f"Replica snapshot installed at {result['snapshot']}")
+        self.stdout.write(self.style.SUCCESS(f"Backup written to {result.get('manifest') or result['file']}"))
@@ -0,0 +1,165 @@
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+
+from course.db_profiles import PROFILES, sqlite_database
+
+
+def add_database(alias, path, profile, **kwargs):
+    """Register ``alias`` for the SQLite file ``path``, configured like ``DATABASES`` would be."""
+    config = sqlite_database(path, profile, **kwargs)
+    connections.settings[alias] = connections.configure_settings({DEFAULT_DB_ALIAS: config})[DEFAULT_DB_ALIAS]
+
+
+def remove_database(alias):
+    del connections.settings[alias]
+
+
+class Worker(threading.Thread):
+    """
+    Runs reads or writes on the Django connection ``alias`` until
+    ``deadline``, the way a request would: each operation ends like
+    ``request_finished``, which closes the connection unless the profile
+    keeps it (``CONN_MAX_AGE``).
+    """
+
+    def __init__(self, alias, kind, deadline, rows, seed):
+        super().__init__(daemon=True)
+        self.alias = alias
+        self.kind = kind
+        self.deadline = deadline
+        self.rows = rows
+        self.random = random.Random(seed)
+        self.latencies = []
+        self.locked = 0
+
+    def run(self):
+        connection = connections[self.alias]
+        try:
+            while time.monotonic() < self.deadline:
+                started = time.perf_counter()
+                try:
+                    if self.kind == 'read':
+                        self.read(connection)
+                    else:
+                        self.write(connection)
+                    self.latencies.append(time.perf_counter() - started)
+                except OperationalError as exc:
+                    if 'locked' not in str(exc) and 'busy' not in str(exc):
+                        raise
+                    self.locked += 1
+                connection.close_if_unusable_or_obsolete()
+        finally:
+            connection.close()
+
+    def read(self, connection):
+        start = self.random.randint(1, self.rows)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT id, title, views FROM stress_article WHERE id BETWEEN %s AND %s',
+                (start, start + 15),
+            )
+            cursor.fetchall()
+
+    def write(self, connection):
+        # BEGIN IMMEDIATE or deferred, as the profile's transaction_mode says.
+        with transaction.atomic(using=self.alias), connection.cursor() as cursor:
+            cursor.execute(
+                'INSERT INTO stress_article (title, body, views) VALUES (%s, %s, 0)',
+                (f'Article {self.random.random()}', 'x' * 500),
+            )
+            cursor.execute(
+                'UPDATE stress_article SET views = views + 1 WHERE id = %s',
+                (self.random.randint(1, self.rows),),
+            )
+
+
+class Command(BaseCommand):
+    help = 'Compare SQLite throughput of the database profiles under concurrent reads and writes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--profiles',
+            default=','.join(PROFILES),
+            help=f"Comma-separated profiles to compare (default: {','.join(PROFILES)})",
+        )
+        parser.add_argument('--readers', type=int, default=8, help='Reader threads (default: 8)')
+        parser.add_argument('--writers', type=int, default=2, help='Writer threads (default: 2)')
+        parser.add_argument('--duration', type=float, default=5.0, help='Seconds per profile (default: 5)')
+        parser.add_argument('--rows', type=int, default=20000, help='Rows seeded before the run (default: 20000)')
+
+    def handle(self, *args, **options):
+        profiles = [name.strip() for name in options['profiles'].split(',') if name.strip()]
+        unknown = set(profiles) - set(PROFILES)
+        if unknown:
+            raise CommandError(f"Unknown profiles: {', '.join(sorted(unknown))}")
+
+        self.stdout.write(
+            f"{options['readers']} readers, {options['writers']} writers, "
+            f"{options['duration']:.0f}s per profile on a scratch database\n"
+        )
+        header = f"{'profile':<12} {'reads/s':>10} {'writes/s':>10} {'read p99 ms':>12} {'write p99 ms':>13} {'locked':>8}"
+        self.stdout.write(self.style.SUCCESS(header))
+        with tempfile.TemporaryDirectory() as scratch:
+            for profile in profiles:
+                alias = f'stress_{profile}'
+                add_database(alias, os.path.join(scratch, f'{profile}.sqlite3'), profile)
+                try:
+                    self.seed(alias, options['rows'])
+                    row = self.run_profile(alias, options)
+                finally:
+                    remove_database(alias)
+                self.stdout.write(
+                    f"{profile:<12} {row['reads']:>10.0f} {row['writes']:>10.0f} "
+                    f"{row['read_p99']:>12.2f} {row['write_p99']:>13.2f} {row['locked']:>8}"
+                )
+
+    def seed(self, alias, rows):
+        connection = connections[alias]
+        with transaction.atomic(using=alias), connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TABLE stress_article (id INTEGER PRIMARY KEY, title TEXT, body TEXT, views INTEGER)'
+            )
+            cursor.executemany(
+                'INSERT INTO stress_article (title, body, views) VALUES (%s, %s, 0)',
+                [(f'Article {i}', 'x' * 500) for i in range(rows)],
+            )
+        connection.close()
+
+    def run_profile(self, alias, options):
+        deadline = time.monotonic() + options['duration']
+        workers = [
+            Worker(alias, 'read', deadline, options['rows'], seed=i)
+            for i in range(options['readers'])
+        ] + [
+            Worker(alias, 'write', deadline, options['rows'], seed=1000 + i)
+            for i in range(options['writers'])
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        def collect(kind):
+            return [latency for w in workers if w.kind == kind for latency in w.latencies]
+
+        reads, writes = collect('read'), collect('write')
+        return {
+            'reads': len(reads) / options['duration'],
+            'writes': len(writes) / options['duration'],
+            'read_p99': self.p99(reads),
+            'write_p99': self.p99(writes),
+            'locked': sum(w.locked for w in workers),
+        }
+
+    @staticmethod
+    def p99(samples):
+        if len(samples) < 2:
+            return samples[0] * 1000 if samples else 0.0
+        return statistics.quantiles(samples, n=100)[98] * 1000
@@ -0,0 +1,136 @@
+import json
+import os
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from course import datasets
+from notifications.models import Post, Tag
+from pagination import page_index
+from pagination.models import Article, ArticlePageBoundary
+from restaurant.models import Restaurant, Sale
+
+# Insert order; parents before the rows that reference them.
+TABLES = ('articles', 'restaurants', 'sales', 'tags', 'posts', 'post_tags')
+
+
+class Command(BaseCommand):
+    help = 'Fill the database with a deterministic dataset (articles, restaurants, sales, tags, posts) for benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--profile',
+            choices=datasets.PROFILES,
+            default='small',
+            help='Dataset size (default: small)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Random seed; the same profile and seed give the same data (default: 42)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Processes generating rows; inserts stay on one writer (default: CPU count)',
+        )
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Delete existing rows of the generated models first, without signals',
+        )
+        parser.add_argument(
+            '--manifest',
+            metavar='PATH',
+            help='Write the manifest (row counts and checksums) to this file instead of stdout',
+        )
+
+    def handle(self, *args, **options):
+        sizes = datasets.PROFILES[options['profile']]
+        seed = options['seed']
+        models = [Article, Restaurant, Sale, Tag, Post, Post.tags.through]
+
+        if options['clear']:
+            with transaction.atomic():
+                for model in reversed(models):
+                    model.objects.all()._raw_delete(model.objects.db)
+        elif any(model.objects.exists() for model in models):
+            raise CommandError('The database already has data for these models; use --clear to replace it.')
+
+        self.ids = {}
+        manifest = {'profile': options['profile'], 'seed': seed, 'counts': {}, 'checksums': {}}
+        executor = datasets.make_executor(options['workers'])
+        try:
+            for table in TABLES:
+                started = time.perf_counter()
+                checksum = datasets.Checksum()
+                for rows in datasets.chunks(table, seed, sizes, executor):
+                    checksum.update(rows)
+                    with transaction.atomic():
+                        getattr(self, f'insert_{table}')(rows)
+                manifest['counts'][table] = checksum.rows
+                manifest['checksums'][table] = checksum.hexdigest()
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'  {table:<12} {checksum.rows:>10} rows in {elapsed:6.1f}s '
+                    f'({checksum.rows / max(elapsed, 1e-9):,.0f} rows/s)'
+                )
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        # The join rows were bulk inserted without m2m_changed, and the
+        # articles without the save signals that maintain the page index.
+        Tag.objects.reconcile_post_counts()
+        page_index.rebuild(Article, ArticlePageBoundary)
+
+        text = json.dumps(manifest, indent=2)
+        if options['manifest']:
+            with open(options['manifest'], 'w') as fh:
+                fh.write(text + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Manifest written to {options['manifest']}"))
+        else:
+            self.stdout.write(text)
+
+    def insert_articles(self, rows):
+        Article.objects.bulk_create(
+            Article(title=title, content=content, author=author, is_published=is_published)
+            for title, content, author, is_published in rows
+        )
+
+    def insert_restaurants(self, rows):
+        created = Restaurant.objects.bulk_create(
+            Restaurant(name=name, restaurant_type=kind, date_opened=date.fromisoformat(opened))
+            for name, kind, opened in rows
+        )
+        self.ids.setdefault('restaurants', []).extend(obj.pk for obj in created)
+
+    def insert_sales(self, rows):
+        restaurant_ids = self.ids['restaurants']
+        Sale.objects.bulk_create(
+            Sale(restaurant_id=restaurant_ids[restaurant], income=income, expenditure=expenditure)
+            for restaurant, income, expenditure in rows
+        )
+
+    def insert_tags(self, rows):
+        created = Tag.objects.bulk_create(Tag(name=name) for name, in rows)
+        self.ids.setdefault('tags', []).extend(obj.pk for obj in created)
+
+    def insert_posts(self, rows):
+        # Slugs are unique by construction, so PostQuerySet.bulk_create has nothing to look up.
+        created = Post.objects.bulk_create(
+            Post(title=title, slug=slug, content=content)
+            for title, slug, content in rows
+        )
+        self.ids.setdefault('posts', []).extend(obj.pk for obj in created)
+
+    def insert_post_tags(self, rows):
+        post_ids, tag_ids = self.ids['posts'], self.ids['tags']
+        Post.tags.through.objects.bulk_create(
+            Post.tags.through(post_id=post_ids[post], tag_id=tag_ids[tag])
+            for post, tag in rows
+        )
@@ -0,0 +1,53 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import CommandError
+
+from course.management.base import JobCommand
+from course.sqlite_snapshots import database_path, snapshot
+
+
+class Command(JobCommand):
+    help = 'Refresh the snapshot read replica from the primary with the SQLite backup API'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            help='Keep refreshing every INTERVAL seconds instead of once',
+        )
+        parser.add_argument(
+            '--pages',
+            type=int,
+            default=256,
+            help='Pages copied per backup step (default: 256)',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0.005,
+            help='Seconds to pause between backup steps (default: 0.005)',
+        )
+
+    def handle(self, *args, **options):
+        if settings.DB_REPLICA_MODE != 'snapshot':
+            raise CommandError("Set DJANGO_DB_REPLICA=snapshot to use a snapshot replica")
+        if options['interval'] is not None and options['interval'] >= settings.REPLICA_MAX_LAG:
+            self.stderr.write(
+                self.style.WARNING('Interval is not below REPLICA_MAX_LAG; reads will fall back to the primary')
+            )
+
+        while True:
+            stats = snapshot(
+                database_path(),
+                settings.DB_REPLICA_PATH,
+                pages=options['pages'],
+                sleep=options['sleep'],
+            )
+            self.stdout.write(
+                f'Replica refreshed in {stats.elapsed * 1000:.1f} ms '
+                f'({stats.busy_steps} busy steps, {stats.lock_wait * 1000:.1f} ms waiting on locks)'
+            )
+            if options['interval'] is None:
+                break
+            time.sleep(max(0.0, options['interval'] - stats.elapsed))
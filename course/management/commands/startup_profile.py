@@ -0,0 +1,73 @@
+import json
+import subprocess
+
+from django.conf import settings
+from django.core.management.base import CommandError
+
+from course.management.base import JobCommand
+from course.startup import PHASES, import_time_by_package, run_profile
+
+
+class Command(JobCommand):
+    help = 'Profile cold start: django.setup(), app registry, URLconf, WSGI and per-module imports'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=15,
+            help='Number of slowest modules to list (default: 15)',
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Print the profile as JSON',
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Fail if a phase exceeds STARTUP_BUDGET_MS',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            phases, modules = run_profile(cwd=settings.BASE_DIR)
+        except subprocess.CalledProcessError as exc:
+            raise CommandError(f'Startup profile failed:\n{exc.stderr[-2000:]}')
+
+        slowest = sorted(modules, key=lambda module: module[2], reverse=True)[:options['top']]
+        packages = import_time_by_package(modules)
+        over_budget = {
+            phase: (phases[phase], budget)
+            for phase, budget in settings.STARTUP_BUDGET_MS.items()
+            if phases.get(phase, 0) > budget
+        }
+
+        if options['json']:
+            self.stdout.write(json.dumps({
+                'phases_ms': phases,
+                'packages_ms': packages,
+                'slowest_modules': [
+                    {'module': name, 'self_ms': self_us / 1000, 'cumulative_ms': cumulative_us / 1000}
+                    for name, self_us, cumulative_us in slowest
+                ],
+                'over_budget': {phase: spent for phase, (spent, _budget) in over_budget.items()},
+            }, indent=2))
+        else:
+            self.stdout.write(self.style.SUCCESS('Startup phases (ms):'))
+            for phase in (*PHASES, 'total'):
+                budget = settings.STARTUP_BUDGET_MS.get(phase)
+                suffix = f'  (budget {budget})' if budget else ''
+                self.stdout.write(f'  {phase:<15} {phases.get(phase, 0):>9.1f}{suffix}')
+            self.stdout.write(self.style.SUCCESS('\nSelf import time by package (ms):'))
+            for package, spent in list(packages.items())[:10]:
+                self.stdout.write(f'  {package:<30} {spent:>9.1f}')
+            self.stdout.write(self.style.SUCCESS(f'\nSlowest {len(slowest)} imports (cumulative ms):'))
+            for name, _self_us, cumulative_us in slowest:
+                self.stdout.write(f'  {name.strip():<50} {cumulative_us / 1000:>9.1f}')
+
+        if options['check'] and over_budget:
+            raise CommandError(', '.join(
+                f'{phase} took {spent:.0f} ms (budget {budget} ms)'
+                for phase, (spent, budget) in over_budget.items()
+            ))
@@ -0,0 +1,47 @@
+import json
+
+from course import telemetry
+from course.management.base import JobCommand
+
+
+class Command(JobCommand):
+    help = 'Show request latency percentiles, DB, serialization and render time and response size per route'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            help='Telemetry file to read (default: REQUEST_TELEMETRY_PATH)',
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Print the report as JSON instead of a table',
+        )
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Clear the collected telemetry after printing it',
+        )
+
+    def handle(self, *args, **options):
+        rows = telemetry.report(options['path'])
+        if options['json']:
+            self.stdout.write(json.dumps(rows, indent=2))
+        elif not rows:
+            self.stdout.write('No requests recorded yet.')
+        else:
+            header = (
+                f"{'route':<40} {'requests':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+                f"{'db ms':>8} {'queries':>8} {'serialize ms':>13} {'render ms':>10} {'bytes':>9}"
+            )
+            self.stdout.write(self.style.SUCCESS(header))
+            for row in rows:
+                self.stdout.write(
+                    f"{row['route'][-40:]:<40} {row['requests']:>9} {row['p50_ms']:>8.1f} "
+                    f"{row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['db_ms']:>8.2f} "
+                    f"{row['queries']:>8.1f} {row['serialize_ms']:>13.2f} {row['render_ms']:>10.2f} "
+                    f"{row['bytes']:>9.0f}"
+                )
+        if options['reset']:
+            telemetry.reset(options['path'])
+            self.stdout.write(self.style.SUCCESS('Telemetry cleared.'))
@@ -0,0 +1,190 @@
+"""
+Admission control: load shedding and per-client rate limits.
+
+``AdmissionControlMiddleware`` runs first, before sessions, auth or any
+query, and turns requests away in two ways:
+
+* When a process already has ``MAX_CONCURRENT_REQUESTS`` requests in
+  flight it answers ``503`` immediately instead of queueing more work on
+  a saturated worker.
+* Requests matching a rule in ``RATE_LIMITS`` take a token from the
+  client's bucket for that rule and get ``429`` when it is empty. Each rule
+  has a ``prefix`` of the path, a refill ``rate`` in requests per second
+  and a ``burst`` capacity; the first matching rule applies.
+  ``RATE_LIMIT_CLIENTS`` overrides ``rate``/``burst`` per client address,
+  or exempts a client with ``None``.
+
+Clients are told apart by ``RATE_LIMIT_CLIENT_KEY``, the dotted path of a
+function of the request: ``client_address`` (``REMOTE_ADDR``) by default,
+or ``forwarded_address`` behind a reverse proxy, where every request comes
+from the proxy's address.
+
+Buckets live in a small SQLite file (``RATE_LIMIT_PATH``) shared by all
+worker processes and updated with one atomic upsert per request, so a
+client gets the same budget whichever worker serves it. If the file is
+unavailable requests are let through. A bucket left alone long enough to
+refill is the same as no bucket, so every ``RATE_LIMIT_SWEEP_INTERVAL``
+seconds each process deletes those (``expire_idle``).
+"""
+import math
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.module_loading import import_string
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS buckets_updated_at ON buckets (updated_at)',
+)
+
+# Refill and take one token; returns no row when the bucket is empty.
+TAKE_TOKEN = '''
+INSERT INTO buckets (key, tokens, updated_at) VALUES (:key, :burst - 1, :now)
+ON CONFLICT (key) DO UPDATE SET
+    tokens = min(:burst, tokens + max(0, :now - updated_at) * :rate) - 1,
+    updated_at = max(updated_at, :now)
+WHERE min(:burst, tokens + max(0, :now - updated_at) * :rate) >= 1
+RETURNING tokens
+'''
+
+_local = threading.local()
+_in_flight_lock = threading.Lock()
+_in_flight = 0
+_last_sweep = 0.0
+
+
+def _connection():
+    path = str(settings.RATE_LIMIT_PATH)
+    connection = getattr(_local, 'connection', None)
+    if connection is None or _local.path != path:
+        connection = sqlite3.connect(path, isolation_level=None, timeout=0.1)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=OFF')
+        for statement in SCHEMA:
+            connection.execute(statement)
+        _local.connection, _local.path = connection, path
+    return connection
+
+
+def take_token(key, rate, burst, now=None):
+    """
+    Take a token from bucket ``key``; return ``0`` if allowed, otherwise the
+    seconds until a token is available.
+    """
+    global _last_sweep
+    now = time.time() if now is None else now
+    connection = _connection()
+    if now - _last_sweep >= settings.RATE_LIMIT_SWEEP_INTERVAL:
+        _last_sweep = now
+        expire_idle(now)
+    params = {'key': key, 'rate': rate, 'burst': burst, 'now': now}
+    if connection.execute(TAKE_TOKEN, params).fetchone() is not None:
+        return 0
+    row = connection.execute('SELECT tokens, updated_at FROM buckets WHERE key = ?', (key,)).fetchone()
+    if row is None:
+        return 0
+    tokens = min(burst, row[0] + max(0.0, now - row[1]) * rate)
+    return max(0.0, (1 - tokens) / rate)
+
+
+def refill_time():
+    """Seconds in which any bucket under the current rules refills from empty."""
+    overrides = [{}, *(override for override in settings.RATE_LIMIT_CLIENTS.values() if override)]
+    return max(
+        (
+            rule['burst'] / rule['rate']
+            for base in settings.RATE_LIMITS
+            for rule in ({**base, **override} for override in overrides)
+        ),
+        default=0.0,
+    )
+
+
+def expire_idle(now=None):
+    """Delete buckets idle long enough to be full again; returns how many."""
+    now = time.time() if now is None else now
+    return _connection().execute('DELETE FROM buckets WHERE updated_at < ?', (now - refill_time(),)).rowcount
+
+
+def reset():
+    _connection().execute('DELETE FROM buckets')
+
+
+def client_address(request):
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def forwarded_address(request):
+    """
+    The address the reverse proxy in front of the app saw: the last
+    ``X-Forwarded-For`` entry, which it appended. Earlier entries come from
+    the client and can be forged. Only correct behind exactly one proxy.
+    """
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+    return forwarded.rsplit(',', 1)[-1].strip() or client_address(request)
+
+
+def limit_for(path, client):
+    """``(rule prefix, rate, burst)`` limiting ``client`` on ``path``, or ``None``."""
+    for rule in settings.RATE_LIMITS:
+        if path.startswith(rule['prefix']):
+            break
+    else:
+        return None
+    overrides = settings.RATE_LIMIT_CLIENTS
+    if client in overrides:
+        if overrides[client] is None:
+            return None
+        rule = {**rule, **overrides[client]}
+    return rule['prefix'], rule['rate'], rule['burst']
+
+
+def rejected(status, detail, retry_after):
+    response = JsonResponse({'detail': detail}, status=status)
+    response['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+class AdmissionControlMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        global _in_flight
+        if not settings.RATE_LIMITING:
+            return self.get_response(request)
+
+        with _in_flight_lock:
+            if settings.MAX_CONCURRENT_REQUESTS and _in_flight >= settings.MAX_CONCURRENT_REQUESTS:
+                shed = True
+            else:
+                shed = False
+                _in_flight += 1
+        if shed:
+            return rejected(503, 'Server busy, try again shortly.', 1)
+
+        try:
+            response = self.check_rate(request)
+            if response is None:
+                response = self.get_response(request)
+            return response
+        finally:
+            with _in_flight_lock:
+                _in_flight -= 1
+
+    def check_rate(self, request):
+        client = import_string(settings.RATE_LIMIT_CLIENT_KEY)(request)
+        limit = limit_for(request.path, client)
+        if limit is None:
+            return None
+        prefix, rate, burst = limit
+        try:
+            wait = take_token(f'{prefix}|{client}', rate, burst)
+        except sqlite3.Error:
+            return None
+        if wait:
+            return rejected(429, 'Request was throttled.', wait)
+        return None
@@ -10,8 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import sys
 from pathlib import Path
 
+from course.db_profiles import sqlite_database
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -27,6 +31,9 @@ DEBUG = True
 
 ALLOWED_HOSTS = []
 
+# True under `manage.py test`.
+TESTING = sys.argv[1:2] == ['test']
+
 
 # Application definition
 
@@ -41,6 +48,7 @@ INSTALLED_APPS = [
     'rest_framework',
     'restaurant',
     'notifications',
+    'course',
 ]
 
 
@@ -50,7 +58,11 @@ REST_FRAMEWORK = {
 }
 
 MIDDLEWARE = [
+    # Outermost, so responses from admission control (429/503) are recorded too.
+    'course.telemetry.RequestTelemetryMiddleware',
+    'course.ratelimit.AdmissionControlMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'course.db_routers.ReplicaPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -82,13 +94,39 @@ WSGI_APPLICATION = 'course.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# 'stock' or 'production' (WAL, busy timeout, persistent connections);
+# see course/db_profiles.py.
+DB_PROFILE = os.environ.get('DJANGO_DB_PROFILE', 'stock')
+
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': sqlite_database(BASE_DIR / 'db.sqlite3', DB_PROFILE),
 }
 
+# Read replica for read-only viewsets and analytics (see course/db_routers.py):
+# '' (disabled), 'wal' (read-only connection to the primary file) or
+# 'snapshot' (a copy refreshed by `manage.py refresh_replica`).
+# Always off under tests, where the 'replica' alias is only a mirror of the
+# test database; the router tests turn a mode on with override_settings.
+DB_REPLICA_MODE = '' if TESTING else os.environ.get('DJANGO_DB_REPLICA', '')
+
+DB_REPLICA_PATH = Path(os.environ.get('DJANGO_DB_REPLICA_PATH', BASE_DIR / 'db.replica.sqlite3'))
+
+if DB_REPLICA_MODE or TESTING:
+    replica_file = BASE_DIR / 'db.sqlite3' if DB_REPLICA_MODE == 'wal' else DB_REPLICA_PATH
+    # refresh_replica renames a new snapshot over the file, so snapshot
+    # connections aren't kept across requests.
+    DATABASES['replica'] = {
+        **sqlite_database(replica_file, DB_PROFILE, read_only=True, persistent=DB_REPLICA_MODE != 'snapshot'),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['course.db_routers.ReadReplicaRouter']
+
+# Seconds a snapshot replica may lag before reads fall back to the primary.
+REPLICA_MAX_LAG = 30
+
+REPLICA_CHECK_INTERVAL = 1.0
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -126,6 +164,93 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Email
+# https://docs.djangoproject.com/en/5.2/topics/email/
+
+EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+
+DEFAULT_FROM_EMAIL = 'noreply@example.com'
+
+
+# Outbox for signal side effects (see notifications/outbox.py)
+
+OUTBOX_BATCH_SIZE = 50
+
+OUTBOX_MAX_ATTEMPTS = 5
+
+OUTBOX_BACKOFF_BASE = 5
+
+OUTBOX_BACKOFF_MAX = 3600
+
+OUTBOX_LEASE_SECONDS = 300
+
+
+# Per-receiver signal profiling (see notifications/instrumentation.py)
+
+SIGNAL_PROFILING = False
+
+SIGNAL_PROFILING_DUMP = None
+
+# Per-route request telemetry and Server-Timing headers (see course/telemetry.py)
+# Off under tests, which would otherwise add their requests to the real file.
+
+REQUEST_TELEMETRY = not TESTING
+
+REQUEST_TELEMETRY_PATH = Path(os.environ.get('DJANGO_TELEMETRY_PATH', BASE_DIR / 'telemetry.sqlite3'))
+
+REQUEST_TELEMETRY_FLUSH_INTERVAL = 10
+
+# Load shedding and per-client token buckets (see course/ratelimit.py)
+# Off under tests, where every client is 127.0.0.1 and would share buckets;
+# tests that turn it on get a private in-memory store.
+
+RATE_LIMITING = not TESTING
+
+RATE_LIMIT_PATH = ':memory:' if TESTING else Path(
+    os.environ.get('DJANGO_RATE_LIMIT_PATH', BASE_DIR / 'ratelimit.sqlite3')
+)
+
+# Function of the request naming the client; use
+# 'course.ratelimit.forwarded_address' behind a reverse proxy.
+RATE_LIMIT_CLIENT_KEY = 'course.ratelimit.client_address'
+
+# Seconds between deletions of buckets idle long enough to have refilled.
+RATE_LIMIT_SWEEP_INTERVAL = 60
+
+# Requests in flight per worker process before new ones get 503; 0 disables.
+MAX_CONCURRENT_REQUESTS = 64
+
+# First matching prefix wins; rate is requests per second per client.
+RATE_LIMITS = [
+    {'prefix': '/api/articles/', 'rate': 10, 'burst': 50},
+    {'prefix': '/api/', 'rate': 20, 'burst': 100},
+]
+
+# Per-client address overrides of rate/burst; None exempts the client.
+RATE_LIMIT_CLIENTS = {}
+
+# Seconds before the in-memory tag autocomplete index is reloaded from the
+# database, in a background thread (see notifications/tag_index.py)
+TAG_INDEX_TTL = 300
+
+# Write-behind article view counters (see pagination/view_counts.py)
+# Off under tests, which flush explicitly.
+
+ARTICLE_VIEWS_FLUSHER = not TESTING
+
+ARTICLE_VIEWS_FLUSH_INTERVAL = 5
+
+ARTICLE_VIEWS_FLUSH_THRESHOLD = 1000
+
+# Cold-start budget in milliseconds per startup phase, checked by
+# `manage.py startup_profile --check` (see course/startup.py).
+
+STARTUP_BUDGET_MS = {
+    'setup': 1000,
+    'urlconf': 500,
+    'total': 2500,
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -0,0 +1,235 @@
+"""
+Consistent copies of a live SQLite database through the online backup API.
+
+The backup copies ``pages`` pages at a time and pauses ``sleep`` seconds
+between steps, so writers on the source are only blocked for one short
+step at a time. A step that finds the source busy or locked is retried
+after the same pause; ``BackupStats`` counts those steps and the time lost
+to them.
+
+SQLite restarts a backup from the first page whenever another connection
+writes to the source, so under steady writes a stepped copy never ends.
+On a restart the copy starts over with twice the step size; in WAL mode
+it goes straight to a single step, whose read transaction doesn't block
+writers there.
+
+A finished copy can be stored as a gzip file, or as content-addressed
+blocks plus a JSON manifest, so successive backups only store the blocks
+that changed (``store_blocks`` / ``restore_blocks``).
+
+Snapshots installed for the replica record when they were taken in a
+``SNAPSHOT_TABLE`` row, so the replica's lag is read through the same
+connection that serves its queries (``snapshot_taken_at``).
+"""
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+# Bytes per content-addressed block; a multiple of every SQLite page size.
+BLOCK_SIZE = 1 << 20
+
+SNAPSHOT_TABLE = 'replica_snapshot'
+
+
+def database_path(alias='default'):
+    """Filesystem path of the SQLite file behind ``alias``, also for ``file:`` URIs."""
+    name = str(settings.DATABASES[alias]['NAME'])
+    if name.startswith('file:'):
+        name = name[len('file:'):].split('?', 1)[0]
+    return name
+
+
+class _Restarted(Exception):
+    pass
+
+
+class BackupStats:
+    def __init__(self):
+        self.pages = 0
+        self.page_size = 0
+        self.steps = 0
+        self.busy_steps = 0
+        self.restarts = 0
+        self.lock_wait = 0.0
+        self.elapsed = 0.0
+
+    @property
+    def bytes(self):
+        return self.pages * self.page_size
+
+    @property
+    def throughput(self):
+        """Bytes copied per second."""
+        return self.bytes / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self):
+        return {
+            'pages': self.pages,
+            'bytes': self.bytes,
+            'steps': self.steps,
+            'busy_steps': self.busy_steps,
+            'restarts': self.restarts,
+            'lock_wait_ms': round(self.lock_wait * 1000, 1),
+            'elapsed_ms': round(self.elapsed * 1000, 1),
+            'throughput_mb_s': round(self.throughput / 1e6, 2),
+        }
+
+
+def backup(source, destination, pages=256, sleep=0.005):
+    """Copy the database at ``source`` to the file ``destination``; returns ``BackupStats``."""
+    stats = BackupStats()
+    # The time from a busy step's report to the next report is lost to the lock.
+    last = {'at': time.perf_counter(), 'busy': False, 'remaining': None}
+
+    def progress(status, remaining, total):
+        now = time.perf_counter()
+        stats.steps += 1
+        stats.pages = total
+        if last['remaining'] is not None and remaining > last['remaining']:
+            raise _Restarted
+        last['remaining'] = remaining
+        if last['busy']:
+            stats.lock_wait += now - last['at']
+        last['busy'] = status in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+        if last['busy']:
+            # sqlite3 sleeps before retrying a busy step.
+            stats.busy_steps += 1
+        elif remaining and sleep:
+            time.sleep(sleep)
+        last['at'] = time.perf_counter()
+
+    started = time.perf_counter()
+    src = sqlite3.connect(f'file:{source}?mode=ro', uri=True)
+    dst = sqlite3.connect(str(destination))
+    try:
+        wal = src.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        while True:
+            try:
+                src.backup(dst, pages=pages, progress=progress, sleep=sleep)
+                break
+            except _Restarted:
+                stats.restarts += 1
+                last['remaining'] = None
+                pages = -1 if wal or pages * 2 >= stats.pages else pages * 2
+        # Read-only readers can't open a WAL database without its -shm file.
+        dst.execute('PRAGMA journal_mode=DELETE')
+        stats.page_size = dst.execute('PRAGMA page_size').fetchone()[0]
+    finally:
+        dst.close()
+        src.close()
+    stats.elapsed = time.perf_counter() - started
+    return stats
+
+
+def _mark_snapshot(path, taken_at):
+    connection = sqlite3.connect(str(path))
+    try:
+        with connection:
+            connection.execute(f'CREATE TABLE IF NOT EXISTS {SNAPSHOT_TABLE} (taken_at REAL NOT NULL)')
+            connection.execute(f'DELETE FROM {SNAPSHOT_TABLE}')
+            connection.execute(f'INSERT INTO {SNAPSHOT_TABLE} (taken_at) VALUES (?)', (taken_at,))
+    finally:
+        connection.close()
+
+
+def snapshot_taken_at(connection):
+    """
+    When the snapshot seen by ``connection`` (a DB-API or Django connection)
+    was taken, as a Unix time, or ``None`` if it has no marker row.
+    """
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f'SELECT taken_at FROM {SNAPSHOT_TABLE}')
+        row = cursor.fetchone()
+    finally:
+        cursor.close()
+    return row[0] if row else None
+
+
+def install(path, destination, taken_at):
+    """Copy the backup ``path`` over the snapshot ``destination`` atomically."""
+    partial = f'{destination}.partial'
+    shutil.copyfile(path, partial)
+    _mark_snapshot(partial, taken_at)
+    os.replace(partial, destination)
+
+
+def snapshot(source, destination, pages=256, sleep=0.005):
+    """
+    Copy ``source`` to ``destination`` atomically and return ``BackupStats``.
+
+    The copy is written next to ``destination`` and renamed over it, so
+    readers of the old file keep a consistent view until they reconnect.
+    """
+    partial = f'{destination}.partial'
+    taken_at = time.time()
+    stats = backup(source, partial, pages=pages, sleep=sleep)
+    _mark_snapshot(partial, taken_at)
+    os.replace(partial, destination)
+    return stats
+
+
+def compress(path, destination):
+    partial = f'{destination}.partial'
+    with open(path, 'rb') as src, gzip.open(partial, 'wb', compresslevel=6) as dst:
+        shutil.copyfileobj(src, dst, BLOCK_SIZE)
+    os.replace(partial, destination)
+
+
+def _block_path(directory, digest):
+    return Path(directory) / 'blocks' / digest[:2] / digest
+
+
+def store_blocks(path, directory, name, compressed=False, block_size=BLOCK_SIZE):
+    """
+    Split the file ``path`` into blocks stored under ``directory/blocks`` by
+    SHA-256 and write ``directory/<name>.json`` listing them in order.
+    Returns ``(blocks, new_blocks)``.
+    """
+    digests, new = [], 0
+    with open(path, 'rb') as fh:
+        while block := fh.read(block_size):
+            digest = hashlib.sha256(block).hexdigest()
+            digests.append(digest)
+            target = _block_path(directory, digest)
+            if target.exists():
+                continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+            partial = f'{target}.partial'
+            with (gzip.open(partial, 'wb') if compressed else open(partial, 'wb')) as out:
+                out.write(block)
+            os.replace(partial, target)
+            new += 1
+    manifest = {
+        'size': os.path.getsize(path),
+        'block_size': block_size,
+        'compressed': compressed,
+        'blocks': digests,
+    }
+    partial = Path(directory) / f'{name}.json.partial'
+    partial.write_text(json.dumps(manifest, indent=2) + '\n')
+    os.replace(partial, Path(directory) / f'{name}.json')
+    return len(digests), new
+
+
+def restore_blocks(manifest_path, destination):
+    """Reassemble the database file described by ``manifest_path`` at ``destination``."""
+    manifest = json.loads(Path(manifest_path).read_text())
+    directory = Path(manifest_path).parent
+    opener = gzip.open if manifest['compressed'] else open
+    partial = f'{destination}.partial'
+    with open(partial, 'wb') as out:
+        for digest in manifest['blocks']:
+            with opener(_block_path(directory, digest), 'rb') as block:
+                data = block.read()
+            if hashlib.sha256(data).hexdigest() != digest:
+                raise ValueError(f'Block {digest} is corrupt')
+            out.write(data)
+    os.replace(partial, destination)
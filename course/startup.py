@@ -0,0 +1,135 @@
+"""
+Cold-start profile of the project, run in a fresh interpreter.
+
+``python -X importtime -m course.startup`` times each startup phase and
+prints them as JSON on stdout; ``-X importtime`` writes per-module import
+times on stderr. ``manage.py startup_profile`` runs it and combines both.
+
+The API apps' URLconfs are included lazily (see ``course.urls``), so the
+``urlconf`` phase doesn't import their viewsets; ``first_route`` is the
+first request to /api/articles/ paying for it. ``python -m course.startup
+--modules PATH...`` prints which modules are loaded after the URLconf and
+after resolving each path.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+PHASES = ('import_django', 'settings', 'app_registry', 'setup', 'urlconf', 'first_route', 'system_checks', 'wsgi')
+
+FIRST_ROUTE = '/api/articles/'
+
+
+def profile_phases():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'course.settings')
+    phases = {}
+
+    def timed(name, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        phases[name] = (time.perf_counter() - start) * 1000
+        return result
+
+    started = time.perf_counter()
+    django = timed('import_django', __import__, 'django')
+    from django.apps import apps
+    from django.conf import settings
+
+    timed('settings', lambda: settings.INSTALLED_APPS)
+
+    populate = apps.populate
+
+    def timed_populate(installed_apps):
+        timed('app_registry', populate, installed_apps)
+
+    apps.populate = timed_populate
+    try:
+        timed('setup', django.setup)
+    finally:
+        apps.populate = populate
+
+    from django.core import checks
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.urls import get_resolver
+
+    timed('urlconf', lambda: get_resolver().url_patterns)
+    timed('first_route', get_resolver().resolve, FIRST_ROUTE)
+    # Paid by every manage.py command that runs system checks, on top of the URLconf.
+    timed('system_checks', checks.run_checks)
+    timed('wsgi', WSGIHandler)
+    phases['total'] = (time.perf_counter() - started) * 1000
+    return phases
+
+
+def loaded_modules(paths):
+    """
+    ``{stage: [module, ...]}`` of ``sys.modules`` after setup and the
+    URLconf (stage ``urlconf``), then after resolving each of ``paths``.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'course.settings')
+    import django
+
+    django.setup()
+    from django.urls import get_resolver
+
+    resolver = get_resolver()
+    resolver.url_patterns
+    stages = {'urlconf': sorted(sys.modules)}
+    for path in paths:
+        resolver.resolve(path)
+        stages[path] = sorted(sys.modules)
+    return stages
+
+
+def parse_importtime(lines):
+    """Return ``[(module, self_us, cumulative_us)]`` from ``-X importtime`` output."""
+    modules = []
+    for line in lines:
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+def run_profile(cwd, python=sys.executable):
+    """Profile startup in a child interpreter started in ``cwd``; returns ``(phases, modules)``."""
+    result = subprocess.run(
+        [python, '-X', 'importtime', '-m', 'course.startup'],
+        capture_output=True,
+        text=True,
+        cwd=cwd,
+        check=True,
+    )
+    phases = json.loads(result.stdout.strip().splitlines()[-1])
+    return phases, parse_importtime(result.stderr.splitlines())
+
+
+def run_loaded_modules(cwd, paths, python=sys.executable):
+    """``loaded_modules(paths)`` in a child interpreter started in ``cwd``."""
+    result = subprocess.run(
+        [python, '-m', 'course.startup', '--modules', *paths],
+        capture_output=True,
+        text=True,
+        cwd=cwd,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def import_time_by_package(modules):
+    """Self import time in ms summed per top-level package."""
+    totals = defaultdict(float)
+    for name, self_us, _cumulative in modules:
+        totals[name.split('.')[0]] += self_us / 1000
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--modules']:
+        sys.stdout.write(json.dumps(loaded_modules(sys.argv[2:])) + '\n')
+    else:
+        sys.stdout.write(json.dumps(profile_phases()) + '\n')
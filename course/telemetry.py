@@ -0,0 +1,280 @@
+"""
+Per-route request telemetry.
+
+``RequestTelemetryMiddleware`` measures, for every request, the total time,
+the time spent in database queries and their count, the time serializers
+spend turning objects into data (``serialize``, from the serializers using
+``SerializationTimingMixin``; it runs inside the view), the time spent
+rendering the response (``render``: templates, and DRF's JSON encoding of
+the serialized data) and the response size. Each response gets a
+``Server-Timing`` header with these.
+
+Latencies are aggregated per route (method and URL name) into fixed
+log-scale histograms, so memory doesn't grow with traffic. A background
+thread in each process adds its histograms to a shared SQLite file
+(``REQUEST_TELEMETRY_PATH``) every ``REQUEST_TELEMETRY_FLUSH_INTERVAL``
+seconds, and the process does on exit, so the file holds the totals of all
+workers; ``manage.py telemetry_report`` prints percentiles per route from it.
+"""
+import atexit
+import bisect
+import contextvars
+import sqlite3
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+# Upper bounds in ms of the latency buckets: 0.1 ms to about 1 min, +20% per
+# bucket, so a percentile read from the histogram is within 20%.
+BUCKETS = [round(0.1 * 1.2 ** i, 4) for i in range(74)]
+
+METRICS = ('requests', 'total_ms', 'db_ms', 'queries', 'serialize_ms', 'render_ms', 'bytes')
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS route_totals ('
+    ' route TEXT PRIMARY KEY, requests INTEGER, total_ms REAL, db_ms REAL,'
+    ' queries INTEGER, serialize_ms REAL, render_ms REAL, bytes INTEGER)',
+    'CREATE TABLE IF NOT EXISTS route_latency ('
+    ' route TEXT, bucket INTEGER, count INTEGER, PRIMARY KEY (route, bucket))',
+)
+
+_lock = threading.Lock()
+_routes = {}
+_flusher_started = False
+# Serialization time of the current request, while the middleware measures it.
+_serialize = contextvars.ContextVar('telemetry_serialize', default=None)
+
+
+class RouteStats:
+    __slots__ = ('totals', 'histogram')
+
+    def __init__(self):
+        self.totals = dict.fromkeys(METRICS, 0)
+        self.histogram = [0] * (len(BUCKETS) + 1)
+
+    def record(self, total_ms, db_ms, queries, serialize_ms, render_ms, size):
+        totals = self.totals
+        totals['requests'] += 1
+        totals['total_ms'] += total_ms
+        totals['db_ms'] += db_ms
+        totals['queries'] += queries
+        totals['serialize_ms'] += serialize_ms
+        totals['render_ms'] += render_ms
+        totals['bytes'] += size
+        self.histogram[bisect.bisect_left(BUCKETS, total_ms)] += 1
+
+
+def record(route, total_ms, db_ms, queries, serialize_ms, render_ms, size):
+    global _flusher_started
+    with _lock:
+        stats = _routes.get(route)
+        if stats is None:
+            stats = _routes[route] = RouteStats()
+        stats.record(total_ms, db_ms, queries, serialize_ms, render_ms, size)
+        start = not _flusher_started
+        _flusher_started = True
+    if start:
+        # Started by the first recorded request, so only serving processes run it.
+        threading.Thread(target=_flush_in_background, name='request-telemetry-flusher', daemon=True).start()
+        atexit.register(flush)
+
+
+def _flush_in_background():
+    while True:
+        time.sleep(settings.REQUEST_TELEMETRY_FLUSH_INTERVAL)
+        try:
+            flush()
+        except sqlite3.Error:
+            # The stats are lost rather than retried; the sink only holds aggregates.
+            pass
+
+
+def connect(path=None):
+    connection = sqlite3.connect(str(path or settings.REQUEST_TELEMETRY_PATH), timeout=5.0)
+    for statement in SCHEMA:
+        connection.execute(statement)
+    columns = {row[1] for row in connection.execute('PRAGMA table_info(route_totals)')}
+    for name in METRICS:
+        if name not in columns:
+            # A file written before this metric was collected.
+            connection.execute(f'ALTER TABLE route_totals ADD COLUMN {name} REAL DEFAULT 0')
+    return connection
+
+
+def flush(path=None):
+    """Add this process's stats to the shared sink and start over."""
+    global _routes
+    with _lock:
+        routes, _routes = _routes, {}
+    if not routes:
+        return
+    columns = ', '.join(METRICS)
+    updates = ', '.join(f'{name} = {name} + excluded.{name}' for name in METRICS)
+    connection = connect(path)
+    try:
+        with connection:
+            connection.executemany(
+                f'INSERT INTO route_totals (route, {columns}) VALUES (?, {", ".join("?" * len(METRICS))}) '
+                f'ON CONFLICT (route) DO UPDATE SET {updates}',
+                [(route, *(stats.totals[name] for name in METRICS)) for route, stats in routes.items()],
+            )
+            connection.executemany(
+                'INSERT INTO route_latency (route, bucket, count) VALUES (?, ?, ?) '
+                'ON CONFLICT (route, bucket) DO UPDATE SET count = count + excluded.count',
+                [
+                    (route, bucket, count)
+                    for route, stats in routes.items()
+                    for bucket, count in enumerate(stats.histogram)
+                    if count
+                ],
+            )
+    finally:
+        connection.close()
+
+
+def percentile(histogram, fraction):
+    """Upper bound in ms of the bucket holding the ``fraction`` quantile of ``{bucket: count}``."""
+    total = sum(histogram.values())
+    if not total:
+        return 0.0
+    rank = fraction * total
+    seen = 0
+    for bucket in sorted(histogram):
+        seen += histogram[bucket]
+        if seen >= rank:
+            return BUCKETS[bucket] if bucket < len(BUCKETS) else float('inf')
+    return float('inf')
+
+
+def report(path=None):
+    """Rows per route with totals, means and p50/p95/p99 from the shared sink."""
+    connection = connect(path)
+    try:
+        totals = connection.execute(f'SELECT route, {", ".join(METRICS)} FROM route_totals').fetchall()
+        histograms = {}
+        for route, bucket, count in connection.execute('SELECT route, bucket, count FROM route_latency'):
+            histograms.setdefault(route, {})[bucket] = count
+    finally:
+        connection.close()
+
+    rows = []
+    for route, *values in totals:
+        row = dict(zip(METRICS, values))
+        requests = row['requests'] or 1
+        histogram = histograms.get(route, {})
+        rows.append({
+            'route': route,
+            'requests': row['requests'],
+            'mean_ms': row['total_ms'] / requests,
+            'p50_ms': percentile(histogram, 0.50),
+            'p95_ms': percentile(histogram, 0.95),
+            'p99_ms': percentile(histogram, 0.99),
+            'db_ms': row['db_ms'] / requests,
+            'queries': row['queries'] / requests,
+            'serialize_ms': row['serialize_ms'] / requests,
+            'render_ms': row['render_ms'] / requests,
+            'bytes': row['bytes'] / requests,
+        })
+    return sorted(rows, key=lambda row: row['requests'] * row['mean_ms'], reverse=True)
+
+
+def reset(path=None):
+    global _routes
+    with _lock:
+        _routes = {}
+    connection = connect(path)
+    try:
+        with connection:
+            connection.execute('DELETE FROM route_totals')
+            connection.execute('DELETE FROM route_latency')
+    finally:
+        connection.close()
+
+
+class SerializationTimingMixin:
+    """
+    Serializer mixin adding the time spent in ``to_representation`` to the
+    current request's ``serialize`` timing. Only the outermost call is
+    timed, so nested serializers aren't counted twice; queries made while
+    serializing count towards both ``serialize`` and ``db``.
+    """
+
+    def to_representation(self, instance):
+        timing = _serialize.get()
+        if timing is None or timing['active']:
+            return super().to_representation(instance)
+        timing['active'] = True
+        start = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            timing['ms'] += (time.perf_counter() - start) * 1000
+            timing['active'] = False
+
+
+class RequestTelemetryMiddleware:
+    """Time each request, add a ``Server-Timing`` header and record it per route."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.REQUEST_TELEMETRY:
+            return self.get_response(request)
+
+        db = {'ms': 0.0, 'queries': 0}
+        serialize = {'ms': 0.0, 'active': False}
+        request._telemetry_render = [0.0]
+
+        def time_query(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                db['ms'] += (time.perf_counter() - start) * 1000
+                db['queries'] += 1
+
+        start = time.perf_counter()
+        token = _serialize.set(serialize)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(time_query))
+                response = self.get_response(request)
+        finally:
+            _serialize.reset(token)
+        total_ms = (time.perf_counter() - start) * 1000
+        render_ms = request._telemetry_render[0]
+
+        size = 0 if response.streaming else len(response.content)
+        response['Server-Timing'] = (
+            f'db;dur={db["ms"]:.2f};desc="{db["queries"]} queries", '
+            f'serialize;dur={serialize["ms"]:.2f}, render;dur={render_ms:.2f}, total;dur={total_ms:.2f}'
+        )
+        record(
+            self.route(request, response), total_ms, db['ms'], db['queries'], serialize['ms'], render_ms, size,
+        )
+        return response
+
+    def process_template_response(self, request, response):
+        # Called right before the response is rendered; DRF responses
+        # encode their already serialized data to JSON while rendering.
+        if hasattr(request, '_telemetry_render'):
+            start = time.perf_counter()
+
+            def rendered(response):
+                request._telemetry_render[0] += (time.perf_counter() - start) * 1000
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    @staticmethod
+    def route(request, response):
+        # Requests answered before URL resolution (404s, and 429/503 from
+        # admission control) are grouped by status.
+        match = getattr(request, 'resolver_match', None)
+        name = (match.view_name or match.route) if match else f'unresolved {response.status_code}'
+        return f'{request.method} {name}'
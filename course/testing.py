@@ -0,0 +1,73 @@
+"""
+Performance contracts for the test suite.
+
+``PerformanceContractMixin`` adds two assertions to a ``TestCase``:
+
+``assertConstantQueries(seed, run)``
+    Seeds the fixtures at ``SMALL`` and then ``LARGE`` rows with
+    ``seed(count)``, runs ``run()`` after each and fails if the number of
+    queries differs, which is how an N+1 shows up. On failure the message
+    lists the queries the large run added.
+``assertWithinBudget(run, budget_ms)``
+    Fails if the median of a few runs of ``run()`` takes longer than
+    ``budget_ms`` times ``PERF_BUDGET_SCALE`` (an environment variable,
+    default 1) so slow CI machines can loosen every budget at once.
+
+Rate limiting is off for these tests, since they make many requests.
+"""
+import os
+import statistics
+import time
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+SMALL = 5
+LARGE = 50
+
+BUDGET_RUNS = 5
+
+
+def budget_scale():
+    return float(os.environ.get('PERF_BUDGET_SCALE', 1))
+
+
+class PerformanceContractMixin:
+    def setUp(self):
+        super().setUp()
+        override = override_settings(RATE_LIMITING=False)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def capture(self, run):
+        with CaptureQueriesContext(connection) as queries:
+            run()
+        return [query['sql'] for query in queries]
+
+    def assertConstantQueries(self, seed, run, sizes=(SMALL, LARGE)):
+        seeded = 0
+        runs = []
+        for size in sizes:
+            seed(size - seeded)
+            seeded = size
+            runs.append(self.capture(run))
+        small, large = runs[0], runs[-1]
+        if len(small) != len(large):
+            extra = '\n'.join(f'  {sql}' for sql in large[len(small):][:10])
+            self.fail(
+                f'Query count grew with the data: {len(small)} queries at {sizes[0]} rows, '
+                f'{len(large)} at {sizes[-1]}. Queries past the first {len(small)}:\n{extra}'
+            )
+        return len(large)
+
+    def assertWithinBudget(self, run, budget_ms, runs=BUDGET_RUNS):
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - started) * 1000)
+        median = statistics.median(timings)
+        limit = budget_ms * budget_scale()
+        self.assertLessEqual(median, limit, f'Median {median:.1f} ms over the {limit:.0f} ms budget')
+        return median
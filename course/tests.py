@@ -0,0 +1,655 @@
+import io
+import json
+import contextvars
+import gzip
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError, call_command, get_commands, load_command_class
+from django.db import OperationalError, connections
+from django.db.utils import load_backend
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from course import datasets, db_routers, ratelimit, sqlite_snapshots, telemetry
+from course.db_profiles import pragma_statements, sqlite_database
+from course.management.base import JobCommand
+from course.startup import PHASES, import_time_by_package, parse_importtime, run_loaded_modules
+
+
+class DbProfileTests(SimpleTestCase):
+    def setUp(self):
+        scratch = tempfile.TemporaryDirectory()
+        self.addCleanup(scratch.cleanup)
+        self.path = os.path.join(scratch.name, 'profile.sqlite3')
+        sqlite3.connect(self.path).execute('CREATE TABLE item (id INTEGER PRIMARY KEY)').connection.close()
+
+    def connect(self, *args, **kwargs):
+        # Outside ``connections``, which test cases only let reach DATABASES.
+        config = connections.configure_settings({'default': sqlite_database(self.path, *args, **kwargs)})['default']
+        connection = load_backend(config['ENGINE']).DatabaseWrapper(config, 'profile_test')
+        self.addCleanup(connection.close)
+        return connection
+
+    def pragma(self, connection, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragma_statements(self):
+        self.assertEqual(pragma_statements('stock'), [])
+        statements = pragma_statements('production')
+        self.assertIn('PRAGMA journal_mode=WAL', statements)
+        self.assertIn('PRAGMA busy_timeout=5000', statements)
+        read_only = pragma_statements('production', read_only=True)
+        self.assertNotIn('PRAGMA journal_mode=WAL', read_only)
+        self.assertNotIn('PRAGMA synchronous=NORMAL', read_only)
+        self.assertIn('PRAGMA busy_timeout=5000', read_only)
+
+    def test_stock_profile_is_django_default(self):
+        config = sqlite_database(self.path)
+        self.assertEqual(config['NAME'], self.path)
+        self.assertEqual(config['OPTIONS'], {})
+        self.assertNotIn('CONN_MAX_AGE', config)
+
+    def test_production_profile(self):
+        config = sqlite_database(self.path, 'production')
+        self.assertEqual(config['CONN_MAX_AGE'], 600)
+        self.assertTrue(config['CONN_HEALTH_CHECKS'])
+        self.assertEqual(config['OPTIONS']['transaction_mode'], 'IMMEDIATE')
+        self.assertEqual(config['OPTIONS']['timeout'], 5)
+
+        connection = self.connect('production')
+        self.assertEqual(self.pragma(connection, 'journal_mode'), 'wal')
+        self.assertEqual(self.pragma(connection, 'synchronous'), 1)
+        self.assertEqual(self.pragma(connection, 'busy_timeout'), 5000)
+
+    def test_read_only_production_profile(self):
+        config = sqlite_database(self.path, 'production', read_only=True)
+        self.assertEqual(config['NAME'], f'file:{self.path}?mode=ro')
+        self.assertNotIn('transaction_mode', config['OPTIONS'])
+        connection = self.connect('production', read_only=True)
+        self.assertEqual(self.pragma(connection, 'busy_timeout'), 5000)
+        with self.assertRaises(OperationalError), connection.cursor() as cursor:
+            cursor.execute('INSERT INTO item DEFAULT VALUES')
+
+    def test_snapshot_replica_connections_are_not_kept(self):
+        # As settings configures the DJANGO_DB_REPLICA=snapshot alias.
+        config = sqlite_database(self.path, 'production', read_only=True, persistent=False)
+        self.assertIn('PRAGMA busy_timeout=5000', config['OPTIONS']['init_command'])
+        self.assertEqual(connections.configure_settings({'default': config})['default']['CONN_MAX_AGE'], 0)
+
+    def test_unknown_profile(self):
+        with self.assertRaises(ValueError):
+            sqlite_database(self.path, 'fast')
+
+    def test_db_stress(self):
+        # In a subprocess: the command registers its own aliases, which test
+        # cases refuse to connect to.
+        result = subprocess.run(
+            [sys.executable, 'manage.py', 'db_stress', '--duration=0.2', '--rows=50', '--readers=2', '--writers=1'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        )
+
+        lines = result.stdout.splitlines()
+        for profile in ('stock', 'production'):
+            with self.subTest(profile=profile):
+                row = next(line.split() for line in lines if line.startswith(profile))
+                self.assertGreater(float(row[1]), 0)
+                self.assertGreater(float(row[2]), 0)
+
+
+class StartupProfileTests(SimpleTestCase):
+    def test_parse_importtime(self):
+        modules = parse_importtime([
+            'import time: self [us] | cumulative | imported package',
+            'import time:       120 |        120 |     django.utils',
+            'import time:      2000 |       2120 | django',
+            'unrelated stderr line',
+        ])
+        self.assertEqual(modules, [('django.utils', 120, 120), ('django', 2000, 2120)])
+        self.assertEqual(import_time_by_package(modules), {'django': 2.12})
+
+    def test_cold_start_profile_within_budget(self):
+        out = io.StringIO()
+        call_command('startup_profile', '--check', '--json', stdout=out)
+        profile = json.loads(out.getvalue())
+
+        phases = profile['phases_ms']
+        self.assertTrue(set(PHASES) | {'total'} <= set(phases))
+        for phase, budget in settings.STARTUP_BUDGET_MS.items():
+            self.assertLessEqual(phases[phase], budget, phase)
+        self.assertEqual(profile['over_budget'], {})
+
+    def test_check_fails_over_budget(self):
+        phases = {phase: 1.0 for phase in (*PHASES, 'total')}
+        phases['urlconf'] = settings.STARTUP_BUDGET_MS['urlconf'] + 1
+        with mock.patch('course.management.commands.startup_profile.run_profile', return_value=(phases, [])):
+            call_command('startup_profile', stdout=io.StringIO())
+            with self.assertRaisesMessage(CommandError, 'urlconf took'):
+                call_command('startup_profile', '--check', stdout=io.StringIO())
+
+    def test_api_apps_are_imported_on_first_request(self):
+        stages = run_loaded_modules(settings.BASE_DIR, ['/api/articles/', '/api/tags/', '/api/'])
+
+        for module in ('pagination.views', 'notifications.views', 'rest_framework.viewsets'):
+            self.assertNotIn(module, stages['urlconf'])
+        self.assertIn('pagination.views', stages['/api/articles/'])
+        self.assertNotIn('notifications.views', stages['/api/articles/'])
+        self.assertIn('notifications.views', stages['/api/tags/'])
+        self.assertIn('course.api_urls', stages['/api/'])
+
+    def test_job_commands_skip_system_checks(self):
+        commands = {name: load_command_class(app, name) for name, app in get_commands().items()}
+        jobs = {name for name, command in commands.items() if isinstance(command, JobCommand)}
+        self.assertTrue({'outbox_worker', 'prune_deleted_posts', 'rebuild_page_index', 'db_backup'} <= jobs)
+
+        for name in [*sorted(jobs), 'showmigrations']:
+            command = commands[name]
+            with self.subTest(command=name), \
+                    mock.patch.object(BaseCommand, 'check') as check, \
+                    mock.patch.object(type(command), 'handle', return_value=None):
+                command.execute(skip_checks=False, force_color=False, no_color=False)
+                self.assertEqual(check.called, name not in jobs)
+
+
+class RequestTelemetryTests(TestCase):
+    def setUp(self):
+        scratch = tempfile.TemporaryDirectory()
+        self.addCleanup(scratch.cleanup)
+        self.path = os.path.join(scratch.name, 'telemetry.sqlite3')
+        override = override_settings(
+            REQUEST_TELEMETRY=True, REQUEST_TELEMETRY_PATH=self.path, REQUEST_TELEMETRY_FLUSH_INTERVAL=3600,
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        # The tests flush explicitly.
+        patcher = mock.patch.object(telemetry, '_flusher_started', True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        telemetry.reset()
+        # Nothing left for the exit flush to write to the real file.
+        self.addCleanup(telemetry.reset)
+
+    def test_server_timing_and_route_report(self):
+        from pagination.models import Article
+
+        Article.objects.create(title='Hello', content='Body', is_published=True)
+        for _ in range(3):
+            response = self.client.get('/api/articles/')
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(
+            response['Server-Timing'],
+            r'db;dur=[\d.]+;desc="\d+ queries", serialize;dur=[\d.]+, render;dur=[\d.]+, total;dur=',
+        )
+
+        telemetry.flush()
+        self.client.get('/api/articles/')
+        telemetry.flush()
+        [row] = [row for row in telemetry.report() if row['route'] == 'GET article-list']
+        self.assertEqual(row['requests'], 4)
+        self.assertGreaterEqual(row['queries'], 2)
+        self.assertGreater(row['bytes'], 0)
+        self.assertGreater(row['serialize_ms'], 0)
+        self.assertGreater(row['render_ms'], 0)
+        self.assertLessEqual(row['p50_ms'], row['p99_ms'])
+
+    def test_serializers_are_timed_once_per_object(self):
+        from notifications.models import Post, Tag
+        from notifications.serializers import PostSerializer
+
+        post = Post.objects.create(title='Hello')
+        post.tags.add(Tag.objects.create(name='django'))
+        timing = {'ms': 0.0, 'active': False}
+        token = telemetry._serialize.set(timing)
+        try:
+            with mock.patch.object(telemetry.time, 'perf_counter', side_effect=[1.0, 1.5]):
+                PostSerializer([post], many=True).data
+        finally:
+            telemetry._serialize.reset(token)
+        self.assertEqual(timing, {'ms': 500.0, 'active': False})
+
+    def test_flush_runs_off_the_request_path(self):
+        with override_settings(REQUEST_TELEMETRY_FLUSH_INTERVAL=0), \
+                mock.patch.object(telemetry, '_flusher_started', False), \
+                mock.patch.object(telemetry.threading, 'Thread') as thread, \
+                mock.patch.object(telemetry.atexit, 'register') as register, \
+                mock.patch.object(telemetry, 'flush') as flush:
+            self.client.get('/api/tags/')
+            self.client.get('/api/tags/')
+
+        flush.assert_not_called()
+        thread.assert_called_once()
+        self.assertIs(thread.call_args.kwargs['target'], telemetry._flush_in_background)
+        thread.return_value.start.assert_called_once()
+        register.assert_called_once_with(flush)
+
+    def test_sink_written_before_serialize_ms_is_upgraded(self):
+        connection = sqlite3.connect(self.path)
+        with connection:
+            connection.execute('DROP TABLE route_totals')
+            connection.execute(
+                'CREATE TABLE route_totals (route TEXT PRIMARY KEY, requests INTEGER, total_ms REAL,'
+                ' db_ms REAL, queries INTEGER, render_ms REAL, bytes INTEGER)'
+            )
+            connection.execute("INSERT INTO route_totals VALUES ('GET old', 1, 2.0, 1.0, 1, 0.5, 10)")
+        connection.close()
+
+        [row] = telemetry.report()
+        self.assertEqual((row['route'], row['serialize_ms'], row['render_ms']), ('GET old', 0, 0.5))
+
+    def test_admission_control_responses_are_recorded(self):
+        with override_settings(
+            RATE_LIMITING=True,
+            RATE_LIMIT_PATH=os.path.join(os.path.dirname(self.path), 'ratelimit.sqlite3'),
+            RATE_LIMITS=[{'prefix': '/api/tags/', 'rate': 0.01, 'burst': 1}],
+        ):
+            self.assertEqual(self.client.get('/api/tags/').status_code, 200)
+            response = self.client.get('/api/tags/')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Server-Timing', response)
+
+        telemetry.flush()
+        requests = {row['route']: row['requests'] for row in telemetry.report()}
+        self.assertEqual(requests['GET tag-list'], 1)
+        self.assertEqual(requests['GET unresolved 429'], 1)
+
+    def test_off_under_tests(self):
+        from course import settings as project_settings
+
+        self.assertFalse(project_settings.REQUEST_TELEMETRY)
+
+    def test_percentile_reads_bucket_upper_bound(self):
+        histogram = {0: 50, 10: 45, 40: 5}
+        self.assertEqual(telemetry.percentile(histogram, 0.5), telemetry.BUCKETS[0])
+        self.assertEqual(telemetry.percentile(histogram, 0.95), telemetry.BUCKETS[10])
+        self.assertEqual(telemetry.percentile(histogram, 0.99), telemetry.BUCKETS[40])
+        self.assertEqual(telemetry.percentile({}, 0.99), 0.0)
+
+
+class AdmissionControlTests(TestCase):
+    def setUp(self):
+        scratch = tempfile.TemporaryDirectory()
+        self.addCleanup(scratch.cleanup)
+        override = override_settings(
+            RATE_LIMITING=True,
+            RATE_LIMIT_PATH=os.path.join(scratch.name, 'ratelimit.sqlite3'),
+            RATE_LIMITS=[{'prefix': '/api/tags/', 'rate': 0.01, 'burst': 2}],
+            RATE_LIMIT_CLIENTS={},
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_token_bucket_refills_at_rate(self):
+        self.assertEqual(ratelimit.take_token('k', rate=2, burst=2, now=100.0), 0)
+        self.assertEqual(ratelimit.take_token('k', rate=2, burst=2, now=100.0), 0)
+        self.assertAlmostEqual(ratelimit.take_token('k', rate=2, burst=2, now=100.0), 0.5)
+        self.assertEqual(ratelimit.take_token('k', rate=2, burst=2, now=100.5), 0)
+        # Buckets never hold more than the burst.
+        for _ in range(2):
+            self.assertEqual(ratelimit.take_token('k', rate=2, burst=2, now=1000.0), 0)
+        self.assertGreater(ratelimit.take_token('k', rate=2, burst=2, now=1000.0), 0)
+
+    def test_client_over_limit_gets_429_without_queries(self):
+        for _ in range(2):
+            self.assertEqual(self.client.get('/api/tags/').status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/tags/')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(int(response['Retry-After']), 100)
+        # Other routes and other clients have their own buckets.
+        self.assertEqual(self.client.get('/api/posts/').status_code, 200)
+        self.assertEqual(self.client.get('/api/tags/', REMOTE_ADDR='10.0.0.2').status_code, 200)
+
+    def test_idle_buckets_expire(self):
+        with override_settings(RATE_LIMIT_CLIENTS={'10.0.0.9': {'burst': 5}}):
+            # 500 s for the slowest bucket (10.0.0.9's) to refill.
+            self.assertEqual(ratelimit.refill_time(), 500)
+            ratelimit.take_token('old', rate=0.01, burst=2, now=1000.0)
+            ratelimit.take_token('recent', rate=0.01, burst=2, now=1400.0)
+
+            self.assertEqual(ratelimit.expire_idle(now=1600.0), 1)
+            self.assertEqual(ratelimit.expire_idle(now=1600.0), 0)
+            self.assertEqual(ratelimit.expire_idle(now=1901.0), 1)
+
+    def test_expiry_runs_every_sweep_interval(self):
+        with override_settings(RATE_LIMIT_SWEEP_INTERVAL=60), \
+                mock.patch.object(ratelimit, '_last_sweep', 0.0), \
+                mock.patch.object(ratelimit, 'expire_idle', wraps=ratelimit.expire_idle) as expire_idle:
+            for now in (1000.0, 1030.0, 1059.0, 1060.0):
+                ratelimit.take_token('k', rate=1, burst=100, now=now)
+        self.assertEqual([call.args for call in expire_idle.call_args_list], [(1000.0,), (1060.0,)])
+
+    def test_forwarded_clients_get_their_own_buckets(self):
+        proxied = {'REMOTE_ADDR': '10.0.0.1'}
+        for _ in range(2):
+            self.client.get('/api/tags/', HTTP_X_FORWARDED_FOR='203.0.113.7', **proxied)
+        # Everyone behind the proxy shares REMOTE_ADDR, and its bucket.
+        self.assertEqual(self.client.get('/api/tags/', HTTP_X_FORWARDED_FOR='198.51.100.2', **proxied).status_code, 429)
+
+        with override_settings(RATE_LIMIT_CLIENT_KEY='course.ratelimit.forwarded_address'):
+            ratelimit.reset()
+            for _ in range(2):
+                self.client.get('/api/tags/', HTTP_X_FORWARDED_FOR='203.0.113.7', **proxied)
+            self.assertEqual(
+                self.client.get('/api/tags/', HTTP_X_FORWARDED_FOR='203.0.113.7', **proxied).status_code, 429
+            )
+            # A forged first entry doesn't change the key; the proxy's last entry does.
+            response = self.client.get('/api/tags/', HTTP_X_FORWARDED_FOR='198.51.100.2, 203.0.113.7', **proxied)
+            self.assertEqual(response.status_code, 429)
+            response = self.client.get('/api/tags/', HTTP_X_FORWARDED_FOR='203.0.113.7, 198.51.100.2', **proxied)
+            self.assertEqual(response.status_code, 200)
+
+    def test_off_under_tests_with_a_private_store(self):
+        from course import settings as project_settings
+
+        self.assertFalse(project_settings.RATE_LIMITING)
+        self.assertEqual(project_settings.RATE_LIMIT_PATH, ':memory:')
+
+    def test_exempt_client(self):
+        with override_settings(RATE_LIMIT_CLIENTS={'127.0.0.1': None}):
+            for _ in range(4):
+                self.assertEqual(self.client.get('/api/tags/').status_code, 200)
+
+    def test_sheds_load_over_concurrency_limit(self):
+        with override_settings(MAX_CONCURRENT_REQUESTS=4), mock.patch.object(ratelimit, '_in_flight', 4):
+            response = self.client.get('/api/posts/')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(self.client.get('/api/posts/').status_code, 200)
+
+
+TINY = {'articles': 30, 'restaurants': 5, 'sales': 40, 'tags': 12, 'posts': 25}
+
+
+@mock.patch.dict(datasets.PROFILES, {'tiny': TINY})
+@mock.patch.object(datasets, 'CHUNK_SIZE', 10)
+class GenerateDatasetTests(TestCase):
+    def generate(self, *args, workers=1):
+        out = io.StringIO()
+        call_command('generate_dataset', '--profile', 'tiny', '--workers', str(workers), *args, stdout=out)
+        return json.loads(out.getvalue()[out.getvalue().index('{'):])
+
+    def test_loads_every_table_with_consistent_counts(self):
+        from notifications.models import Post, Tag
+        from pagination.models import Article
+        from restaurant.models import Sale
+
+        manifest = self.generate()
+
+        self.assertEqual(manifest['counts']['articles'], Article.objects.count())
+        self.assertEqual(manifest['counts']['sales'], Sale.objects.count())
+        self.assertEqual(manifest['counts']['post_tags'], Post.tags.through.objects.count())
+        self.assertEqual(Tag.objects.reconcile_post_counts(), 0)
+        self.assertEqual(Post.objects.exclude(slug='').count(), TINY['posts'])
+
+    def test_same_seed_gives_same_checksums(self):
+        first = self.generate()
+        second = self.generate('--clear')
+        other_seed = self.generate('--clear', '--seed', '7')
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first['checksums'], other_seed['checksums'])
+
+    def test_worker_pool_matches_serial_run(self):
+        serial = self.generate()
+        parallel = self.generate('--clear', workers=2)
+
+        self.assertEqual(parallel, serial)
+
+    def test_chunks_are_generated_independently(self):
+        serial = list(datasets.chunks('post_tags', 42, TINY))
+        self.assertEqual(serial, [datasets.generate_chunk('post_tags', 42, chunk, TINY, 10) for chunk in range(3)])
+        with datasets.make_executor(2) as executor:
+            self.assertEqual(list(datasets.chunks('post_tags', 42, TINY, executor, window=2)), serial)
+
+
+class DbBackupTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.dir = directory.name
+        self.source = os.path.join(self.dir, 'source.sqlite3')
+        with sqlite3.connect(self.source) as db:
+            db.execute('CREATE TABLE item (id INTEGER PRIMARY KEY, body TEXT)')
+            db.executemany('INSERT INTO item (body) VALUES (?)', [('x' * 1000,)] * 3000)
+        patcher = mock.patch('course.management.commands.db_backup.database_path', return_value=self.source)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def rows(self, path):
+        with sqlite3.connect(path) as db:
+            return db.execute('SELECT count(*), sum(length(body)) FROM item').fetchone()
+
+    def backup(self, *args):
+        out = io.StringIO()
+        call_command('db_backup', *args, '--json', stdout=out)
+        return json.loads(out.getvalue())
+
+    def test_copies_in_steps(self):
+        target = os.path.join(self.dir, 'copy.sqlite3')
+        stats = sqlite_snapshots.backup(self.source, target, pages=64, sleep=0)
+
+        self.assertEqual(self.rows(target), self.rows(self.source))
+        self.assertGreater(stats.steps, stats.pages // 64)
+        self.assertEqual(stats.bytes, os.path.getsize(target))
+        self.assertEqual((stats.busy_steps, stats.restarts), (0, 0))
+
+    def test_gzip_backup(self):
+        target = os.path.join(self.dir, 'backup.sqlite3.gz')
+        result = self.backup(target, '--gzip')
+
+        restored = os.path.join(self.dir, 'restored.sqlite3')
+        with gzip.open(target) as src, open(restored, 'wb') as dst:
+            dst.write(src.read())
+        self.assertEqual(self.rows(restored), self.rows(self.source))
+        self.assertEqual(sorted(os.listdir(self.dir)), ['backup.sqlite3.gz', 'restored.sqlite3', 'source.sqlite3'])
+        self.assertEqual(result['file'], target)
+
+    def test_incremental_backups_store_only_changed_blocks(self):
+        target = os.path.join(self.dir, 'backups')
+        first = self.backup(target, '--incremental', '--gzip')
+        with sqlite3.connect(self.source) as db:
+            db.execute("UPDATE item SET body = 'changed' WHERE id = 3000")
+        second = self.backup(target, '--incremental', '--gzip')
+
+        self.assertEqual(first['new_blocks'], first['blocks'])
+        self.assertGreater(second['blocks'], 1)
+        self.assertLess(second['new_blocks'], second['blocks'])
+        restored = os.path.join(self.dir, 'restored.sqlite3')
+        call_command('db_backup', restored, '--restore', second['manifest'], stdout=io.StringIO())
+        self.assertEqual(self.rows(restored), self.rows(self.source))
+
+    def test_writes_during_the_backup_restart_it(self):
+        with sqlite3.connect(self.source) as db:
+            db.execute('CREATE TABLE counter (n INTEGER)')
+            db.execute('INSERT INTO counter (n) VALUES (0)')
+        stop = threading.Event()
+
+        def write():
+            # Each transaction adds a row and counts it, so a consistent copy
+            # has as many extra rows as the counter says.
+            db = sqlite3.connect(self.source, timeout=5)
+            try:
+                for _ in range(20):
+                    if stop.wait(0.01):
+                        break
+                    with db:
+                        db.execute("INSERT INTO item (body) VALUES ('new')")
+                        db.execute('UPDATE counter SET n = n + 1')
+            finally:
+                db.close()
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        target = os.path.join(self.dir, 'backup.sqlite3')
+        try:
+            result = self.backup(target, '--pages', '1', '--sleep', '0.001')
+        finally:
+            stop.set()
+            writer.join()
+
+        self.assertGreater(result['restarts'], 0)
+        with sqlite3.connect(target) as db:
+            self.assertEqual(db.execute('PRAGMA integrity_check').fetchone()[0], 'ok')
+            [(count,)] = db.execute('SELECT count(*) - 3000 FROM item')
+            self.assertEqual(db.execute('SELECT n FROM counter').fetchone()[0], count)
+
+    def test_backs_up_a_read_only_alias(self):
+        replica = sqlite_database(self.source, 'production', read_only=True)
+        target = os.path.join(self.dir, 'backup.sqlite3')
+        with mock.patch.dict(settings.DATABASES, {'read_only': replica}), \
+                mock.patch('course.management.commands.db_backup.database_path', sqlite_snapshots.database_path):
+            self.assertEqual(sqlite_snapshots.database_path('read_only'), self.source)
+            result = self.backup(target, '--database', 'read_only')
+
+        self.assertEqual(result['file'], target)
+        self.assertEqual(self.rows(target), self.rows(self.source))
+
+    @override_settings(DB_REPLICA_MODE='')
+    def test_snapshot_requires_snapshot_replica(self):
+        with self.assertRaises(CommandError):
+            call_command('db_backup', os.path.join(self.dir, 'backup.sqlite3'), '--snapshot')
+
+    def test_snapshot_installs_the_same_copy(self):
+        replica = os.path.join(self.dir, 'replica.sqlite3')
+        target = os.path.join(self.dir, 'backup.sqlite3')
+        with override_settings(DB_REPLICA_MODE='snapshot', DB_REPLICA_PATH=replica):
+            result = self.backup(target, '--snapshot')
+
+        self.assertEqual(result['snapshot'], replica)
+        self.assertEqual(self.rows(replica), self.rows(target))
+        with sqlite3.connect(replica) as db:
+            self.assertAlmostEqual(sqlite_snapshots.snapshot_taken_at(db), time.time(), delta=60)
+
+
+class ReadReplicaRouterTests(TransactionTestCase):
+    # The replica mirrors the test database; TransactionTestCase commits, so
+    # it sees the rows the tests write through the primary.
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        from notifications.models import Tag
+
+        self.Tag = Tag
+        Tag.objects.create(name='django')
+        self.reset_lag_cache()
+        self.addCleanup(self.reset_lag_cache)
+
+    def reset_lag_cache(self):
+        db_routers._lag_cache.update(checked_at=0.0, lag=None)
+
+    def queries(self, path, **extra):
+        """``(primary, replica)`` query counts of a GET of ``path``."""
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            response = self.client.get(path, **extra)
+        self.assertEqual(response.status_code, 200)
+        return len(primary), len(replica)
+
+    @override_settings(DB_REPLICA_MODE='wal')
+    def test_read_only_viewsets_read_from_the_replica(self):
+        primary, replica = self.queries('/api/tags/')
+
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+        self.assertIsNone(db_routers.ReadReplicaRouter().db_for_read(self.Tag))
+
+    def test_no_replica_reads_without_a_mode(self):
+        with db_routers.replica_reads():
+            self.assertIsNone(db_routers.ReadReplicaRouter().db_for_read(self.Tag))
+
+    @override_settings(DB_REPLICA_MODE='wal')
+    def test_write_pins_the_rest_of_the_request_to_the_primary(self):
+        router = db_routers.ReadReplicaRouter()
+
+        def request():
+            # What ReplicaPinningMiddleware does for a safe request.
+            db_routers._pinned.set(False)
+            with db_routers.replica_reads():
+                before = router.db_for_read(self.Tag)
+                self.Tag.objects.create(name='python')
+                return before, router.db_for_read(self.Tag)
+
+        self.assertEqual(contextvars.copy_context().run(request), ('replica', None))
+
+    @override_settings(DB_REPLICA_MODE='snapshot')
+    def test_pin_cookie_sends_the_next_reads_to_the_primary(self):
+        with mock.patch.object(db_routers, 'replica_lag', return_value=0.0):
+            self.assertEqual(self.queries('/api/tags/')[0], 0)
+            response = self.client.post('/api/tags/')
+            self.assertEqual(response.cookies[db_routers.PIN_COOKIE]['max-age'], settings.REPLICA_MAX_LAG)
+            primary, replica = self.queries('/api/tags/')
+
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+    @override_settings(DB_REPLICA_MODE='snapshot')
+    def test_reads_with_the_pin_cookie_do_not_renew_it(self):
+        self.client.cookies[db_routers.PIN_COOKIE] = '1'
+        with mock.patch.object(db_routers, 'replica_lag', return_value=0.0):
+            response = self.client.get('/api/tags/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(db_routers.PIN_COOKIE, response.cookies)
+
+    @override_settings(DB_REPLICA_MODE='snapshot')
+    def test_safe_request_that_writes_sets_the_pin_cookie(self):
+        def create_tag(request):
+            self.Tag.objects.create(name='python')
+            return HttpResponse()
+
+        middleware = db_routers.ReplicaPinningMiddleware(create_tag)
+        response = middleware(RequestFactory().get('/'))
+        self.assertIn(db_routers.PIN_COOKIE, response.cookies)
+
+    @override_settings(DB_REPLICA_MODE='wal')
+    def test_no_pin_cookie_in_wal_mode(self):
+        response = self.client.post('/api/tags/')
+
+        self.assertNotIn(db_routers.PIN_COOKIE, response.cookies)
+
+    @override_settings(DB_REPLICA_MODE='snapshot')
+    def test_stale_or_unknown_snapshot_falls_back_to_the_primary(self):
+        for lag in (settings.REPLICA_MAX_LAG + 1, None):
+            self.reset_lag_cache()
+            with self.subTest(lag=lag), mock.patch.object(db_routers, 'replica_lag', return_value=lag):
+                primary, replica = self.queries('/api/tags/')
+                self.assertGreater(primary, 0)
+                self.assertEqual(replica, 0)
+
+    @override_settings(DB_REPLICA_MODE='snapshot')
+    def test_snapshot_without_marker_has_unknown_lag(self):
+        self.assertIsNone(db_routers.replica_lag())
+
+    def test_snapshot_lag_is_what_the_connection_reads(self):
+        scratch = tempfile.TemporaryDirectory()
+        self.addCleanup(scratch.cleanup)
+        source = os.path.join(scratch.name, 'primary.sqlite3')
+        replica = os.path.join(scratch.name, 'replica.sqlite3')
+        sqlite3.connect(source).close()
+
+        with mock.patch('time.time', return_value=1000.0):
+            sqlite_snapshots.snapshot(source, replica)
+        old = sqlite3.connect(f'file:{replica}?mode=ro', uri=True)
+        self.addCleanup(old.close)
+        with mock.patch('time.time', return_value=2000.0):
+            sqlite_snapshots.snapshot(source, replica)
+        new = sqlite3.connect(f'file:{replica}?mode=ro', uri=True)
+        self.addCleanup(new.close)
+
+        # A connection opened before the refresh still reads the replaced file.
+        self.assertEqual(sqlite_snapshots.snapshot_taken_at(old), 1000.0)
+        self.assertEqual(sqlite_snapshots.snapshot_taken_at(new), 2000.0)
+
+    def test_database_path_of_a_read_only_alias(self):
+        with mock.patch.dict(settings.DATABASES, {'replica': {'NAME': 'file:/srv/db.replica.sqlite3?mode=ro'}}):
+            self.assertEqual(sqlite_snapshots.database_path('replica'), '/srv/db.replica.sqlite3')
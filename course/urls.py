@@ -15,14 +15,24 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path,include
-from rest_framework.routers import DefaultRouter
-from pagination.views import ArticleViewSet
+from django.urls import URLResolver, path
+from django.urls.resolvers import RegexPattern
 
-router = DefaultRouter()
-router.register(r'articles', ArticleViewSet, basename='article')
 
+def lazy_include(regex, urlconf_name):
+    """
+    Like ``re_path(regex, include(urlconf_name))``, except that
+    ``urlconf_name``, and the viewsets and serializers it imports, are only
+    imported when a request first reaches it or a URL is reversed.
+    """
+    return URLResolver(RegexPattern(regex), urlconf_name)
+
+
+# The lookaheads leave each prefix to the app's router, which also serves
+# the format suffixes (/api/articles.json).
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('api/', include(router.urls)),
-]
\ No newline at end of file
+    lazy_include(r'^api/(?=articles[/.])', 'pagination.urls'),
+    lazy_include(r'^api/(?=(?:posts|tags)[/.])', 'notifications.urls'),
+    lazy_include(r'^api/', 'course.api_urls'),
+]
@@ -1,7 +1,43 @@
+from course.admin_utils import LargeTableAdmin
 from django.contrib import admin
-from .models import Post,Tag,DeletedPost
+from django.contrib.admin.widgets import AutocompleteSelectMultiple
+from .models import Post,Tag,DeletedPost,OutboxJob
 # Register your models here.
 
-admin.site.register(Post)
-admin.site.register(Tag)
-admin.site.register(DeletedPost)
\ No newline at end of file
+
+@admin.register(Post)
+class PostAdmin(LargeTableAdmin):
+    list_display = ('id', 'title', 'slug', 'updated_at')
+    search_fields = ('=slug',)
+    autocomplete_fields = ('tags',)
+
+    def formfield_for_manytomany(self, db_field, request, **kwargs):
+        if db_field.name != 'tags':
+            return super().formfield_for_manytomany(db_field, request, **kwargs)
+        # The admin hides m2m fields with an explicit through model. PostTag
+        # has no extra columns, and the form saves with post.tags.set(), so
+        # the m2m_changed receivers still see every change.
+        kwargs.setdefault('widget', AutocompleteSelectMultiple(db_field, self.admin_site, using=kwargs.get('using')))
+        return db_field.formfield(**kwargs)
+
+
+@admin.register(Tag)
+class TagAdmin(LargeTableAdmin):
+    list_display = ('name', 'post_count')
+    readonly_fields = ('post_count',)
+    # Served by tag_popularity_idx.
+    ordering = ('-post_count', 'name')
+    search_fields = ('name',)
+
+
+@admin.register(DeletedPost)
+class DeletedPostAdmin(LargeTableAdmin):
+    list_display = ('id', 'original_id', 'title', 'deleted_at', 'compacted_at')
+    search_fields = ('=original_id',)
+
+
+@admin.register(OutboxJob)
+class OutboxJobAdmin(LargeTableAdmin):
+    list_display = ('id', 'kind', 'status', 'attempts', 'available_at')
+    # Filtered counts stop at COUNT_LIMIT rows.
+    list_filter = ('status',)
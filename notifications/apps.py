@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class NotificationsConfig(AppConfig):
@@ -6,4 +7,9 @@ class NotificationsConfig(AppConfig):
     name = 'notifications'
     
     def ready(self):
-        import notifications.signals  
\ No newline at end of file
+        import notifications.signals  
+        if getattr(settings, 'SIGNAL_PROFILING', False):
+            from notifications import instrumentation
+            instrumentation.install()
+            if getattr(settings, 'SIGNAL_PROFILING_DUMP', None):
+                instrumentation.dump_at_exit(settings.SIGNAL_PROFILING_DUMP)
@@ -0,0 +1,83 @@
+"""
+Incremental change feed over Post.
+
+Changes are read in ``(timestamp, id)`` order from two indexed streams and
+merged: upserts from ``Post.updated_at`` and deletion tombstones from
+``DeletedPost.deleted_at``. The cursor returned with each page is the key of
+its last change, so a sync only reads rows changed after it. Tombstones
+purged by the retention policy (``prune_deleted_posts``) are gone from the
+feed, so mirrors must sync more often than the purge window.
+"""
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+from .models import DeletedPost, Post
+from .serializers import PostSerializer
+
+UPSERT, DELETE = 0, 1
+
+
+def encode_cursor(key):
+    timestamp, kind, pk = key
+    raw = f'{timestamp.isoformat()}|{kind}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Return the ``(timestamp, kind, id)`` key in ``cursor``; ValueError if malformed."""
+    try:
+        timestamp, kind, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(timestamp), int(kind), int(pk)
+    except (TypeError, UnicodeDecodeError, base64.binascii.Error) as exc:
+        raise ValueError('Invalid cursor') from exc
+
+
+def _after(field, kind, cursor):
+    """Rows of stream ``kind`` whose (field, kind, id) key sorts after ``cursor``."""
+    if cursor is None:
+        return Q()
+    timestamp, cursor_kind, pk = cursor
+    later = Q(**{f'{field}__gt': timestamp})
+    if kind > cursor_kind:
+        return later | Q(**{field: timestamp})
+    if kind == cursor_kind:
+        return later | Q(**{field: timestamp, 'pk__gt': pk})
+    return later
+
+
+def changes_since(cursor=None, limit=500):
+    """
+    Return ``(changes, next_cursor, has_more)`` for up to ``limit`` changes after ``cursor``.
+
+    ``cursor`` is a string from a previous call, or ``None`` to start from
+    the beginning. Each change is a dict with ``op`` set to ``upsert`` (with
+    the serialized ``post``) or ``delete``.
+    """
+    key = decode_cursor(cursor) if cursor else None
+    upserts = list(
+        Post.objects.filter(_after('updated_at', UPSERT, key))
+        .prefetch_related('tags')
+        .order_by('updated_at', 'id')[:limit + 1]
+    )
+    tombstones = list(
+        DeletedPost.objects.filter(_after('deleted_at', DELETE, key))
+        .only('id', 'original_id', 'deleted_at')
+        .order_by('deleted_at', 'id')[:limit + 1]
+    )
+
+    merged = [((post.updated_at, UPSERT, post.pk), post) for post in upserts]
+    merged += [((row.deleted_at, DELETE, row.pk), row) for row in tombstones]
+    merged.sort(key=lambda item: item[0])
+    has_more = len(merged) > limit
+    page = merged[:limit]
+
+    changes = []
+    for (timestamp, kind, _pk), obj in page:
+        if kind == UPSERT:
+            changes.append({'op': 'upsert', 'id': obj.pk, 'at': timestamp, 'post': PostSerializer(obj).data})
+        else:
+            changes.append({'op': 'delete', 'id': obj.original_id, 'at': timestamp})
+    next_cursor = encode_cursor(page[-1][0]) if page else cursor
+    return changes, next_cursor, has_more
@@ -0,0 +1,66 @@
+import zlib
+
+from django import forms
+from django.db import models
+
+COMPRESSION_LEVEL = 6
+
+
+def compress_text(value):
+    return zlib.compress(value.encode('utf-8'), COMPRESSION_LEVEL)
+
+
+def decompress_text(value):
+    return zlib.decompress(bytes(value)).decode('utf-8')
+
+
+class CompressedTextField(models.BinaryField):
+    """
+    Text stored as a zlib-compressed BLOB and decompressed on access.
+
+    Plain text values read from the column (rows written before the column was
+    compressed) are returned unchanged. Unlike ``BinaryField`` it is editable
+    by default, as a textarea, since forms only ever see the text.
+    """
+    description = "Compressed text"
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('editable', True)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        # BinaryField records editable=True; it is this field's default.
+        if kwargs.get('editable') is True:
+            del kwargs['editable']
+        else:
+            kwargs['editable'] = False
+        return name, path, args, kwargs
+
+    def formfield(self, **kwargs):
+        return super().formfield(**{'form_class': forms.CharField, 'widget': forms.Textarea, **kwargs})
+
+    def from_db_value(self, value, expression, connection):
+        return self.to_python(value)
+
+    def to_python(self, value):
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return decompress_text(value) if value else ''
+        return value
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if isinstance(value, str):
+            value = compress_text(value)
+        return super().get_db_prep_value(value, connection, prepared)
+
+    def value_to_string(self, obj):
+        return self.value_from_object(obj)
+
+
+def register_sqlite_functions(sender, connection, **kwargs):
+    """``connection_created`` receiver adding ``zlib_compress()`` to SQLite, for INSERT ... SELECT."""
+    if connection.vendor == 'sqlite':
+        connection.connection.create_function(
+            'zlib_compress', 1, lambda value: None if value is None else compress_text(value),
+            deterministic=True,
+        )
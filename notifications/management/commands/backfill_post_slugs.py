@@ -0,0 +1,29 @@
+from course.management.base import JobCommand
+from notifications.models import Post
+from notifications.slugs import backfill_slugs, slugs_to_backfill
+
+
+class Command(JobCommand):
+    help = 'Regenerate empty or duplicate Post slugs so every slug is unique'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Posts updated per bulk_update (default: 500)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many posts need a new slug',
+        )
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            count = len(slugs_to_backfill(Post))
+            self.stdout.write(f'{count} posts have an empty or duplicate slug')
+            return
+
+        fixed = backfill_slugs(Post, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Regenerated slugs for {fixed} posts'))
@@ -0,0 +1,95 @@
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.db import connections
+
+from course.management.base import JobCommand
+from notifications import outbox
+
+
+class Command(JobCommand):
+    help = 'Run queued outbox jobs (welcome emails, notifications) on a worker pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Number of pool workers (default: 4)',
+        )
+        parser.add_argument(
+            '--mode',
+            choices=['thread', 'process'],
+            default='thread',
+            help='Run jobs on a thread pool or a process pool (default: thread)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=outbox.get_setting('BATCH_SIZE', 50),
+            help='Jobs claimed per batch',
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=outbox.get_setting('MAX_ATTEMPTS', 5),
+            help='Attempts before a job is moved to the dead letters',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Seconds to sleep when the outbox is empty (default: 1.0)',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Drain the runnable jobs and exit instead of polling forever',
+        )
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.request_stop)
+
+        if options['mode'] == 'process':
+            # Forked children must not share the parent's sqlite connection.
+            connections.close_all()
+            executor = ProcessPoolExecutor(
+                max_workers=options['workers'],
+                initializer=outbox.init_worker_process,
+            )
+        else:
+            executor = ThreadPoolExecutor(max_workers=options['workers'])
+
+        self.stdout.write(
+            f"Outbox worker started ({options['workers']} {options['mode']} workers, "
+            f"batch size {options['batch_size']})"
+        )
+        total_done = total_failed = 0
+        try:
+            while not self.stopping:
+                done, failed = outbox.process_batch(
+                    executor,
+                    batch_size=options['batch_size'],
+                    max_attempts=options['max_attempts'],
+                )
+                total_done += done
+                total_failed += failed
+                if done or failed:
+                    self.stdout.write(f'  Batch finished: {done} succeeded, {failed} failed')
+                elif options['once']:
+                    break
+                else:
+                    time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            executor.shutdown(wait=True)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Outbox worker stopped: {total_done} succeeded, {total_failed} failed')
+        )
+
+    def request_stop(self, signum, frame):
+        self.stopping = True
@@ -0,0 +1,43 @@
+import json
+
+from django.core.management.base import CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from course.management.base import JobCommand
+from notifications.changefeed import changes_since
+
+
+class Command(JobCommand):
+    help = 'Print Post upserts and deletion tombstones since a change-feed cursor, as JSON lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--cursor',
+            help='Cursor from a previous sync (default: start from the beginning)',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=500,
+            help='Changes read per page (default: 500)',
+        )
+        parser.add_argument(
+            '--follow',
+            action='store_true',
+            help='Keep reading pages until the feed is exhausted',
+        )
+
+    def handle(self, *args, **options):
+        cursor, total = options['cursor'], 0
+        while True:
+            try:
+                changes, cursor, has_more = changes_since(cursor, options['limit'])
+            except ValueError:
+                raise CommandError('Invalid --cursor')
+            for change in changes:
+                self.stdout.write(json.dumps(change, cls=DjangoJSONEncoder))
+            total += len(changes)
+            if not (has_more and options['follow']):
+                break
+
+        self.stderr.write(f'{total} changes; next cursor: {cursor or ""}')
@@ -0,0 +1,87 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from course.management.base import JobCommand
+from notifications.models import DeletedPost
+
+
+class Command(JobCommand):
+    help = 'Apply the DeletedPost retention policy: compact old backups, purge expired ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--compact-after-days',
+            type=int,
+            default=30,
+            help='Drop the content of backups older than this, keeping a tombstone (default: 30)',
+        )
+        parser.add_argument(
+            '--purge-after-days',
+            type=int,
+            default=365,
+            help='Delete backups older than this entirely (default: 365)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Rows changed per transaction (default: 500)',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0.05,
+            help='Seconds to pause between chunks so writers can get the lock (default: 0.05)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many rows would be compacted and purged',
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+
+        now = timezone.now()
+        expired = DeletedPost.objects.filter(
+            deleted_at__lt=now - timedelta(days=options['purge_after_days'])
+        )
+        compactable = DeletedPost.objects.filter(
+            deleted_at__lt=now - timedelta(days=options['compact_after_days']),
+            compacted_at__isnull=True,
+        )
+
+        if options['dry_run']:
+            self.stdout.write(f'Would purge {expired.count()} backups')
+            self.stdout.write(f'Would compact {compactable.count()} backups')
+            return
+
+        purged = self.in_chunks(expired, lambda rows: rows.delete(), options)
+        self.stdout.write(f'Purged {purged} backups')
+
+        compacted = self.in_chunks(
+            compactable,
+            lambda rows: rows.update(content='', tag_ids=[], compacted_at=now),
+            options,
+        )
+        self.stdout.write(self.style.SUCCESS(f'Compacted {compacted} backups'))
+
+    def in_chunks(self, queryset, apply, options):
+        """Apply ``apply`` to ``queryset`` one short transaction per chunk, oldest first."""
+        total = 0
+        while True:
+            with transaction.atomic():
+                ids = list(
+                    queryset.order_by('deleted_at', 'id').values_list('pk', flat=True)[:options['chunk_size']]
+                )
+                if ids:
+                    apply(DeletedPost.objects.filter(pk__in=ids))
+            total += len(ids)
+            if len(ids) < options['chunk_size']:
+                return total
+            time.sleep(options['sleep'])
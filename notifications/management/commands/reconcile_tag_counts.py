@@ -0,0 +1,30 @@
+from django.db.models import F
+
+from course.management.base import JobCommand
+from notifications.models import Tag
+
+
+class Command(JobCommand):
+    help = 'Recompute Tag.post_count from the post/tag join table to fix drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only list the tags whose stored count has drifted',
+        )
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            drifted = (
+                Tag.objects.with_actual_post_count()
+                .exclude(post_count=F('actual_post_count'))
+                .order_by('name')
+            )
+            for tag in drifted:
+                self.stdout.write(f'  • {tag.name}: stored {tag.post_count}, actual {tag.actual_post_count}')
+            self.stdout.write(f'{len(drifted)} tags have drifted')
+            return
+
+        fixed = Tag.objects.reconcile_post_counts()
+        self.stdout.write(self.style.SUCCESS(f'Reconciled post counts for {fixed} tags'))
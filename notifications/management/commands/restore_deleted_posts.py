@@ -0,0 +1,46 @@
+from django.core.management.base import CommandError
+from django.utils.dateparse import parse_datetime
+
+from course.management.base import JobCommand
+from notifications.models import DeletedPost
+
+
+class Command(JobCommand):
+    help = 'Restore archived posts (with their tags) from DeletedPost back into Post'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--id',
+            dest='original_ids',
+            type=int,
+            action='append',
+            default=[],
+            help='Original Post id to restore; may be repeated',
+        )
+        parser.add_argument(
+            '--deleted-since',
+            help='Restore every post deleted at or after this ISO 8601 datetime',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Rows per bulk_create (default: 500)',
+        )
+
+    def handle(self, *args, **options):
+        archived = DeletedPost.objects.all()
+        if options['original_ids']:
+            archived = archived.filter(original_id__in=options['original_ids'])
+        if options['deleted_since']:
+            since = parse_datetime(options['deleted_since'])
+            if since is None:
+                raise CommandError('--deleted-since must be an ISO 8601 datetime')
+            archived = archived.filter(deleted_at__gte=since)
+        if not options['original_ids'] and not options['deleted_since']:
+            raise CommandError('Pass --id and/or --deleted-since to choose what to restore')
+
+        posts = archived.restore(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Restored {len(posts)} posts'))
+        for post in posts[:10]:
+            self.stdout.write(f'  • "{post.title}" (ID: {post.pk})')
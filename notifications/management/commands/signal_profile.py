@@ -0,0 +1,80 @@
+import io
+import json
+import shlex
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from notifications import instrumentation
+
+
+class Command(BaseCommand):
+    help = 'Show per-receiver call counts, latency and queries for the model signals'
+
+    def add_arguments(self, parser):
+        source = parser.add_mutually_exclusive_group(required=True)
+        source.add_argument(
+            '--run',
+            metavar='COMMAND',
+            help='Profile a management command in-process, e.g. --run "signals_demo"',
+        )
+        source.add_argument(
+            '--load',
+            metavar='PATH',
+            help='Show stats dumped by a process running with SIGNAL_PROFILING_DUMP',
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Print the stats as JSON instead of a table',
+        )
+        parser.add_argument(
+            '--output',
+            metavar='PATH',
+            help='Also write the stats as JSON to this file',
+        )
+
+    def handle(self, *args, **options):
+        if options['load']:
+            try:
+                with open(options['load']) as fh:
+                    rows = json.load(fh)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Cannot read {options['load']}: {exc}")
+        else:
+            rows = self.profile(shlex.split(options['run']), show_output=options['verbosity'] > 1)
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(rows, fh, indent=2)
+
+        if options['json']:
+            self.stdout.write(json.dumps(rows, indent=2))
+        else:
+            self.print_table(rows)
+
+    def profile(self, argv, show_output=False):
+        if not argv:
+            raise CommandError('--run needs a command name')
+        was_installed = instrumentation.is_installed()
+        instrumentation.reset()
+        instrumentation.install()
+        try:
+            call_command(*argv, stdout=self.stdout if show_output else io.StringIO())
+        finally:
+            if not was_installed:
+                instrumentation.uninstall()
+        return instrumentation.snapshot()
+
+    def print_table(self, rows):
+        if not rows:
+            self.stdout.write('No signal receivers ran.')
+            return
+        header = f"{'receiver':<60} {'signal':<12} {'calls':>7} {'total ms':>10} {'mean ms':>9} {'p99 ms':>9} {'q/call':>7}"
+        self.stdout.write(self.style.SUCCESS(header))
+        for row in rows:
+            self.stdout.write(
+                f"{row['receiver'][-60:]:<60} {row['signal']:<12} {row['calls']:>7} "
+                f"{row['total_ms']:>10.2f} {row['mean_ms']:>9.3f} {row['p99_ms']:>9.3f} "
+                f"{row['queries_per_call']:>7.1f}"
+            )
@@ -1,7 +1,8 @@
 from django.core.management.base import BaseCommand
 from django.db import connection
 from django.contrib.auth.models import User
-from notifications.models import Post, Tag, DeletedPost
+from notifications.models import Post, Tag, DeletedPost, OutboxJob
+from notifications import outbox
 import time
 
 
@@ -56,7 +57,7 @@ class Command(BaseCommand):
         
         post2 = Post.objects.create(
             title="Another Great Post",
-            slug="custom-slug",
+            slug=f"custom-slug-{int(time.time())}",
             content="More content here"
         )
         
@@ -97,6 +98,11 @@ class Command(BaseCommand):
         
         self.stdout.write(f"✅ Created User: {user.username} ({user.email})")
         self.stdout.write(f"✅ Updated User: {user.username} - first_name set to '{user.first_name}'")
+        self.stdout.write(f"📬 Outbox jobs queued: {OutboxJob.objects.filter(status=OutboxJob.PENDING).count()}")
+
+        # Normally `manage.py outbox_worker` runs these; drain inline for the demo
+        done, failed = outbox.process_batch()
+        self.stdout.write(f"✅ Outbox drained inline: {done} succeeded, {failed} failed")
         
         self.stdout.write(f"\n📋 SQL Queries executed ({len(new_queries)}):")
         for i, query in enumerate(new_queries, 1):
@@ -0,0 +1,87 @@
+import re
+
+from django.db import migrations
+from django.db.models import Count, Min, Q
+from django.utils.text import slugify
+
+# A frozen copy of the notifications.slugs helpers as of this migration, so
+# later changes to that module can't change what the migration does.
+
+LOOKUP_CHUNK_SIZE = 100
+SUFFIX_RESERVE = 8
+
+
+def base_slug(title, max_length):
+    base = slugify(title or '')[:max_length - SUFFIX_RESERVE].strip('-')
+    return base or 'post'
+
+
+def taken_slugs(manager, bases):
+    taken = {}
+    bases = sorted(bases)
+    for start in range(0, len(bases), LOOKUP_CHUNK_SIZE):
+        condition = Q()
+        for base in bases[start:start + LOOKUP_CHUNK_SIZE]:
+            condition |= Q(slug=base) | Q(slug__gte=f'{base}-', slug__lt=f'{base}.')
+        taken.update(manager.filter(condition).values_list('slug', 'title'))
+    return taken
+
+
+def assign_unique_slugs(manager, objs, max_length):
+    bases = {id(obj): base_slug(obj.title, max_length) for obj in objs}
+    taken = taken_slugs(manager, set(bases.values()))
+    next_suffix = {}
+    for obj in objs:
+        base = bases[id(obj)]
+        if base not in taken:
+            obj.slug = base
+        else:
+            if base not in next_suffix:
+                pattern = re.compile(rf'^{re.escape(base)}-(\d+)$')
+                suffixes = [
+                    int(match.group(1))
+                    for slug, title in taken.items()
+                    if (match := pattern.match(slug)) and base_slug(title, max_length) != slug
+                ]
+                next_suffix[base] = max(suffixes, default=1) + 1
+            while f'{base}-{next_suffix[base]}' in taken:
+                next_suffix[base] += 1
+            obj.slug = f'{base}-{next_suffix[base]}'
+            next_suffix[base] += 1
+        taken[obj.slug] = obj.title
+
+
+def forwards(apps, schema_editor):
+    Post = apps.get_model('notifications', 'Post')
+    manager = Post._default_manager.db_manager(schema_editor.connection.alias)
+    max_length = Post._meta.get_field('slug').max_length
+
+    # Empty slugs, and every row but the oldest of each duplicated slug.
+    duplicates = (
+        manager.exclude(slug='')
+        .values('slug')
+        .annotate(rows=Count('id'), keep=Min('id'))
+        .filter(rows__gt=1)
+    )
+    pks = list(manager.filter(slug='').values_list('pk', flat=True))
+    for group in list(duplicates):
+        pks.extend(manager.filter(slug=group['slug']).exclude(pk=group['keep']).values_list('pk', flat=True))
+    pks.sort()
+
+    for start in range(0, len(pks), 500):
+        batch = list(manager.filter(pk__in=pks[start:start + 500]))
+        for obj in batch:
+            obj.slug = ''
+        assign_unique_slugs(manager, batch, max_length)
+        manager.bulk_update(batch, ['slug'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_outboxjob'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0003_backfill_post_slugs'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='slug',
+            field=models.SlugField(blank=True, max_length=200, unique=True),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:07
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_posts(apps, schema_editor):
+    Tag = apps.get_model('notifications', 'Tag')
+    Through = apps.get_model('notifications', 'Post').tags.through
+    links = (
+        Through.objects.filter(tag_id=OuterRef('pk'))
+        .order_by()
+        .values('tag_id')
+        .annotate(links=Count('*'))
+        .values('links')
+    )
+    Tag.objects.using(schema_editor.connection.alias).update(
+        post_count=Coalesce(Subquery(links), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0004_post_slug_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tag',
+            name='post_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['-post_count', 'name'], name='tag_popularity_idx'),
+        ),
+        migrations.RunPython(count_posts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:10
+
+import notifications.fields
+from django.db import migrations, models
+
+
+def compress_existing_content(apps, schema_editor):
+    # Rows copied by the table rebuild still hold plain text; rewriting
+    # them through the field compresses them.
+    DeletedPost = apps.get_model('notifications', 'DeletedPost')
+    manager = DeletedPost.objects.using(schema_editor.connection.alias)
+    pks = list(manager.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(pks), 500):
+        rows = list(manager.filter(pk__in=pks[start:start + 500]).only('pk', 'content'))
+        manager.bulk_update(rows, ['content'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0005_tag_post_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deletedpost',
+            name='compacted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='deletedpost',
+            name='tag_ids',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AlterField(
+            model_name='deletedpost',
+            name='content',
+            field=notifications.fields.CompressedTextField(blank=True),
+        ),
+        migrations.AddIndex(
+            model_name='deletedpost',
+            index=models.Index(fields=['deleted_at', 'id'], name='deletedpost_deleted_at_idx'),
+        ),
+        migrations.RunPython(compress_existing_content, migrations.RunPython.noop),
+    ]
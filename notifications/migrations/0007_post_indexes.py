@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0006_compressed_deletedpost'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['updated_at', 'id'], name='post_updated_at_idx'),
+        ),
+        # The auto-created through table only has (post_id, tag_id); tag
+        # filters look links up by tag, so cover them with (tag_id, post_id).
+        migrations.RunSQL(
+            'CREATE INDEX post_tags_tag_post_idx ON notifications_post_tags (tag_id, post_id)',
+            'DROP INDEX post_tags_tag_post_idx',
+        ),
+    ]
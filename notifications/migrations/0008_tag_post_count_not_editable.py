@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0007_post_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tag',
+            name='post_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,36 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0008_tag_post_count_not_editable'),
+    ]
+
+    # The table, its unique (post_id, tag_id) index and post_tags_tag_post_idx
+    # (0007) already exist; this only records them in the model state.
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='PostTag',
+                    fields=[
+                        ('id', models.AutoField(primary_key=True, serialize=False)),
+                        ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='notifications.post')),
+                        ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='notifications.tag')),
+                    ],
+                    options={
+                        'db_table': 'notifications_post_tags',
+                        'unique_together': {('post', 'tag')},
+                        'indexes': [models.Index(fields=['tag', 'post'], name='post_tags_tag_post_idx')],
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='post',
+                    name='tags',
+                    field=models.ManyToManyField(blank=True, related_name='posts', through='notifications.PostTag', to='notifications.tag'),
+                ),
+            ],
+        ),
+    ]
@@ -1,32 +1,313 @@
-from django.db import models
+from collections import Counter, defaultdict
+
+from django.db import NotSupportedError, connections, models, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .fields import CompressedTextField
+from .slugs import assign_unique_slugs
 
 # Create your models here.
 
+class TagQuerySet(models.QuerySet):
+    def popular(self, limit=10):
+        """The ``limit`` most used tags, read from the ``post_count`` index."""
+        return self.order_by('-post_count', 'name')[:limit]
+
+    def adjust_post_counts(self, deltas):
+        """
+        Apply ``{tag_pk: delta}`` to ``post_count`` with ``F()`` expressions.
+
+        Issues one UPDATE per distinct delta, so adding or removing any number
+        of tags on one post is a single query.
+        """
+        by_delta = defaultdict(list)
+        for pk, delta in deltas.items():
+            if delta:
+                by_delta[delta].append(pk)
+        for delta, pks in by_delta.items():
+            self.filter(pk__in=pks).update(post_count=F('post_count') + delta)
+
+    def release_posts(self, post_ids):
+        """Decrement the counts of every tag on ``post_ids`` before the links are removed."""
+        through = Post.tags.through.objects.using(self.db).filter(post_id__in=post_ids)
+        links = (
+            through.filter(tag_id=OuterRef('pk'))
+            .order_by()
+            .values('tag_id')
+            .annotate(links=Count('*'))
+            .values('links')
+        )
+        self.filter(pk__in=through.values('tag_id')).update(
+            post_count=F('post_count') - Subquery(links)
+        )
+
+    def with_actual_post_count(self):
+        through = Post.tags.through.objects.using(self.db)
+        links = (
+            through.filter(tag_id=OuterRef('pk'))
+            .order_by()
+            .values('tag_id')
+            .annotate(links=Count('*'))
+            .values('links')
+        )
+        return self.annotate(actual_post_count=Coalesce(Subquery(links), 0))
+
+    def reconcile_post_counts(self):
+        """Recount ``post_count`` from the join table for drifted tags; returns how many were fixed."""
+        drifted = list(
+            self.with_actual_post_count()
+            .exclude(post_count=F('actual_post_count'))
+            .values_list('pk', flat=True)
+        )
+        if drifted:
+            self.filter(pk__in=drifted).with_actual_post_count().update(
+                post_count=F('actual_post_count')
+            )
+        return len(drifted)
+
+
 class Tag(models.Model):
     name = models.CharField(max_length=50, unique=True)
+    # Number of posts using the tag, maintained by the m2m_changed receiver.
+    post_count = models.IntegerField(default=0, editable=False)
+
+    objects = TagQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-post_count', 'name'], name='tag_popularity_idx'),
+        ]
     
     def __str__(self):
         return self.name
 
+    def save(self, *args, update_fields=None, **kwargs):
+        if not self._state.adding:
+            # post_count only changes through the F() updates of the m2m
+            # receiver; writing back the value loaded with this instance would
+            # undo the link changes made since. Reload it for the signals.
+            if update_fields is None:
+                update_fields = [field.name for field in self._meta.concrete_fields if not field.primary_key]
+            update_fields = [name for name in update_fields if name != 'post_count']
+            self.refresh_from_db(using=kwargs.get('using'), fields=['post_count'])
+        super().save(*args, update_fields=update_fields, **kwargs)
+
+
+# Post columns copied verbatim into DeletedPost when a post is deleted.
+ARCHIVED_POST_FIELDS = ('title', 'slug', 'content', 'created_at', 'updated_at')
+
+
+class PostQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        """Like ``QuerySet.bulk_create`` but fills in unique slugs, which pre_save can't."""
+        objs = list(objs)
+        assign_unique_slugs(objs, self.model, using=self.db)
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def archive_and_delete(self, chunk_size=500):
+        """
+        Back up and delete every post in the queryset without loading them.
+
+        Equivalent to ``delete()`` with the ``backup_post_before_deletion``
+        receiver, but the backup is a single ``INSERT ... SELECT`` into
+        DeletedPost (content compressed and tag ids collected in SQL) and the
+        rows are then deleted in chunks of ``chunk_size``, all inside one
+        transaction. Per-instance delete signals are not sent. Returns the
+        number of archived posts.
+        """
+        if self.query.is_sliced:
+            raise TypeError("Cannot use archive_and_delete() on a sliced queryset.")
+
+        db = self.db
+        connection = connections[db]
+        if connection.vendor != 'sqlite':
+            raise NotSupportedError("archive_and_delete() relies on SQLite's zlib_compress() and json_group_array().")
+        qn = connection.ops.quote_name
+        pk_sql, pk_params = self.order_by().values('pk').query.get_compiler(using=db).as_sql()
+        deleted_at = DeletedPost._meta.get_field('deleted_at').get_db_prep_value(
+            timezone.now(), connection
+        )
+        through = self.model.tags.through
+        columns = ['original_id', *ARCHIVED_POST_FIELDS, 'tag_ids', 'deleted_at']
+        values = [f"p.{qn('id')}"]
+        for name in ARCHIVED_POST_FIELDS:
+            column = f"p.{qn(name)}"
+            values.append(f"zlib_compress({column})" if name == 'content' else column)
+        values.append(
+            f"(SELECT json_group_array(t.{qn('tag_id')}) FROM {qn(through._meta.db_table)} t "
+            f"WHERE t.{qn('post_id')} = p.{qn('id')})"
+        )
+        values.append('%s')
+        insert_sql = (
+            f"INSERT INTO {qn(DeletedPost._meta.db_table)} "
+            f"({', '.join(qn(name) for name in columns)}) "
+            f"SELECT {', '.join(values)} FROM {qn(self.model._meta.db_table)} p "
+            f"WHERE p.{qn('id')} IN ({pk_sql})"
+        )
+
+        with transaction.atomic(using=db):
+            with connection.cursor() as cursor:
+                cursor.execute(insert_sql, (deleted_at, *pk_params))
+                archived = cursor.rowcount
+            while True:
+                ids = list(self.order_by().values_list('pk', flat=True)[:chunk_size])
+                if not ids:
+                    break
+                Tag.objects.using(db).release_posts(ids)
+                through.objects.using(db).filter(post_id__in=ids)._raw_delete(db)
+                self.model.objects.using(db).filter(pk__in=ids)._raw_delete(db)
+                if len(ids) < chunk_size:
+                    break
+        return archived
+
+
+class PostTag(models.Model):
+    """
+    The ``Post.tags`` join table, declared so its ``(tag, post)`` index is
+    part of the model state. Links still go through ``post.tags`` so the
+    ``m2m_changed`` receivers see them.
+    """
+
+    id = models.AutoField(primary_key=True)
+    post = models.ForeignKey('Post', on_delete=models.CASCADE)
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE)
+
+    class Meta:
+        db_table = 'notifications_post_tags'
+        unique_together = [('post', 'tag')]
+        indexes = [
+            # Tag filters look links up by tag.
+            models.Index(fields=['tag', 'post'], name='post_tags_tag_post_idx'),
+        ]
+
 
 class Post(models.Model):
     title = models.CharField(max_length=200)
-    slug = models.SlugField(max_length=200,blank=True)
+    slug = models.SlugField(max_length=200,blank=True,unique=True)
     content = models.TextField(blank=True)
-    tags = models.ManyToManyField(Tag, related_name='posts', blank=True)
+    tags = models.ManyToManyField(Tag, related_name='posts', blank=True, through=PostTag)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = PostQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated_at', 'id'], name='post_updated_at_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
+class DeletedPostQuerySet(models.QuerySet):
+    def restore(self, batch_size=500):
+        """
+        Recreate the archived posts with their original ids and tags.
+
+        Compacted rows (content dropped) and posts whose id is in use again
+        are skipped. A slug taken meanwhile is regenerated. Posts, then all
+        tag links, are written with one ``bulk_create`` each and the archive
+        rows are removed, in one transaction. Returns the restored posts.
+        """
+        db = self.db
+        through = Post.tags.through
+        with transaction.atomic(using=db):
+            archived = list(self.filter(compacted_at__isnull=True).order_by('-deleted_at', '-id'))
+            original_ids = {row.original_id for row in archived}
+            in_use = set(Post.objects.using(db).filter(pk__in=original_ids).values_list('pk', flat=True))
+            taken_slugs = set(
+                Post.objects.using(db)
+                .filter(slug__in={row.slug for row in archived if row.slug})
+                .values_list('slug', flat=True)
+            )
+
+            restored, posts = [], []
+            for row in archived:
+                if row.original_id in in_use:
+                    continue
+                in_use.add(row.original_id)
+                slug = '' if row.slug in taken_slugs else row.slug
+                taken_slugs.add(slug)
+                restored.append(row)
+                posts.append(Post(id=row.original_id, title=row.title, slug=slug, content=row.content))
+            Post.objects.using(db).bulk_create(posts, batch_size=batch_size)
+
+            # bulk_create applies auto_now_add; put the original creation time back.
+            for post, row in zip(posts, restored):
+                post.created_at = row.created_at
+            Post.objects.using(db).bulk_update(posts, ['created_at'], batch_size=batch_size)
+
+            wanted = {tag_id for row in restored for tag_id in row.tag_ids}
+            live_tags = set(Tag.objects.using(db).filter(pk__in=wanted).values_list('pk', flat=True))
+            links = [
+                through(post_id=row.original_id, tag_id=tag_id)
+                for row in restored
+                for tag_id in row.tag_ids
+                if tag_id in live_tags
+            ]
+            through.objects.using(db).bulk_create(links, batch_size=batch_size)
+            Tag.objects.using(db).adjust_post_counts(Counter(link.tag_id for link in links))
+
+            DeletedPost.objects.using(db).filter(pk__in=[row.pk for row in restored]).delete()
+        return posts
+
+
 class DeletedPost(models.Model):
     original_id = models.IntegerField()
     title = models.CharField(max_length=200)
     slug = models.SlugField(max_length=200,blank=True)
-    content = models.TextField(blank=True)
+    content = CompressedTextField(blank=True)
+    tag_ids = models.JSONField(default=list, blank=True)
     created_at = models.DateTimeField()
     updated_at = models.DateTimeField()
     deleted_at = models.DateTimeField(auto_now_add=True)
+    # Set when the retention policy dropped the content; the row stays as a tombstone.
+    compacted_at = models.DateTimeField(null=True, blank=True)
+
+    objects = DeletedPostQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['deleted_at', 'id'], name='deletedpost_deleted_at_idx'),
+        ]
     
+    @classmethod
+    def from_post(cls, post):
+        return cls(
+            original_id=post.id,
+            tag_ids=list(post.tags.values_list('pk', flat=True)),
+            **{name: getattr(post, name) for name in ARCHIVED_POST_FIELDS},
+        )
+
+    def __str__(self):
+        return f"Deleted: {self.title}"
+
+class OutboxJob(models.Model):
+    """A side effect queued by a signal receiver, run later by ``outbox_worker``."""
+    PENDING = 'pending'
+    PROCESSING = 'processing'
+    DEAD = 'dead'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (PROCESSING, 'Processing'),
+        (DEAD, 'Dead letter'),
+    ]
+    kind = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    claim_token = models.CharField(max_length=32, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='outbox_status_available_idx'),
+        ]
+
     def __str__(self):
-        return f"Deleted: {self.title}"
\ No newline at end of file
+        return f"{self.kind} #{self.pk} ({self.status})"
@@ -0,0 +1,154 @@
+"""
+Transactional outbox for signal side effects.
+
+Signal receivers call ``enqueue()`` instead of doing slow work (sending mail,
+notifying other systems) inline. The job row is written on the same database
+connection as the change that triggered it, so it commits or rolls back with
+it. ``manage.py outbox_worker`` claims jobs in batches and runs them on a
+thread or process pool.
+"""
+import traceback
+import uuid
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import OutboxJob
+
+HANDLERS = {}
+
+
+def get_setting(name, default):
+    return getattr(settings, f'OUTBOX_{name}', default)
+
+
+def task(kind):
+    """Decorator registering the handler for outbox jobs of ``kind``."""
+    def decorator(func):
+        HANDLERS[kind] = func
+        return func
+    return decorator
+
+
+def enqueue(kind, using=None, **payload):
+    """
+    Queue a job on the ``using`` database, which a signal receiver sets to
+    its ``using`` so the job commits with the change. ``payload`` must be
+    JSON serializable.
+    """
+    if kind not in HANDLERS:
+        raise ValueError(f"No outbox handler registered for '{kind}'")
+    return OutboxJob.objects.using(using).create(kind=kind, payload=payload)
+
+
+def run_job(kind, payload):
+    """Run a single job. Module level so it can be pickled for process pools."""
+    return HANDLERS[kind](**payload)
+
+
+def init_worker_process():
+    """Process pool initializer: make Django usable in the child process."""
+    django.setup()
+    close_old_connections()
+
+
+def backoff_delay(attempts):
+    """Seconds to wait before retrying a job that has failed ``attempts`` times."""
+    base = get_setting('BACKOFF_BASE', 5)
+    cap = get_setting('BACKOFF_MAX', 3600)
+    return min(cap, base * 2 ** max(attempts - 1, 0))
+
+
+def claim_batch(batch_size=None):
+    """
+    Claim up to ``batch_size`` runnable jobs and return them.
+
+    Jobs whose lease expired (a worker died mid-batch) are claimed again. The
+    conditional UPDATE only matches rows that are still unclaimed, so two
+    workers racing for the same ids never both get them.
+    """
+    batch_size = batch_size or get_setting('BATCH_SIZE', 50)
+    now = timezone.now()
+    lease_expired = now - timedelta(seconds=get_setting('LEASE_SECONDS', 300))
+    runnable = (
+        Q(status=OutboxJob.PENDING, available_at__lte=now)
+        | Q(status=OutboxJob.PROCESSING, claimed_at__lt=lease_expired)
+    )
+    ids = list(
+        OutboxJob.objects.filter(runnable)
+        .order_by('available_at', 'id')
+        .values_list('id', flat=True)[:batch_size]
+    )
+    if not ids:
+        return []
+
+    token = uuid.uuid4().hex
+    OutboxJob.objects.filter(runnable, pk__in=ids).update(
+        status=OutboxJob.PROCESSING,
+        claim_token=token,
+        claimed_at=now,
+        attempts=F('attempts') + 1,
+    )
+    return list(OutboxJob.objects.filter(claim_token=token).order_by('id'))
+
+
+def mark_done(jobs):
+    """Delete finished jobs, unless another worker re-claimed them meanwhile."""
+    OutboxJob.objects.filter(
+        pk__in=[job.pk for job in jobs],
+        claim_token__in={job.claim_token for job in jobs},
+    ).delete()
+
+
+def mark_failed(job, error, max_attempts=None):
+    """Schedule a retry with exponential backoff, or dead-letter the job."""
+    max_attempts = max_attempts or get_setting('MAX_ATTEMPTS', 5)
+    if job.attempts >= max_attempts:
+        status, available_at = OutboxJob.DEAD, job.available_at
+    else:
+        status = OutboxJob.PENDING
+        available_at = timezone.now() + timedelta(seconds=backoff_delay(job.attempts))
+    OutboxJob.objects.filter(pk=job.pk, claim_token=job.claim_token).update(
+        status=status,
+        available_at=available_at,
+        last_error=error,
+        claim_token='',
+        claimed_at=None,
+    )
+
+
+def _outcome(call, *args):
+    """Return ``None`` if ``call(*args)`` succeeds, else the formatted traceback."""
+    try:
+        call(*args)
+    except Exception as exc:
+        return ''.join(traceback.format_exception(type(exc), exc, exc.__traceback__))
+    return None
+
+
+def process_batch(executor=None, batch_size=None, max_attempts=None):
+    """
+    Claim one batch and run it, on ``executor`` if given or inline otherwise.
+
+    Returns ``(succeeded, failed)`` counts.
+    """
+    jobs = claim_batch(batch_size)
+    if executor is None:
+        errors = [_outcome(run_job, job.kind, job.payload) for job in jobs]
+    else:
+        futures = [executor.submit(run_job, job.kind, job.payload) for job in jobs]
+        errors = [_outcome(future.result) for future in futures]
+
+    done = []
+    for job, error in zip(jobs, errors):
+        if error is None:
+            done.append(job)
+        else:
+            mark_failed(job, error, max_attempts)
+    if done:
+        mark_done(done)
+    return len(done), len(jobs) - len(done)
@@ -0,0 +1,15 @@
+from rest_framework import serializers
+
+from course.telemetry import SerializationTimingMixin
+from .models import Post, Tag
+class TagSerializer(SerializationTimingMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Tag
+        fields = ['id', 'name', 'post_count']
+
+class PostSerializer(SerializationTimingMixin, serializers.ModelSerializer):
+    tags = serializers.SlugRelatedField(many=True, read_only=True, slug_field='name')
+
+    class Meta:
+        model = Post
+        fields = ['id', 'title', 'slug', 'content', 'tags', 'created_at', 'updated_at']
@@ -1,43 +1,103 @@
-from django.db.models.signals import post_save,pre_save,pre_delete,m2m_changed
+from django.db.backends.signals import connection_created
+from django.db import transaction
+from django.db.models.signals import post_save,post_delete,pre_save,pre_delete,m2m_changed
 from django.dispatch import receiver
-from .models import Post,DeletedPost
-from django.utils.text import slugify
+from .models import Post,DeletedPost,Tag
+from .outbox import enqueue
+from . import tag_index
+from . import tasks  # noqa: F401  registers the outbox handlers
+from .slugs import assign_unique_slugs
+from .fields import register_sqlite_functions
 from django.contrib.auth.models import User
 from django.utils import timezone
 
-def send_welcome_email(user_email):
-    print(f"🎉 Welcome email sent to: {user_email}")
+connection_created.connect(register_sqlite_functions)
 
 @receiver(pre_save, sender=Post)
 def auto_generate_slug(sender, instance, **kwargs):
-    if not instance.slug and instance.title:
-        instance.slug = slugify(instance.title)
-        print(f"📝 Auto-generated slug for Post: '{instance.slug}'")
+    if not instance.slug:
+        assign_unique_slugs([instance], sender, using=kwargs.get('using'))
+        instance._slug_generated = True
+
+@receiver(post_save, sender=Post)
+def announce_generated_slug(sender, instance, using, **kwargs):
+    # Queued once the row is saved, so a failed save leaves no job behind.
+    if instance.__dict__.pop('_slug_generated', False):
+        enqueue('notify', using=using, message=f"📝 Auto-generated slug for Post: '{instance.slug}'")
 
 @receiver(post_save, sender=User)
-def send_user_welcome_notification(sender, instance, created, **kwargs):
+def send_user_welcome_notification(sender, instance, created, using, **kwargs):
     if created:
-        send_welcome_email(instance.email)
-        print(f"👤 New user created: {instance.username} ({instance.email})")
+        if instance.email:
+            enqueue('welcome_email', using=using, user_email=instance.email)
+        enqueue('notify', using=using, message=f"👤 New user created: {instance.username} ({instance.email})")
+
+@receiver(pre_delete, sender=Post)
+def backup_post_before_deletion(sender, instance, using, **kwargs):
+    DeletedPost.from_post(instance).save(using=using)
+    enqueue('notify', using=using, message=f"💾 Backed up Post before deletion: '{instance.title}' (ID: {instance.id})")
 
 @receiver(pre_delete, sender=Post)
-def backup_post_before_deletion(sender, instance, **kwargs):
-    DeletedPost.objects.create(
-        original_id=instance.id,
-        title=instance.title,
-        slug=instance.slug,
-        content=instance.content,
-        created_at=instance.created_at,
-        updated_at=instance.updated_at
-    )
-    print(f"💾 Backed up Post before deletion: '{instance.title}' (ID: {instance.id})")
+def release_tags_before_deletion(sender, instance, using, **kwargs):
+    # The join rows are removed by cascade, which sends no m2m_changed.
+    Tag.objects.using(using).release_posts([instance.pk])
 
 @receiver(m2m_changed,sender = Post.tags.through)
-def track_post_tags_changes(sender,instance,action,pk_set,**kwargs):
+def track_post_tags_changes(sender,instance,action,pk_set,using,**kwargs):
+    label = f"{type(instance).__name__} '{instance}'"
     if action == 'pre_add':
         timestamp = timezone.now()
-        print(f"🏷️  [{timestamp}] PRE_ADD - Post '{instance.title}' adding tags with PKs: {pk_set}")
-    
+        enqueue('notify', using=using, message=f"🏷️  [{timestamp}] PRE_ADD - {label} adding links with PKs: {sorted(pk_set)}")
+
     elif action == 'post_remove':
         timestamp = timezone.now()
-        print(f"🗑️  [{timestamp}] POST_REMOVE - Post '{instance.title}' removed tags with PKs: {pk_set}")
\ No newline at end of file
+        enqueue('notify', using=using, message=f"🗑️  [{timestamp}] POST_REMOVE - {label} removed links with PKs: {sorted(pk_set)}")
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def maintain_tag_post_counts(sender, instance, action, reverse, pk_set, using, **kwargs):
+    """
+    Keep ``Tag.post_count`` in step with the join table, from either side,
+    and bump ``updated_at`` on the affected posts so the change feed sees
+    their new tags.
+
+    ``pk_set`` only lists rows that really change for ``post_add``; for
+    removals it lists what was asked for, so the existing links are looked up
+    in ``pre_remove``/``pre_clear`` and applied after the delete.
+    """
+    own, other = ('tag_id', 'post_id') if reverse else ('post_id', 'tag_id')
+    if action in ('pre_remove', 'pre_clear'):
+        links = sender.objects.using(using).filter(**{own: instance.pk})
+        if action == 'pre_remove':
+            links = links.filter(**{f'{other}__in': pk_set})
+        instance._removed_tag_links = set(links.values_list(other, flat=True))
+        return
+
+    if action == 'post_add':
+        changed, delta = pk_set, 1
+    elif action in ('post_remove', 'post_clear'):
+        changed, delta = instance.__dict__.pop('_removed_tag_links', set()), -1
+    else:
+        return
+
+    if not changed:
+        return
+    if reverse:
+        deltas = {instance.pk: delta * len(changed)}
+        touched = changed
+    else:
+        deltas = {pk: delta for pk in changed}
+        touched = [instance.pk]
+    Tag.objects.using(using).adjust_post_counts(deltas)
+    transaction.on_commit(lambda: tag_index.index.adjust_counts(deltas), using=using)
+    Post.objects.using(using).filter(pk__in=touched).update(updated_at=timezone.now())
+
+@receiver(post_save, sender=Tag)
+def index_saved_tag(sender, instance, using, **kwargs):
+    pk, name, post_count = instance.pk, instance.name, instance.post_count
+    transaction.on_commit(lambda: tag_index.index.tag_saved(pk, name, post_count), using=using)
+
+@receiver(post_delete, sender=Tag)
+def unindex_deleted_tag(sender, instance, using, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: tag_index.index.tag_deleted(pk), using=using)
+
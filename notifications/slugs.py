@@ -0,0 +1,122 @@
+"""
+Unique slug generation for Post.
+
+Candidates are built from the title with ``slugify``; collisions get a numeric
+suffix (``my-post``, ``my-post-2``, ``my-post-3``...). Existing slugs that can
+collide with a batch are loaded with range lookups on the indexed ``slug``
+column and resolved in memory, so a bulk insert costs one query per chunk of
+distinct titles instead of one per candidate.
+
+The functions take the model class so data migrations can pass a historical
+model.
+"""
+import re
+
+from django.db.models import Count, Min, Q
+from django.utils.text import slugify
+
+FALLBACK_SLUG = 'post'
+
+# Distinct base slugs looked up per query (3 parameters each).
+LOOKUP_CHUNK_SIZE = 100
+
+# Room kept at the end of a truncated slug for a "-<n>" suffix.
+SUFFIX_RESERVE = 8
+
+
+def base_slug(title, max_length):
+    base = slugify(title or '')[:max_length - SUFFIX_RESERVE].strip('-')
+    return base or FALLBACK_SLUG
+
+
+def _taken_slugs(model, bases, using):
+    """
+    Return ``{slug: title}`` for the stored slugs equal to one of ``bases``
+    or starting with "<base>-".
+    """
+    taken = {}
+    bases = sorted(bases)
+    manager = model._default_manager.db_manager(using)
+    for start in range(0, len(bases), LOOKUP_CHUNK_SIZE):
+        condition = Q()
+        for base in bases[start:start + LOOKUP_CHUNK_SIZE]:
+            # '.' sorts right after '-', so this is an index range scan.
+            condition |= Q(slug=base) | Q(slug__gte=f'{base}-', slug__lt=f'{base}.')
+        taken.update(manager.filter(condition).values_list('slug', 'title'))
+    return taken
+
+
+def assign_unique_slugs(objs, model, using=None):
+    """
+    Fill in a unique slug on every object in ``objs`` whose slug is empty.
+
+    Slugs already set on objects in ``objs`` are kept and reserved. Two
+    concurrent writers can still pick the same slug; the unique constraint on
+    ``slug`` turns that into an IntegrityError rather than a duplicate.
+
+    New suffixes continue after the highest one this function added before.
+    A slug whose digits come from its own title ("hello-world-2024" for
+    "Hello world 2024") is only avoided, not counted as a suffix.
+    """
+    pending = [obj for obj in objs if not obj.slug]
+    if not pending:
+        return
+    max_length = model._meta.get_field('slug').max_length
+    bases = {id(obj): base_slug(obj.title, max_length) for obj in pending}
+    taken = _taken_slugs(model, set(bases.values()), using)
+    taken.update((obj.slug, obj.title) for obj in objs if obj.slug)
+
+    next_suffix = {}
+    for obj in pending:
+        base = bases[id(obj)]
+        if base not in taken:
+            obj.slug = base
+        else:
+            if base not in next_suffix:
+                pattern = re.compile(rf'^{re.escape(base)}-(\d+)$')
+                suffixes = [
+                    int(match.group(1))
+                    for slug, title in taken.items()
+                    if (match := pattern.match(slug)) and base_slug(title, max_length) != slug
+                ]
+                next_suffix[base] = max(suffixes, default=1) + 1
+            while f'{base}-{next_suffix[base]}' in taken:
+                next_suffix[base] += 1
+            obj.slug = f'{base}-{next_suffix[base]}'
+            next_suffix[base] += 1
+        taken[obj.slug] = obj.title
+
+
+def slugs_to_backfill(model, using=None):
+    """Return the pks of rows with an empty slug or a slug an older row already has."""
+    manager = model._default_manager.db_manager(using)
+    duplicates = (
+        manager.exclude(slug='')
+        .values('slug')
+        .annotate(rows=Count('id'), keep=Min('id'))
+        .filter(rows__gt=1)
+    )
+    pks = list(manager.filter(slug='').values_list('pk', flat=True))
+    for group in list(duplicates):
+        pks.extend(
+            manager.filter(slug=group['slug']).exclude(pk=group['keep']).values_list('pk', flat=True)
+        )
+    return sorted(pks)
+
+
+def backfill_slugs(model, batch_size=500, using=None):
+    """
+    Give every row of ``model`` a unique, non-empty slug.
+
+    For each duplicated slug the oldest row keeps it and the others are
+    regenerated. Returns the number of rows that got a new slug.
+    """
+    manager = model._default_manager.db_manager(using)
+    pks = slugs_to_backfill(model, using=manager.db)
+    for start in range(0, len(pks), batch_size):
+        batch = list(manager.filter(pk__in=pks[start:start + batch_size]))
+        for obj in batch:
+            obj.slug = ''
+        assign_unique_slugs(batch, model, using=manager.db)
+        manager.bulk_update(batch, ['slug'])
+    return len(pks)
@@ -0,0 +1,240 @@
+"""
+In-memory prefix index of tag names for autocomplete.
+
+Tags are kept as a sorted list of ``(lowercased name, id)``; the tags
+starting with a prefix are one contiguous slice found with two bisections,
+ranked by ``post_count``. Every prefix matching more than
+``DENSE_PREFIX_SIZE`` tags has its top ``TOP_SIZE`` results precomputed when
+the index is built, so a search never ranks more than that many tags; the
+precomputed lists are patched as tags change.
+
+The index is loaded on first use and kept current in this process from
+Tag save/delete signals (after commit) and the post count changes made by
+the m2m receiver. Other processes' changes are picked up by a reload every
+``TAG_INDEX_TTL`` seconds, built in a background thread while searches keep
+using the current index.
+"""
+import bisect
+import heapq
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+MAX_RESULTS = 20
+
+# Prefixes matching more tags than this have their top results precomputed.
+DENSE_PREFIX_SIZE = 256
+
+# Precomputed results per prefix; the slack over MAX_RESULTS absorbs tags
+# dropping out of a list between reloads.
+TOP_SIZE = 2 * MAX_RESULTS
+
+END = '\U0010ffff'
+
+
+def _build_tops(entries, tags):
+    """
+    The top ``TOP_SIZE`` tag ids of every prefix matching more than
+    ``DENSE_PREFIX_SIZE`` of ``entries``. A dense prefix is ranked from its
+    exact matches and its children's top lists, so each tag is ranked once
+    in a sparse slice and then only through the short lists above it.
+    """
+    tops = {}
+
+    def rank(pk):
+        name, count = tags[pk]
+        return -count, name
+
+    def visit(prefix, lo, hi):
+        if hi - lo <= DENSE_PREFIX_SIZE:
+            return heapq.nsmallest(TOP_SIZE, (entries[i][1] for i in range(lo, hi)), key=rank)
+        depth = len(prefix)
+        candidates = []
+        while lo < hi and len(entries[lo][0]) == depth:
+            candidates.append(entries[lo][1])
+            lo += 1
+        while lo < hi:
+            child = prefix + entries[lo][0][depth]
+            end = bisect.bisect_left(entries, (child + END,), lo, hi)
+            candidates.extend(visit(child, lo, end))
+            lo = end
+        tops[prefix] = heapq.nsmallest(TOP_SIZE, candidates, key=rank)
+        return tops[prefix]
+
+    visit('', 0, len(entries))
+    return tops
+
+
+class TagPrefixIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._entries = None
+        self._tags = {}
+        self._tops = {}
+        # Prefixes whose top list lost tags it can't refill without a rescan.
+        self._short = set()
+        self._loaded_at = 0.0
+        self._reloading = False
+        # Saves and deletes that arrive while a reload reads the table.
+        self._missed = None
+
+    def reload(self):
+        """Rebuild the index from the database and swap it in."""
+        with self._load_lock:
+            self._load()
+
+    def _load(self):
+        from .models import Tag
+
+        with self._lock:
+            self._missed = []
+        try:
+            tags = {
+                pk: [name, count]
+                for pk, name, count in Tag.objects.values_list('pk', 'name', 'post_count').iterator()
+            }
+            entries = sorted((name.lower(), pk) for pk, (name, _count) in tags.items())
+            tops = _build_tops(entries, tags)
+        except BaseException:
+            with self._lock:
+                self._missed = None
+            raise
+        with self._lock:
+            missed, self._missed = self._missed, None
+            self._tags, self._entries, self._tops, self._short = tags, entries, tops, set()
+            self._loaded_at = time.monotonic()
+            for change in missed:
+                if change[0] == 'saved':
+                    self._save(*change[1:])
+                elif change[1] in self._tags:
+                    self._remove(change[1])
+
+    def _reload_in_background(self):
+        try:
+            self.reload()
+        except DatabaseError:
+            pass
+        finally:
+            connections.close_all()
+            with self._lock:
+                self._reloading = False
+
+    def _ensure_loaded(self):
+        if self._entries is None:
+            with self._load_lock:
+                if self._entries is None:
+                    self._load()
+            return
+        with self._lock:
+            if self._reloading or time.monotonic() - self._loaded_at <= settings.TAG_INDEX_TTL:
+                return
+            self._reloading = True
+            # A failed reload is retried after another TTL, not on every search.
+            self._loaded_at = time.monotonic()
+        threading.Thread(target=self._reload_in_background, name='tag-index-reload', daemon=True).start()
+
+    def search(self, prefix, limit=10):
+        """The ``limit`` most used tags whose name starts with ``prefix`` (case-insensitive)."""
+        self._ensure_loaded()
+        prefix = prefix.lower()
+        limit = max(1, min(limit, MAX_RESULTS))
+        with self._lock:
+            top = self._tops.get(prefix)
+            if top is None or (prefix in self._short and len(top) < limit):
+                lo = bisect.bisect_left(self._entries, (prefix,))
+                hi = bisect.bisect_left(self._entries, (prefix + END,), lo)
+                entries = self._entries
+                top = heapq.nsmallest(TOP_SIZE, (entries[i][1] for i in range(lo, hi)), key=self._rank)
+                if prefix in self._tops:
+                    self._tops[prefix] = top
+                    self._short.discard(prefix)
+            return [
+                {'id': pk, 'name': self._tags[pk][0], 'post_count': self._tags[pk][1]}
+                for pk in top[:limit]
+            ]
+
+    def _rank(self, pk):
+        name, count = self._tags[pk]
+        return -count, name
+
+    def _update_tops(self, pk, key, rising):
+        """
+        Fix the top lists of the prefixes of ``key`` after tag ``pk`` was
+        added or gained posts (``rising``), or was removed or lost posts. A
+        list is always the true head of its prefix's ranking; one holding
+        every match is kept complete, and a full one that loses a tag past its
+        end is marked short and rescanned when a search needs more.
+        """
+        for length in range(len(key) + 1):
+            prefix = key[:length]
+            top = self._tops.get(prefix)
+            if top is None:
+                continue
+            complete = len(top) < TOP_SIZE and prefix not in self._short
+            if rising:
+                if pk not in top:
+                    if not complete and (not top or self._rank(pk) >= self._rank(top[-1])):
+                        continue
+                    top.append(pk)
+                top.sort(key=self._rank)
+                del top[TOP_SIZE:]
+                continue
+            if pk not in top:
+                continue
+            top.remove(pk)
+            if pk in self._tags and (complete or (top and self._rank(pk) < self._rank(top[-1]))):
+                bisect.insort(top, pk, key=self._rank)
+            elif not complete:
+                self._short.add(prefix)
+
+    def _remove(self, pk):
+        name = self._tags.pop(pk)[0]
+        key = name.lower()
+        self._update_tops(pk, key, rising=False)
+        position = bisect.bisect_left(self._entries, (key, pk))
+        if position < len(self._entries) and self._entries[position] == (key, pk):
+            del self._entries[position]
+
+    def _save(self, pk, name, post_count):
+        if pk in self._tags:
+            self._remove(pk)
+        self._tags[pk] = [name, post_count]
+        key = name.lower()
+        bisect.insort(self._entries, (key, pk))
+        self._update_tops(pk, key, rising=True)
+
+    def tag_saved(self, pk, name, post_count):
+        with self._lock:
+            if self._missed is not None:
+                self._missed.append(('saved', pk, name, post_count))
+            if self._entries is not None:
+                self._save(pk, name, post_count)
+
+    def tag_deleted(self, pk):
+        with self._lock:
+            if self._missed is not None:
+                self._missed.append(('deleted', pk))
+            if self._entries is not None and pk in self._tags:
+                self._remove(pk)
+
+    def adjust_counts(self, deltas):
+        """Apply ``{tag_pk: delta}`` to the indexed post counts."""
+        with self._lock:
+            if self._entries is None:
+                return
+            for pk, delta in deltas.items():
+                tag = self._tags.get(pk)
+                if tag is not None and delta:
+                    tag[1] += delta
+                    self._update_tops(pk, tag[0].lower(), rising=delta > 0)
+
+    def clear(self):
+        with self._lock:
+            self._entries, self._tags, self._tops, self._short = None, {}, {}, set()
+            self._loaded_at = 0.0
+
+
+index = TagPrefixIndex()
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.mail import send_mail
+
+from .outbox import task
+
+
+@task('welcome_email')
+def send_welcome_email(user_email):
+    send_mail(
+        subject='Welcome!',
+        message='Thanks for signing up.',
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        recipient_list=[user_email],
+    )
+    print(f"🎉 Welcome email sent to: {user_email}")
+
+
+@task('notify')
+def notify(message):
+    print(message)
@@ -1,3 +1,583 @@
-from django.test import TestCase
+import io
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from course.testing import PerformanceContractMixin
+
+from . import instrumentation, outbox, tag_index
+from .models import DeletedPost, OutboxJob, Post, Tag
+from .changefeed import changes_since
+from .slugs import backfill_slugs
+
+
+class OutboxTests(TestCase):
+    def test_user_signup_queues_welcome_email_instead_of_sending(self):
+        User.objects.create_user(username='alice', email='alice@example.com', password='x')
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertTrue(OutboxJob.objects.filter(kind='welcome_email').exists())
+
+    def test_worker_sends_queued_email_and_removes_job(self):
+        User.objects.create_user(username='bob', email='bob@example.com', password='x')
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            done, failed = outbox.process_batch(executor)
+
+        self.assertEqual((done, failed), (2, 0))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['bob@example.com'])
+        self.assertFalse(OutboxJob.objects.exists())
+
+    def test_failing_job_backs_off_then_becomes_dead_letter(self):
+        failing = mock.Mock(side_effect=RuntimeError('smtp down'))
+        with mock.patch.dict(outbox.HANDLERS, {'flaky': failing}):
+            job = outbox.enqueue('flaky', value=1)
+
+            outbox.process_batch(max_attempts=2)
+            job.refresh_from_db()
+            self.assertEqual(job.status, OutboxJob.PENDING)
+            self.assertEqual(job.attempts, 1)
+            self.assertGreater(job.available_at, timezone.now())
+            self.assertIn('smtp down', job.last_error)
+
+            # Not runnable until the backoff has elapsed
+            self.assertEqual(outbox.process_batch(max_attempts=2), (0, 0))
+
+            OutboxJob.objects.filter(pk=job.pk).update(available_at=timezone.now() - timedelta(seconds=1))
+            outbox.process_batch(max_attempts=2)
+            job.refresh_from_db()
+
+        self.assertEqual(job.status, OutboxJob.DEAD)
+        self.assertEqual(job.attempts, 2)
+        failing.assert_called_with(value=1)
+
+    def test_expired_lease_is_reclaimed(self):
+        job = outbox.enqueue('notify', message='hello')
+        self.assertEqual([j.pk for j in outbox.claim_batch()], [job.pk])
+        self.assertEqual(outbox.claim_batch(), [])
+
+        OutboxJob.objects.filter(pk=job.pk).update(claimed_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual([j.pk for j in outbox.claim_batch()], [job.pk])
+
+    def test_post_side_effects_go_through_the_outbox(self):
+        stdout = io.StringIO()
+        with mock.patch('sys.stdout', stdout):
+            post = Post.objects.create(title='Hello')
+            post.delete()
+
+        self.assertEqual(stdout.getvalue(), '')
+        messages = [job.payload['message'] for job in OutboxJob.objects.filter(kind='notify').order_by('id')]
+        self.assertEqual(len(messages), 2)
+        self.assertIn("Auto-generated slug for Post: 'hello'", messages[0])
+        self.assertIn("Backed up Post before deletion: 'Hello'", messages[1])
+
+    def test_jobs_are_written_to_the_signal_database(self):
+        with mock.patch.object(OutboxJob.objects, 'using', wraps=OutboxJob.objects.using) as using:
+            Post.objects.using('default').create(title='Hello')
+            User.objects.db_manager('default').create_user(username='carol', email='carol@example.com')
+        self.assertEqual(using.call_count, 3)
+        self.assertEqual({call.args for call in using.call_args_list}, {('default',)})
+
+
+class ArchiveAndDeleteTests(TestCase):
+    def test_bulk_archive_matches_per_instance_backup(self):
+        tag = Tag.objects.create(name='django')
+        posts = [Post.objects.create(title=f'Post {i}', content=f'Body {i}') for i in range(5)]
+        posts[0].tags.add(tag)
+        posts[0].refresh_from_db()
+
+        last_pk = posts[4].pk
+        posts[4].delete()
+        posts[4].pk = last_pk
+
+        with self.assertNumQueries(11):
+            archived = Post.objects.filter(title__startswith='Post').archive_and_delete(chunk_size=3)
+
+        self.assertEqual(archived, 4)
+        self.assertFalse(Post.objects.exists())
+        self.assertFalse(Post.tags.through.objects.exists())
+        fields = ('title', 'slug', 'content', 'created_at', 'updated_at')
+        for post in posts:
+            backup = DeletedPost.objects.get(original_id=post.pk)
+            self.assertEqual(
+                [getattr(backup, name) for name in fields],
+                [getattr(post, name) for name in fields],
+            )
+
+
+class SlugTests(TestCase):
+    def test_save_generates_unique_slugs(self):
+        first = Post.objects.create(title='Hello World')
+        second = Post.objects.create(title='Hello World')
+        untitled = Post.objects.create(title='')
+
+        self.assertEqual(first.slug, 'hello-world')
+        self.assertEqual(second.slug, 'hello-world-2')
+        self.assertEqual(untitled.slug, 'post')
+
+    def test_bulk_create_resolves_collisions_in_one_lookup(self):
+        Post.objects.create(title='Hello World')
+        Post.objects.create(title='Hello World 3')
+        posts = [Post(title='Hello World') for _ in range(3)] + [Post(title='Other', slug='hello-world-5')]
+
+        with self.assertNumQueries(2):
+            Post.objects.bulk_create(posts)
+
+        self.assertEqual(
+            [post.slug for post in posts],
+            ['hello-world-6', 'hello-world-7', 'hello-world-8', 'hello-world-5'],
+        )
+
+    def test_digits_from_the_title_are_not_a_suffix(self):
+        dated = Post.objects.create(title='Hello World 2024')
+        first = Post.objects.create(title='Hello World')
+        second = Post.objects.create(title='Hello World')
+
+        self.assertEqual(dated.slug, 'hello-world-2024')
+        self.assertEqual((first.slug, second.slug), ('hello-world', 'hello-world-2'))
+
+    def test_backfill_regenerates_empty_slugs(self):
+        first = Post.objects.create(title='Same')
+        second = Post.objects.create(title='Other')
+        Post.objects.filter(pk=second.pk).update(slug='')
+
+        self.assertEqual(backfill_slugs(Post), 1)
+        second.refresh_from_db()
+        self.assertEqual(second.slug, 'other')
+        self.assertEqual(first.slug, 'same')
+
+
+class SlugBackfillMigrationTests(TransactionTestCase):
+    """Duplicate slugs can only exist before 0004 made ``slug`` unique."""
+
+    before = [('notifications', '0002_outboxjob')]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        self.Post = executor.loader.project_state(self.before).apps.get_model('notifications', 'Post')
+        self.addCleanup(self.migrate_to_latest)
+
+    def migrate_to_latest(self):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def create(self, title, slug):
+        return self.Post.objects.create(title=title, slug=slug, content='')
+
+    def slugs(self, posts):
+        return [self.Post.objects.get(pk=post.pk).slug for post in posts]
+
+    def test_backfill_regenerates_duplicate_slugs(self):
+        posts = [self.create('Same', 'same'), self.create('Same', 'same'), self.create('Same', '')]
+
+        self.assertEqual(backfill_slugs(self.Post), 2)
+        self.assertEqual(self.slugs(posts), ['same', 'same-2', 'same-3'])
+
+    def test_migration_makes_slugs_unique(self):
+        posts = [self.create('Same', 'same'), self.create('Other', 'same'), self.create('Same 2024', 'same')]
+
+        self.migrate_to_latest()
+
+        self.assertEqual(self.slugs(posts), ['same', 'other', 'same-2024'])
+
+
+class TagPostCountTests(TestCase):
+    def setUp(self):
+        self.django, self.python, self.orm = (
+            Tag.objects.create(name=name) for name in ('django', 'python', 'orm')
+        )
+        self.post = Post.objects.create(title='One')
+        self.other = Post.objects.create(title='Two')
+
+    def counts(self):
+        return dict(Tag.objects.values_list('name', 'post_count'))
+
+    def test_counts_follow_add_remove_and_clear(self):
+        self.post.tags.add(self.django, self.python)
+        self.post.tags.add(self.django)
+        self.other.tags.add(self.django)
+        self.assertEqual(self.counts(), {'django': 2, 'python': 1, 'orm': 0})
+
+        self.post.tags.remove(self.python, self.orm)
+        self.assertEqual(self.counts(), {'django': 2, 'python': 0, 'orm': 0})
+
+        self.post.tags.clear()
+        self.assertEqual(self.counts(), {'django': 1, 'python': 0, 'orm': 0})
+
+    def test_counts_follow_reverse_side_and_deletes(self):
+        self.orm.posts.add(self.post, self.other)
+        self.python.posts.set([self.post])
+        self.assertEqual(self.counts(), {'django': 0, 'python': 1, 'orm': 2})
+
+        self.other.delete()
+        Post.objects.filter(pk=self.post.pk).archive_and_delete()
+        self.assertEqual(self.counts(), {'django': 0, 'python': 0, 'orm': 0})
+
+    def test_save_after_link_change_keeps_count(self):
+        self.post.tags.add(self.django)
+        self.django.name = 'django-orm'
+        self.django.save()
+        Tag.objects.get(pk=self.django.pk).save(update_fields=['name', 'post_count'])
+
+        self.assertEqual(self.counts(), {'django-orm': 1, 'python': 0, 'orm': 0})
+        self.assertEqual(self.django.post_count, 1)
+
+    def test_admin_rename_keeps_count(self):
+        self.post.tags.add(self.django)
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'x'))
+
+        response = self.client.post(
+            f'/admin/notifications/tag/{self.django.pk}/change/', {'name': 'web', 'post_count': 0},
+        )
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.counts(), {'web': 1, 'python': 0, 'orm': 0})
+
+    def test_reconcile_fixes_drift_and_popular_orders_by_count(self):
+        Post.tags.through.objects.bulk_create([
+            Post.tags.through(post=self.post, tag=self.orm),
+            Post.tags.through(post=self.other, tag=self.orm),
+            Post.tags.through(post=self.other, tag=self.python),
+        ])
+        self.assertEqual(Tag.objects.reconcile_post_counts(), 2)
+        self.assertEqual(
+            [tag.name for tag in Tag.objects.popular(2)],
+            ['orm', 'python'],
+        )
+
+
+class LargeTableAdminTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'x'))
+
+    def add_rows(self, count):
+        now = timezone.now()
+        DeletedPost.objects.bulk_create(
+            DeletedPost(original_id=i, title=f'Post {i}', created_at=now, updated_at=now) for i in range(count)
+        )
+        OutboxJob.objects.bulk_create(OutboxJob(kind='welcome_email') for _ in range(count))
+
+    def changelist_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [query['sql'] for query in queries]
+
+    def test_changelists_do_not_count_the_table(self):
+        for url in ('/admin/notifications/deletedpost/', '/admin/notifications/outboxjob/'):
+            with self.subTest(url=url):
+                self.add_rows(3)
+                small = self.changelist_queries(url)
+                self.add_rows(40)
+                large = self.changelist_queries(url)
+
+                self.assertEqual(len(small), len(large))
+                self.assertFalse([sql for sql in large if 'COUNT(*)' in sql.upper()])
+
+    def test_filtered_outbox_count_is_capped(self):
+        self.add_rows(5)
+        counts = [
+            sql for sql in self.changelist_queries('/admin/notifications/outboxjob/?status__exact=pending')
+            if 'COUNT(*)' in sql.upper()
+        ]
+        self.assertTrue(counts)
+        self.assertTrue(all('LIMIT 10000' in sql.upper() for sql in counts))
+
+
+class SignalInstrumentationTests(TestCase):
+    def tearDown(self):
+        instrumentation.uninstall()
+        instrumentation.reset()
+
+    def test_records_calls_and_queries_per_receiver(self):
+        instrumentation.install()
+        Post.objects.create(title='Profiled')
+        Post.objects.create(title='Profiled')
+
+        rows = {row['receiver']: row for row in instrumentation.snapshot()}
+        slug = rows['notifications.signals.auto_generate_slug']
+        self.assertEqual(slug['signal'], 'pre_save')
+        self.assertEqual(slug['calls'], 2)
+        self.assertEqual(slug['queries'], 2)
+        self.assertGreater(slug['p99_ms'], 0)
+
+    def test_uninstalled_signals_are_not_recorded(self):
+        Post.objects.create(title='Not profiled')
+        self.assertEqual(instrumentation.snapshot(), [])
+
+
+class DeletedPostArchiveTests(TestCase):
+    def setUp(self):
+        self.tag = Tag.objects.create(name='django')
+        self.gone = Tag.objects.create(name='gone')
+
+    def test_content_is_stored_compressed(self):
+        post = Post.objects.create(title='Big', content='lorem ipsum ' * 500)
+        post.delete()
+
+        backup = DeletedPost.objects.get()
+        self.assertEqual(backup.content, 'lorem ipsum ' * 500)
+        raw = DeletedPost.objects.values_list('content', flat=True).query
+        with connection.cursor() as cursor:
+            cursor.execute(*raw.sql_with_params())
+            stored = cursor.fetchone()[0]
+        self.assertLess(len(stored), 200)
+
+    def test_admin_shows_and_edits_the_content(self):
+        Post.objects.create(title='Big', content='lorem ipsum').delete()
+        backup = DeletedPost.objects.get()
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'x'))
+        url = f'/admin/notifications/deletedpost/{backup.pk}/change/'
+
+        response = self.client.get(url)
+        self.assertContains(response, '<textarea name="content"')
+        self.assertContains(response, 'lorem ipsum</textarea>')
+
+        response = self.client.post(url, {
+            'original_id': backup.original_id, 'title': 'Big', 'slug': backup.slug, 'content': 'dolor sit',
+            'tag_ids': '[]', 'created_at_0': '2024-01-01', 'created_at_1': '00:00:00',
+            'updated_at_0': '2024-01-01', 'updated_at_1': '00:00:00',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(DeletedPost.objects.get().content, 'dolor sit')
+
+    def test_bulk_and_single_deletes_restore_with_tags(self):
+        first = Post.objects.create(title='First', content='one')
+        second = Post.objects.create(title='Second', content='two')
+        first.tags.add(self.tag, self.gone)
+        second.tags.add(self.tag)
+        first_pk, created_at = first.pk, first.created_at
+
+        first.delete()
+        Post.objects.filter(pk=second.pk).archive_and_delete()
+        self.gone.delete()
+        self.assertEqual(Tag.objects.get(pk=self.tag.pk).post_count, 0)
+
+        with self.assertNumQueries(11):
+            restored = DeletedPost.objects.all().restore()
+
+        self.assertEqual(len(restored), 2)
+        first = Post.objects.get(pk=first_pk)
+        self.assertEqual((first.slug, first.content, first.created_at), ('first', 'one', created_at))
+        self.assertEqual(list(first.tags.values_list('name', flat=True)), ['django'])
+        self.assertEqual(Tag.objects.get(pk=self.tag.pk).post_count, 2)
+        self.assertFalse(DeletedPost.objects.exists())
+
+    def test_retention_compacts_then_purges_in_chunks(self):
+        for i in range(5):
+            Post.objects.create(title=f'Old {i}', content='x').delete()
+        DeletedPost.objects.update(deleted_at=timezone.now() - timedelta(days=60))
+        DeletedPost.objects.filter(pk__in=list(DeletedPost.objects.values_list('pk', flat=True)[:2])).update(
+            deleted_at=timezone.now() - timedelta(days=400)
+        )
+
+        call_command('prune_deleted_posts', chunk_size=2, sleep=0, stdout=io.StringIO())
+
+        self.assertEqual(DeletedPost.objects.count(), 3)
+        self.assertFalse(DeletedPost.objects.filter(compacted_at__isnull=True).exists())
+        self.assertEqual(set(DeletedPost.objects.values_list('content', flat=True)), {''})
+        self.assertEqual(DeletedPost.objects.all().restore(), [])
+
+
+class PostApiTests(TestCase):
+    def setUp(self):
+        self.django, self.python, self.orm = (
+            Tag.objects.create(name=name) for name in ('django', 'python', 'orm')
+        )
+        self.both = Post.objects.create(title='Both')
+        self.both.tags.add(self.django, self.python)
+        self.only_django = Post.objects.create(title='Only django')
+        self.only_django.tags.add(self.django)
+        self.untagged = Post.objects.create(title='Untagged')
+
+    def titles(self, query):
+        response = self.client.get(f'/api/posts/{query}')
+        self.assertEqual(response.status_code, 200)
+        return [post['title'] for post in response.json()['results']]
+
+    def test_tag_filters(self):
+        self.assertEqual(self.titles('?tags=django,python'), ['Both'])
+        self.assertEqual(self.titles('?tags=python,orm&match=any'), ['Both'])
+        self.assertEqual(self.titles('?tags=django&match=any'), ['Only django', 'Both'])
+        self.assertEqual(self.titles('?tags=django,missing'), [])
+
+    def test_tags_are_prefetched_once_per_page(self):
+        for i in range(10):
+            Post.objects.create(title=f'Extra {i}').tags.add(self.orm)
+        with self.assertNumQueries(2):
+            self.titles('')
+
+    def test_tag_filter_index_is_declared_on_the_join_table(self):
+        through = Post.tags.through
+        constraints = connection.introspection.get_constraints(connection.cursor(), through._meta.db_table)
+
+        self.assertEqual(constraints['post_tags_tag_post_idx']['columns'], ['tag_id', 'post_id'])
+        self.assertIn('post_tags_tag_post_idx', [index.name for index in through._meta.indexes])
+        call_command('makemigrations', 'notifications', '--check', '--dry-run', stdout=io.StringIO())
+
+    def test_admin_edits_tags_through_the_receivers(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'x'))
+
+        response = self.client.post(f'/admin/notifications/post/{self.untagged.pk}/change/', {
+            'title': 'Untagged', 'slug': self.untagged.slug, 'content': '', 'tags': [self.orm.pk, self.django.pk],
+        })
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(set(self.untagged.tags.all()), {self.orm, self.django})
+        self.assertEqual(dict(Tag.objects.values_list('name', 'post_count')), {'django': 3, 'python': 1, 'orm': 1})
+
+class ChangeFeedTests(TestCase):
+    def test_feed_returns_upserts_and_tombstones_after_cursor(self):
+        first = Post.objects.create(title='First')
+        second = Post.objects.create(title='Second')
+        changes, cursor, has_more = changes_since(limit=1)
+        self.assertEqual([(c['op'], c['id']) for c in changes], [('upsert', first.pk)])
+        self.assertTrue(has_more)
+
+        second_pk = second.pk
+        first.tags.add(Tag.objects.create(name='django'))
+        second.delete()
+        changes, cursor, has_more = changes_since(cursor)
+        self.assertEqual(
+            [(c['op'], c['id']) for c in changes],
+            [('upsert', first.pk), ('delete', second_pk)],
+        )
+        self.assertEqual(changes[0]['post']['tags'], ['django'])
+        self.assertFalse(has_more)
+
+        with self.assertNumQueries(2):
+            self.assertEqual(changes_since(cursor), ([], cursor, False))
+
+    def test_endpoint_rejects_bad_cursor(self):
+        Post.objects.create(title='First')
+        response = self.client.get('/api/posts/changes/')
+        self.assertEqual(len(response.json()['changes']), 1)
+        self.assertEqual(self.client.get('/api/posts/changes/?cursor=nope').status_code, 400)
+
+
+class TagAutocompleteTests(TestCase):
+    def setUp(self):
+        # Precompute every prefix shared by two or more tags.
+        patcher = mock.patch.object(tag_index, 'DENSE_PREFIX_SIZE', 1)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        tag_index.index.clear()
+        self.addCleanup(tag_index.index.clear)
+        self.tags = {
+            name: Tag.objects.create(name=name, post_count=count)
+            for name, count in [('Django', 5), ('django-rest', 9), ('djangocon', 1), ('python', 7), ('dj', 0)]
+        }
+
+    def names(self, query, **params):
+        response = self.client.get('/api/tags/autocomplete/', {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return [row['name'] for row in response.data]
+
+    def test_prefix_search_ranked_by_popularity_without_queries(self):
+        self.assertEqual(self.names('dja'), ['django-rest', 'Django', 'djangocon'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.names('DJ', limit=2), ['django-rest', 'Django'])
+            self.assertEqual(self.names('x'), [])
+        self.assertEqual(self.names(''), ['django-rest', 'python', 'Django', 'djangocon', 'dj'])
+
+    def test_index_follows_tag_changes_after_commit(self):
+        self.names('d')
+        with self.captureOnCommitCallbacks(execute=True):
+            Tag.objects.create(name='djinn', post_count=6)
+            self.tags['Django'].name = 'Legacy'
+            self.tags['Django'].save()
+            self.tags['djangocon'].delete()
+        self.assertEqual(self.names('d'), ['django-rest', 'djinn', 'dj'])
+        self.assertEqual(self.names('leg'), ['Legacy'])
+
+        post = Post.objects.create(title='Tagged')
+        with self.captureOnCommitCallbacks(execute=True):
+            post.tags.add(self.tags['dj'], self.tags['django-rest'])
+        self.assertEqual(tag_index.index.search('dj')[0]['post_count'], 10)
+        with self.captureOnCommitCallbacks(execute=True):
+            post.tags.remove(self.tags['django-rest'])
+        results = tag_index.index.search('dj')
+        self.assertEqual([(row['name'], row['post_count']) for row in results], [
+            ('django-rest', 9), ('djinn', 6), ('dj', 1),
+        ])
+
+    def test_dense_prefixes_are_precomputed(self):
+        self.names('d')
+        self.assertEqual(set(tag_index.index._tops), {'', 'd', 'dj', 'dja', 'djan', 'djang', 'django'})
+        self.assertEqual(self.names('django'), ['django-rest', 'Django', 'djangocon'])
+
+    def test_top_list_that_runs_short_is_rescanned(self):
+        with mock.patch.object(tag_index, 'TOP_SIZE', 2):
+            self.assertEqual(self.names('dj', limit=2), ['django-rest', 'Django'])
+            with self.captureOnCommitCallbacks(execute=True):
+                self.tags['django-rest'].delete()
+            self.assertEqual(tag_index.index._tops['dj'], [self.tags['Django'].pk])
+            with self.assertNumQueries(0):
+                self.assertEqual(self.names('dj', limit=2), ['Django', 'djangocon'])
+
+    def test_stale_index_reloads_in_the_background(self):
+        self.names('d')
+        Tag.objects.filter(name='python').update(name='dart')
+        with override_settings(TAG_INDEX_TTL=0), mock.patch.object(tag_index.threading, 'Thread') as thread:
+            with self.assertNumQueries(0):
+                self.assertEqual(self.names('da'), [])
+            thread.assert_called_once()
+            self.assertEqual(thread.call_args.kwargs['target'], tag_index.index._reload_in_background)
+            # Only one reload at a time.
+            self.names('da')
+            thread.assert_called_once()
+        tag_index.index.reload()
+        self.assertEqual(self.names('da'), ['dart'])
+
+
+class PostContractTests(PerformanceContractMixin, TestCase):
+    def seed(self, count):
+        start = Tag.objects.count()
+        tags = Tag.objects.bulk_create(Tag(name=f'tag-{start + i}') for i in range(count))
+        posts = Post.objects.bulk_create(
+            Post(title='Hello world', slug=f'hello-world-{start + i + 2}', content='Body') for i in range(count)
+        )
+        Post.tags.through.objects.bulk_create(
+            Post.tags.through(post_id=post.pk, tag_id=tag.pk) for post in posts for tag in tags[:3]
+        )
+        Tag.objects.reconcile_post_counts()
+
+    def test_save_with_colliding_slugs(self):
+        def run():
+            Post.objects.create(title='Hello world')
+
+        self.assertConstantQueries(self.seed, run)
+        self.assertWithinBudget(run, budget_ms=50)
+
+    def test_tag_add_remove_and_delete(self):
+        def run():
+            post = Post.objects.create(title='Tagged')
+            tags = list(Tag.objects.all())
+            post.tags.add(*tags)
+            post.tags.remove(*tags[::2])
+            post.delete()
+
+        self.assertConstantQueries(self.seed, run)
+        self.assertWithinBudget(run, budget_ms=100)
+
+    def test_post_and_tag_endpoints(self):
+        for path in ('/api/posts/', '/api/posts/?tags=tag-0,tag-1', '/api/posts/changes/?limit=20',
+                     '/api/tags/popular/', '/api/tags/'):
+            with self.subTest(path=path):
+                def run():
+                    self.assertEqual(self.client.get(path).status_code, 200)
+
+                self.assertConstantQueries(self.seed, run)
+                self.assertWithinBudget(run, budget_ms=100)
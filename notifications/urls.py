@@ -0,0 +1,10 @@
+from rest_framework.routers import SimpleRouter
+from rest_framework.urlpatterns import format_suffix_patterns
+
+from .views import PostViewSet, TagViewSet
+
+router = SimpleRouter()
+router.register(r'posts', PostViewSet, basename='post')
+router.register(r'tags', TagViewSet, basename='tag')
+
+urlpatterns = format_suffix_patterns(router.urls)
@@ -1,3 +1,96 @@
-from django.shortcuts import render
+from django.db.models import Count
+from course.db_routers import ReplicaReadMixin
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from .changefeed import changes_since
+from .models import Post, Tag
+from .pagination import PostCursorPagination
+from .serializers import PostSerializer, TagSerializer
+from .tag_index import MAX_RESULTS, index as tag_index
 
-# Create your views here.
+class PostViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Posts, newest change first, optionally filtered by tag names:
+    ``?tags=django,python`` (posts with all of them) or
+    ``?tags=django,python&match=any`` (posts with at least one).
+    """
+
+    serializer_class = PostSerializer
+    pagination_class = PostCursorPagination
+    max_changes_limit = 1000
+
+    def get_queryset(self):
+        queryset = Post.objects.prefetch_related('tags').order_by('-updated_at', '-id')
+        names = {name.strip() for name in self.request.query_params.get('tags', '').split(',') if name.strip()}
+        if not names:
+            return queryset
+
+        match = self.request.query_params.get('match', 'all')
+        if match not in ('all', 'any'):
+            raise ValidationError({'match': "Must be 'all' or 'any'."})
+
+        tag_ids = list(Tag.objects.filter(name__in=names).values_list('pk', flat=True))
+        if match == 'all' and len(tag_ids) < len(names):
+            return queryset.none()
+
+        # One pass over the (tag_id, post_id) index of the join table,
+        # instead of one join per requested tag.
+        links = Post.tags.through.objects.filter(tag_id__in=tag_ids).values('post_id')
+        if match == 'all':
+            links = links.annotate(matched=Count('tag_id')).filter(matched=len(tag_ids))
+        return queryset.filter(pk__in=links.values('post_id'))
+
+    @action(detail=False)
+    def changes(self, request):
+        """
+        Upserts and deletion tombstones since ``?cursor=`` (omit it for a full
+        sync). Keep calling with ``next_cursor`` while ``has_more`` is true.
+        """
+        try:
+            limit = int(request.query_params.get('limit', 500))
+        except ValueError:
+            limit = 500
+        limit = max(1, min(limit, self.max_changes_limit))
+        try:
+            changes, next_cursor, has_more = changes_since(request.query_params.get('cursor'), limit)
+        except ValueError:
+            raise ValidationError({'cursor': 'Invalid cursor.'})
+        return Response({'changes': changes, 'next_cursor': next_cursor, 'has_more': has_more})
+
+class TagViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
+
+    serializer_class = TagSerializer
+    max_popular_limit = 100
+
+    def get_queryset(self):
+        return Tag.objects.order_by('name')
+
+    @action(detail=False)
+    def popular(self, request):
+        """Most used tags, e.g. for the "popular tags" widget: ``?limit=10``."""
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            limit = 10
+        limit = max(1, min(limit, self.max_popular_limit))
+        serializer = self.get_serializer(Tag.objects.popular(limit), many=True)
+        return Response(serializer.data)
+
+    @action(detail=False)
+    def autocomplete(self, request):
+        """
+        Most used tags starting with ``?q=`` (case-insensitive), from the
+        in-memory prefix index: ``?q=dj&limit=10``.
+        """
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            limit = 10
+        limit = max(1, min(limit, MAX_RESULTS))
+        prefix = request.query_params.get('q', '').strip()
+        if not prefix:
+            # Every tag matches; the popularity index answers this directly.
+            return Response(self.get_serializer(Tag.objects.popular(limit), many=True).data)
+        return Response(tag_index.search(prefix, limit))
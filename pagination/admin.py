@@ -1,4 +1,11 @@
+from course.admin_utils import LargeTableAdmin
 from django.contrib import admin
 from .models import Article
 # Register your models here.
-admin.site.register(Article)
\ No newline at end of file
+
+
+@admin.register(Article)
+class ArticleAdmin(LargeTableAdmin):
+    list_display = ('id', 'title', 'author', 'is_published', 'created_at')
+    list_filter = ('is_published',)
+    search_fields = ('=id',)
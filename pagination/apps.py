@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class PaginationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'pagination'
+
+    def ready(self):
+        import pagination.signals  # noqa: F401
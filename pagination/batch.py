@@ -0,0 +1,93 @@
+"""
+Batch writes of articles for the CMS sync.
+
+Every item is validated in one pass with ``ArticleSerializer``; invalid
+items are reported by index and skipped, the valid ones are written with
+``bulk_create``/``bulk_update`` in chunks inside one transaction, and
+``articles_changed`` is sent once for the batch after it commits.
+"""
+from django.db import transaction
+
+from .models import Article
+from .serializers import ArticleSerializer
+from .signals import articles_changed
+
+CHUNK_SIZE = 500
+
+
+def _notify(action, ids):
+    if ids:
+        transaction.on_commit(lambda: articles_changed.send(sender=Article, action=action, ids=ids))
+
+
+def create_articles(items):
+    """Create articles from ``items``; returns ``(created ids, errors)``."""
+    valid, errors = [], []
+    for index, item in enumerate(items):
+        serializer = ArticleSerializer(data=item)
+        if serializer.is_valid():
+            valid.append(Article(**serializer.validated_data))
+        else:
+            errors.append({'index': index, 'errors': serializer.errors})
+    with transaction.atomic():
+        created = Article.objects.bulk_create(valid, batch_size=CHUNK_SIZE)
+        ids = [article.pk for article in created]
+        _notify('create', ids)
+    return ids, errors
+
+
+def update_articles(items):
+    """Apply partial updates ``{'id': ..., field: value}``; returns ``(updated ids, errors)``."""
+    errors = []
+    wanted = {}
+    for index, item in enumerate(items):
+        pk = item.get('id') if isinstance(item, dict) else None
+        if not isinstance(pk, int) or isinstance(pk, bool):
+            errors.append({'index': index, 'errors': {'id': ['A valid integer is required.']}})
+        else:
+            wanted[index] = pk
+
+    with transaction.atomic():
+        existing = {}
+        pks = sorted(set(wanted.values()))
+        for start in range(0, len(pks), CHUNK_SIZE):
+            existing.update(Article.objects.in_bulk(pks[start:start + CHUNK_SIZE]))
+
+        changed, fields = {}, set()
+        for index, pk in wanted.items():
+            article = existing.get(pk)
+            if article is None:
+                errors.append({'index': index, 'errors': {'id': ['Not found.']}})
+                continue
+            data = {key: value for key, value in items[index].items() if key != 'id'}
+            serializer = ArticleSerializer(article, data=data, partial=True)
+            if not serializer.is_valid():
+                errors.append({'index': index, 'errors': serializer.errors})
+                continue
+            for name, value in serializer.validated_data.items():
+                setattr(article, name, value)
+                fields.add(name)
+            changed[pk] = article
+
+        if changed and fields:
+            Article.objects.bulk_update(list(changed.values()), sorted(fields), batch_size=CHUNK_SIZE)
+        ids = sorted(changed)
+        _notify('update', ids)
+    errors.sort(key=lambda error: error['index'])
+    return ids, errors
+
+
+def set_published(pks, is_published=True):
+    """Publish or unpublish ``pks``; returns ``(ids changed, ids not found)``."""
+    pks = sorted(set(pks))
+    found = []
+    with transaction.atomic():
+        for start in range(0, len(pks), CHUNK_SIZE):
+            chunk = pks[start:start + CHUNK_SIZE]
+            found.extend(Article.objects.filter(pk__in=chunk).values_list('pk', flat=True))
+            Article.objects.filter(pk__in=chunk).exclude(is_published=is_published).update(
+                is_published=is_published
+            )
+        _notify('publish', sorted(found))
+    missing = sorted(set(pks) - set(found))
+    return sorted(found), missing
@@ -3,7 +3,8 @@ from django.core.management.base import BaseCommand
 from django.utils import timezone
 from datetime import timedelta
 import random
-from pagination.models import Article  
+from pagination import page_index
+from pagination.models import Article, ArticlePageBoundary
 
 class Command(BaseCommand):
     help = 'Generate sample articles for pagination testing'
@@ -157,6 +158,8 @@ This analysis will prove valuable for decision-makers, practitioners, and anyone
         # Bulk create for better performance
         try:
             Article.objects.bulk_create(articles_to_create, batch_size=100)
+            # bulk_create skips the receivers that maintain the page index.
+            page_index.rebuild(Article, ArticlePageBoundary)
             
             # Get final counts
             total_count = Article.objects.count()
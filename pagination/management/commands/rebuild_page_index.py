@@ -0,0 +1,30 @@
+import time
+
+from course.management.base import JobCommand
+from pagination import page_index
+from pagination.models import Article, ArticlePageBoundary
+
+
+class Command(JobCommand):
+    help = 'Rebuild the page-boundary index used for numbered article pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--if-stale',
+            action='store_true',
+            help='Only add the boundaries missing past the last one, if any; cheap enough to run every minute',
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if not options['if_stale']:
+            written = page_index.rebuild(Article, ArticlePageBoundary)
+        elif page_index.is_stale(Article, ArticlePageBoundary):
+            written = page_index.extend(Article, ArticlePageBoundary)
+        else:
+            self.stdout.write('Page index is up to date')
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {written} boundaries (every {page_index.STRIDE} published articles) '
+            f'in {time.perf_counter() - started:.2f}s'
+        ))
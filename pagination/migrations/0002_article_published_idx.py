@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pagination', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['is_published', '-created_at'], name='article_published_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pagination', '0002_article_published_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='views',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['is_published', '-views', '-id'], name='article_views_idx'),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:28
+
+from django.db import migrations, models
+from django.db.models import F, Value, Window
+from django.db.models.functions import Mod, RowNumber
+
+# A frozen copy of pagination.page_index.rebuild as of this migration, so
+# later changes to that module can't change what the migration does.
+
+STRIDE = 1000
+
+
+def build_page_index(apps, schema_editor):
+    Article = apps.get_model('pagination', 'Article')
+    ArticlePageBoundary = apps.get_model('pagination', 'ArticlePageBoundary')
+    db_alias = schema_editor.connection.alias
+
+    ArticlePageBoundary.objects.using(db_alias).delete()
+    keys = (
+        Article.objects.using(db_alias)
+        .filter(is_published=True)
+        .annotate(row=Window(RowNumber(), order_by=[F('created_at').asc(), F('id').asc()]))
+        .annotate(slot=Mod(F('row') - 1, Value(STRIDE)))
+        .filter(slot=0)
+        .values_list('row', 'created_at', 'id')
+    )
+    ArticlePageBoundary.objects.using(db_alias).bulk_create(
+        [
+            ArticlePageBoundary(position=(row - 1) // STRIDE, created_at=created_at, article_id=pk)
+            for row, created_at, pk in keys
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pagination', '0003_article_views'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticlePageBoundary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField(unique=True)),
+                ('created_at', models.DateTimeField()),
+                ('article_id', models.BigIntegerField()),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='article',
+            name='article_published_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='article',
+            name='article_views_idx',
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['created_at', 'id'], name='article_published_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['-views', '-id'], name='article_views_idx'),
+        ),
+        migrations.RunPython(build_page_index, migrations.RunPython.noop),
+    ]
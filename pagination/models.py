@@ -1,9 +1,65 @@
+from collections import defaultdict
+
 from django.db import models
+from django.db.models import F
 
 # Create your models here.
+class ArticleQuerySet(models.QuerySet):
+    def add_views(self, counts):
+        """
+        Add ``{article_pk: views}`` to ``views`` with ``F()`` expressions.
+
+        Issues one UPDATE per distinct increment, and most articles share
+        small increments, so a flush of thousands of articles is a handful
+        of queries.
+        """
+        by_count = defaultdict(list)
+        for pk, count in counts.items():
+            if count:
+                by_count[count].append(pk)
+        for count, pks in by_count.items():
+            self.filter(pk__in=pks).update(views=F('views') + count)
+
+
 class Article(models.Model):
     title=models.CharField(max_length=200)
     content=models.TextField()
     created_at=models.DateTimeField(auto_now_add=True)
     author=models.CharField(max_length=100)
-    is_published=models.BooleanField(default=False)
\ No newline at end of file
+    is_published=models.BooleanField(default=False)
+    # Updated in batches by pagination.view_counts, so a few seconds behind.
+    views=models.PositiveIntegerField(default=0)
+
+    objects = ArticleQuerySet.as_manager()
+
+    class Meta:
+        # Partial indexes over the published articles: Django filters them
+        # with a bare "is_published" term, which SQLite only matches to an
+        # index whose WHERE clause is that same term.
+        indexes = [
+            # Serves the (created_at, id) key of the published list in both directions.
+            models.Index(
+                fields=['created_at', 'id'], condition=models.Q(is_published=True), name='article_published_key_idx',
+            ),
+            models.Index(fields=['-views', '-id'], condition=models.Q(is_published=True), name='article_views_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets the page index receivers see publish/unpublish on save.
+        instance._loaded_is_published = instance.__dict__.get('is_published')
+        return instance
+
+
+class ArticlePageBoundary(models.Model):
+    """
+    The ``(created_at, id)`` key of every ``STRIDE``-th published article,
+    counted from the oldest; maintained by ``pagination.page_index``.
+    """
+    position = models.PositiveIntegerField(unique=True)
+    created_at = models.DateTimeField()
+    article_id = models.BigIntegerField()
+
+    def __str__(self):
+        return f'#{self.position}: {self.created_at} / {self.article_id}'
@@ -0,0 +1,169 @@
+"""
+Page-boundary index for numbered pages over the published articles.
+
+The article list is ordered newest first by the ``(created_at, id)`` key.
+``ArticlePageBoundary`` stores the key of every ``STRIDE``-th published
+article counted from the oldest, so new articles, which go at the end,
+never move existing boundaries. A page number becomes a position counted
+from the oldest, the boundary below it gives a key to seek to on
+``article_published_key_idx``, and at most ``STRIDE`` rows are skipped
+from there: page 4,000 costs the same as page 1.
+
+A publish, unpublish or delete moves every later position, so the
+boundaries at or after the changed key are out of date. The receivers in
+``pagination.signals`` call ``update_after_change`` after commit: near the
+end of the list, where new articles go, it recomputes those few
+boundaries; further back that means scanning every later article, so it
+only drops them (``truncate``) and leaves the scan to ``manage.py
+rebuild_page_index``.
+
+The index is only ever missing boundaries at its end, after a truncate or
+a ``bulk_create`` (which skips the receivers): the boundaries it has stay
+correct, pages past the last one seek to it and skip the remaining rows
+with ``OFFSET``, and ``is_stale`` tells the job there is work to do.
+
+The functions take the model classes so data migrations can pass
+historical models.
+"""
+from django.db import transaction
+from django.db.models import F, Q, Value, Window
+from django.db.models.functions import Mod, RowNumber
+
+STRIDE = 1000
+
+# Changes that leave at most this many strides of articles to rescan are
+# indexed inline.
+INLINE_STRIDES = 3
+
+
+def _published(article_model):
+    return article_model._default_manager.filter(is_published=True)
+
+
+def _at_or_after(created_at, pk):
+    # The leading created_at__gte gives SQLite an index range to start from.
+    return Q(created_at__gte=created_at) & (Q(created_at__gt=created_at) | Q(id__gte=pk))
+
+
+def _boundary_before(boundaries, created_at, pk):
+    return (
+        boundaries.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, article_id__lt=pk))
+        .order_by('-position')
+        .first()
+    )
+
+
+def _rows_from(article_model, boundary):
+    rows = _published(article_model)
+    if boundary is not None:
+        rows = rows.filter(_at_or_after(boundary.created_at, boundary.article_id))
+    return rows
+
+
+def rebuild(article_model, boundary_model, created_at=None, pk=None):
+    """
+    Recompute the boundaries at or after the key ``(created_at, pk)``, or
+    all of them when no key is given. Returns the number of boundaries written.
+    """
+    boundaries = boundary_model._default_manager
+    with transaction.atomic(using=boundaries.db):
+        start = None if created_at is None else _boundary_before(boundaries, created_at, pk)
+        rows = _rows_from(article_model, start)
+        first_position = start.position if start is not None else 0
+        boundaries.filter(position__gte=first_position).delete()
+
+        # Every STRIDE-th row of the scan, numbered in SQL in one pass over the index.
+        keys = (
+            rows.annotate(row=Window(RowNumber(), order_by=[F('created_at').asc(), F('id').asc()]))
+            .annotate(slot=Mod(F('row') - 1, Value(STRIDE)))
+            .filter(slot=0)
+            .values_list('row', 'created_at', 'id')
+        )
+        new = [
+            boundary_model(position=first_position + (row - 1) // STRIDE, created_at=key_created_at, article_id=key_pk)
+            for row, key_created_at, key_pk in keys
+        ]
+        boundaries.bulk_create(new, batch_size=500)
+    return len(new)
+
+
+def _at_or_after_key(boundaries, created_at, pk):
+    return boundaries.filter(
+        Q(created_at__gt=created_at) | Q(created_at=created_at, article_id__gte=pk)
+    )
+
+
+def truncate(boundary_model, created_at, pk):
+    """Drop the boundaries at or after the key ``(created_at, pk)``; returns how many."""
+    deleted, _ = _at_or_after_key(boundary_model._default_manager, created_at, pk).delete()
+    return deleted
+
+
+def update_after_change(article_model, boundary_model, created_at, pk):
+    """
+    Bring the index up to date after the published article at ``(created_at,
+    pk)`` was added or removed: recompute the boundaries after it when that
+    rescans at most ``INLINE_STRIDES`` strides of articles, otherwise drop
+    them and leave the rescan to the job.
+    """
+    start = _boundary_before(boundary_model._default_manager, created_at, pk)
+    rescan = _rows_from(article_model, start).order_by('created_at', 'id')
+    if rescan[INLINE_STRIDES * STRIDE:].exists():
+        truncate(boundary_model, created_at, pk)
+    else:
+        rebuild(article_model, boundary_model, created_at, pk)
+
+
+def is_stale(article_model, boundary_model):
+    """Whether published articles past the last boundary are missing boundaries of their own."""
+    last = boundary_model._default_manager.order_by('-position').first()
+    if last is None:
+        return _published(article_model).exists()
+    return _rows_from(article_model, last).order_by('created_at', 'id')[STRIDE:].exists()
+
+
+def extend(article_model, boundary_model):
+    """Add the boundaries missing past the last one; returns the number written."""
+    last = boundary_model._default_manager.order_by('-position').first()
+    if last is None:
+        return rebuild(article_model, boundary_model)
+    # Rebuilds from the boundary before ``last``, which is one stride more than needed.
+    return rebuild(article_model, boundary_model, last.created_at, last.article_id)
+
+
+def total(article_model, boundary_model):
+    """
+    Number of published articles from the index, or ``None`` if it is
+    empty. Counts every row past the last boundary, so it is slower, but
+    still right, while the index is stale.
+    """
+    last = boundary_model._default_manager.order_by('-position').first()
+    if last is None:
+        return None
+    tail = _rows_from(article_model, last).count()
+    return last.position * STRIDE + tail
+
+
+def page_rows(queryset, boundary_model, total_count, offset, limit):
+    """
+    Rows ``offset`` to ``offset + limit`` of ``queryset`` (the published
+    articles, newest first) with a keyset seek instead of ``OFFSET offset``.
+    Past the end of a stale index it seeks to the last boundary and skips
+    the rest, or uses a plain ``OFFSET`` if there is none.
+    """
+    newest = total_count - 1 - offset
+    oldest = max(0, newest - limit + 1)
+    if newest < 0:
+        return []
+    boundary = (
+        boundary_model._default_manager.filter(position__lte=oldest // STRIDE)
+        .order_by('-position')
+        .first()
+    )
+    skip = oldest
+    if boundary is not None:
+        queryset = queryset.filter(_at_or_after(boundary.created_at, boundary.article_id))
+        skip -= boundary.position * STRIDE
+    rows = list(queryset.order_by('created_at', 'id')[skip:skip + newest - oldest + 1])
+    rows.reverse()
+    return rows
@@ -1,9 +1,40 @@
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 from collections import OrderedDict
+from . import page_index
+from .models import Article, ArticlePageBoundary
+
+
+class BoundaryIndexPaginator(Paginator):
+    """
+    Paginator over the published articles, newest first, that counts them
+    and seeks to a page through the page-boundary index instead of
+    ``COUNT(*)`` and ``OFFSET``. Falls back to the stock queries while the
+    index is empty.
+    """
+
+    @cached_property
+    def count(self):
+        indexed = page_index.total(Article, ArticlePageBoundary)
+        self.indexed = indexed is not None
+        return indexed if self.indexed else super().count
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if not self.indexed:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        if top + self.orphans >= self.count:
+            top = self.count
+        rows = page_index.page_rows(self.object_list, ArticlePageBoundary, self.count, bottom, top - bottom)
+        return self._get_page(rows, number, self)
 
 
 class CustomArticlePagination(PageNumberPagination):
+    django_paginator_class = BoundaryIndexPaginator
     page_size = 8
     page_size_query_param = 'page_size'
     max_page_size = 100
@@ -16,4 +47,5 @@ class CustomArticlePagination(PageNumberPagination):
             ('next', self.get_next_link()),
             ('previous', self.get_previous_link()),
             ('results', data)
-        ]))
\ No newline at end of file
+        ]))
+
@@ -1,6 +1,9 @@
 from rest_framework import serializers
+
+from course.telemetry import SerializationTimingMixin
 from .models import Article
-class ArticleSerializer(serializers.ModelSerializer):
+class ArticleSerializer(SerializationTimingMixin, serializers.ModelSerializer):
     class Meta:
         model = Article
-        fields = '__all__'  
+        fields = '__all__'
+        read_only_fields = ['views']
@@ -0,0 +1,43 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from . import page_index
+from .models import Article, ArticlePageBoundary
+
+# Sent once per committed batch write with ``action`` ('create', 'update'
+# or 'publish') and the affected ``ids``, for caches of article lists.
+articles_changed = Signal()
+
+
+def update_page_index_after_commit(created_at, pk, using):
+    transaction.on_commit(
+        lambda: page_index.update_after_change(Article, ArticlePageBoundary, created_at, pk), using=using
+    )
+
+
+@receiver(post_save, sender=Article)
+def update_page_index_on_save(sender, instance, created, using, **kwargs):
+    was_published = False if created else getattr(instance, '_loaded_is_published', None)
+    if was_published != instance.is_published:
+        update_page_index_after_commit(instance.created_at, instance.pk, using)
+    instance._loaded_is_published = instance.is_published
+
+
+@receiver(post_delete, sender=Article)
+def update_page_index_on_delete(sender, instance, using, **kwargs):
+    if instance.is_published or getattr(instance, '_loaded_is_published', None):
+        update_page_index_after_commit(instance.created_at, instance.pk, using)
+
+
+@receiver(articles_changed, sender=Article)
+def update_page_index_on_batch(sender, action, ids, **kwargs):
+    # Sent after commit already; bulk writes skip the save signals.
+    oldest = (
+        Article.objects.filter(pk__in=ids)
+        .order_by('created_at', 'id')
+        .values_list('created_at', 'id')
+        .first()
+    )
+    if oldest is not None:
+        page_index.update_after_change(Article, ArticlePageBoundary, *oldest)
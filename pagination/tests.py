@@ -1,3 +1,309 @@
-from django.test import TestCase
+import importlib
+import io
+import threading
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from course.testing import PerformanceContractMixin
+
+from . import page_index, view_counts
+from .models import Article, ArticlePageBoundary
+from .signals import articles_changed
+
+
+class ArticleBatchApiTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'x'))
+        self.sent = []
+
+        def record(sender, action, ids, **kwargs):
+            self.sent.append((action, ids))
+
+        articles_changed.connect(record)
+        self.addCleanup(articles_changed.disconnect, record)
+
+    def article(self, i, **fields):
+        return {'title': f'Article {i}', 'content': 'Body', 'author': 'Jane Doe', **fields}
+
+    def test_batch_create_reports_invalid_items_and_saves_the_rest(self):
+        items = [self.article(i) for i in range(1200)]
+        items[3] = {'title': 'No content'}
+        items[700]['title'] = 'x' * 300
+
+        with self.captureOnCommitCallbacks(execute=True):
+            # Session and user, the savepoint pair and 8 INSERTs (SQLite's 999-parameter limit).
+            with self.assertNumQueries(12):
+                response = self.client.post('/api/articles/batch/', items, content_type='application/json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([error['index'] for error in response.data['errors']], [3, 700])
+        self.assertIn('content', response.data['errors'][0]['errors'])
+        self.assertEqual(len(response.data['created']), 1198)
+        self.assertEqual(Article.objects.count(), 1198)
+        self.assertEqual(self.sent, [('create', response.data['created'])])
+
+    def test_batch_update_and_publish(self):
+        articles = Article.objects.bulk_create(Article(**self.article(i)) for i in range(3))
+        items = [
+            {'id': articles[0].pk, 'title': 'Renamed'},
+            {'id': articles[1].pk, 'author': ''},
+            {'id': 999999, 'title': 'Missing'},
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch('/api/articles/batch/', {'articles': items}, content_type='application/json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], [articles[0].pk])
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 2])
+        self.assertEqual(Article.objects.get(pk=articles[0].pk).title, 'Renamed')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/api/articles/publish/', {'ids': [a.pk for a in articles] + [999999]}, content_type='application/json'
+            )
+        self.assertEqual(response.data['not_found'], [999999])
+        self.assertEqual(Article.objects.filter(is_published=True).count(), 3)
+        self.assertEqual([action for action, _ids in self.sent], ['update', 'publish'])
+
+    def test_batch_endpoints_require_staff(self):
+        self.client.logout()
+        response = self.client.post('/api/articles/batch/', [self.article(1)], content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Article.objects.exists())
+
+
+class ArticleViewCountTests(TestCase):
+    def setUp(self):
+        self.addCleanup(view_counts._pending.clear)
+        self.addCleanup(view_counts._wake.clear)
+        self.articles = Article.objects.bulk_create(
+            Article(title=f'Article {i}', content='Body', author='Jane Doe', is_published=True)
+            for i in range(3)
+        )
+
+    def test_retrieve_buffers_views_until_flush(self):
+        first, second, _third = self.articles
+        for article in (first, first, first, second):
+            self.assertEqual(self.client.get(f'/api/articles/{article.pk}/').status_code, 200)
+
+        self.assertEqual(Article.objects.get(pk=first.pk).views, 0)
+        self.assertEqual(view_counts.pending(), {first.pk: 3, second.pk: 1})
+
+        with self.assertNumQueries(4):  # savepoint pair + one UPDATE per distinct increment
+            self.assertEqual(view_counts.flush(), 4)
+        self.assertEqual(
+            dict(Article.objects.values_list('pk', 'views')), {first.pk: 3, second.pk: 1, self.articles[2].pk: 0}
+        )
+
+        response = self.client.get('/api/articles/most-viewed/?limit=2')
+        self.assertEqual([row['id'] for row in response.data], [first.pk, second.pk])
+        self.assertEqual(response.data[0]['views'], 3)
+
+    @override_settings(ARTICLE_VIEWS_FLUSH_THRESHOLD=2)
+    def test_threshold_wakes_the_flusher(self):
+        with self.assertNumQueries(0):
+            view_counts.record_view(self.articles[0].pk)
+            self.assertFalse(view_counts._wake.is_set())
+            view_counts.record_view(self.articles[1].pk)
+        self.assertTrue(view_counts._wake.is_set())
+
+        # One turn of the flusher: woken, it flushes without waiting for the interval.
+        stop = threading.Event()
+
+        def stop_after_flush():
+            stop.set()
+            view_counts._wake.set()
+
+        with mock.patch.object(view_counts, 'flush', side_effect=stop_after_flush) as flush, \
+                mock.patch.object(view_counts, 'close_old_connections'):
+            view_counts._flush_in_background(stop)
+        flush.assert_called_once_with()
+
+    def test_first_view_starts_the_flusher(self):
+        with mock.patch.object(view_counts, 'start') as start:
+            apps.get_app_config('pagination').ready()
+            view_counts.record_view(self.articles[0].pk)
+            start.assert_not_called()
+            with override_settings(ARTICLE_VIEWS_FLUSHER=True):
+                view_counts.record_view(self.articles[0].pk)
+        start.assert_called_once_with()
+
+    def test_failed_flush_keeps_counts(self):
+        view_counts.record_view(self.articles[0].pk)
+        with mock.patch.object(Article.objects, 'add_views', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                view_counts.flush()
+        view_counts.record_view(self.articles[0].pk)
+
+        self.assertEqual(view_counts.pending(), {self.articles[0].pk: 2})
+
+
+class PageBoundaryIndexTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(page_index, 'STRIDE', 4)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # One transaction per article, as when each comes from its own request.
+        for i in range(23):
+            with self.captureOnCommitCallbacks(execute=True):
+                Article.objects.create(title=f'Article {i}', content='Body', author='Jane Doe', is_published=i % 5 != 0)
+
+    def expected_pages(self, page_size):
+        ids = list(Article.objects.filter(is_published=True).order_by('-created_at', '-id').values_list('id', flat=True))
+        return [ids[start:start + page_size] for start in range(0, len(ids), page_size)]
+
+    def assert_pages_match_offset_pagination(self, page_size=5):
+        expected = self.expected_pages(page_size)
+        for number, ids in enumerate(expected, start=1):
+            response = self.client.get('/api/articles/', {'page': number, 'page_size': page_size})
+            self.assertEqual([row['id'] for row in response.data['results']], ids, f'page {number}')
+            self.assertEqual(response.data['count'], sum(map(len, expected)))
+            self.assertEqual(response.data['total_pages'], len(expected))
+            self.assertEqual(response.data['current_page'], number)
+
+    def test_pages_follow_saves_deletes_and_publishing(self):
+        self.assertEqual(ArticlePageBoundary.objects.count(), 5)
+        self.assert_pages_match_offset_pagination()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Article.objects.create(title='New', content='Body', author='Jane Doe', is_published=True)
+            Article.objects.filter(is_published=True).order_by('created_at').first().delete()
+            hidden = Article.objects.filter(is_published=False).order_by('created_at').first()
+            hidden.is_published = True
+            hidden.save()
+        self.assert_pages_match_offset_pagination(page_size=3)
+
+    def test_batch_writes_update_the_index(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'x'))
+        unpublished = list(Article.objects.filter(is_published=False).values_list('id', flat=True))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/articles/publish/', {'ids': unpublished}, content_type='application/json')
+            self.client.post('/api/articles/batch/', [
+                {'title': f'Batch {i}', 'content': 'Body', 'author': 'Jane Doe', 'is_published': True}
+                for i in range(6)
+            ], content_type='application/json')
+        self.assert_pages_match_offset_pagination(page_size=4)
+
+    def bulk_create(self, count):
+        Article.objects.bulk_create(
+            Article(title=f'Bulk {i}', content='Body', author='Jane Doe', is_published=True) for i in range(count)
+        )
+
+    def test_pages_stay_right_when_bulk_create_skips_the_index(self):
+        self.bulk_create(20)
+        self.assertTrue(page_index.is_stale(Article, ArticlePageBoundary))
+        self.assert_pages_match_offset_pagination()
+        response = self.client.get('/api/articles/', {'page': 1})
+        self.assertEqual(response.status_code, 200)
+
+        call_command('rebuild_page_index', '--if-stale', stdout=io.StringIO())
+        self.assertFalse(page_index.is_stale(Article, ArticlePageBoundary))
+        self.assertEqual(ArticlePageBoundary.objects.count(), 10)
+        self.assert_pages_match_offset_pagination()
+
+        out = io.StringIO()
+        call_command('rebuild_page_index', '--if-stale', stdout=out)
+        self.assertIn('up to date', out.getvalue())
+
+    def test_pages_stay_right_with_an_empty_index(self):
+        ArticlePageBoundary.objects.all().delete()
+        self.bulk_create(3)
+        self.assert_pages_match_offset_pagination()
+
+    def test_change_far_from_the_end_is_left_to_the_job(self):
+        oldest = Article.objects.filter(is_published=True).order_by('created_at', 'id').first()
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            oldest.delete()
+        # Drops the boundaries after it instead of scanning every later article.
+        self.assertFalse([q['sql'] for q in queries if 'ROW_NUMBER' in q['sql'].upper()])
+        self.assertEqual(ArticlePageBoundary.objects.count(), 0)
+        self.assertTrue(page_index.is_stale(Article, ArticlePageBoundary))
+        self.assert_pages_match_offset_pagination(page_size=3)
+
+        # Recent changes don't rebuild the stale index either.
+        hidden = Article.objects.filter(is_published=False).order_by('-created_at').first()
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            hidden.is_published = True
+            hidden.save()
+        self.assertFalse([q['sql'] for q in queries if 'ROW_NUMBER' in q['sql'].upper()])
+        self.assert_pages_match_offset_pagination(page_size=3)
+
+        call_command('rebuild_page_index', '--if-stale', stdout=io.StringIO())
+        self.assertEqual(ArticlePageBoundary.objects.count(), 5)
+        self.assert_pages_match_offset_pagination(page_size=3)
+
+    def test_deep_page_costs_the_same_as_the_first(self):
+        with CaptureQueriesContext(connection) as first:
+            self.client.get('/api/articles/', {'page': 1, 'page_size': 2})
+        with CaptureQueriesContext(connection) as deep:
+            response = self.client.get('/api/articles/', {'page': 9, 'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(first), len(deep))
+        self.assertFalse([q['sql'] for q in deep if 'OFFSET' in q['sql'] and 'LIMIT' in q['sql'] and
+                          int(q['sql'].rsplit('OFFSET', 1)[1]) >= page_index.STRIDE])
+
+
+class PageIndexMigrationTests(TransactionTestCase):
+    before = [('pagination', '0003_article_views')]
+    after = [('pagination', '0004_article_page_boundary')]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        self.addCleanup(self.migrate_to_latest)
+
+    def migrate_to_latest(self):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_migration_builds_the_same_index_as_rebuild(self):
+        executor = MigrationExecutor(connection)
+        HistoricalArticle = executor.loader.project_state(self.before).apps.get_model('pagination', 'Article')
+        for i in range(7):
+            HistoricalArticle.objects.create(title=f'A{i}', content='', author='x', is_published=i != 3)
+
+        migration = importlib.import_module('pagination.migrations.0004_article_page_boundary')
+        with mock.patch.object(migration, 'STRIDE', 2):
+            executor.loader.build_graph()
+            executor.migrate(self.after)
+        migrated = list(ArticlePageBoundary.objects.order_by('position').values_list('position', 'article_id'))
+
+        with mock.patch.object(page_index, 'STRIDE', 2):
+            page_index.rebuild(Article, ArticlePageBoundary)
+        self.assertEqual(len(migrated), 3)
+        self.assertEqual(
+            migrated, list(ArticlePageBoundary.objects.order_by('position').values_list('position', 'article_id'))
+        )
+
+
+class ArticleEndpointContractTests(PerformanceContractMixin, TestCase):
+    def seed(self, count):
+        Article.objects.bulk_create(
+            Article(title=f'Article {i}', content='Body ' * 50, author='Jane Doe', is_published=i % 4 != 0)
+            for i in range(count)
+        )
+
+    def get(self, path, **params):
+        response = self.client.get(path, params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_list_pages(self):
+        self.assertConstantQueries(self.seed, lambda: self.get('/api/articles/'))
+        self.assertConstantQueries(self.seed, lambda: self.get('/api/articles/', page='last', page_size=3))
+        self.assertWithinBudget(lambda: self.get('/api/articles/', page=2), budget_ms=100)
+
+    def test_retrieve_and_most_viewed(self):
+        article = Article.objects.create(title='Pinned', content='Body', author='Jane Doe', is_published=True)
+        self.addCleanup(view_counts._pending.clear)
+        self.assertConstantQueries(self.seed, lambda: self.get(f'/api/articles/{article.pk}/'))
+        self.assertConstantQueries(self.seed, lambda: self.get('/api/articles/most-viewed/', limit=20))
+        self.assertWithinBudget(lambda: self.get('/api/articles/most-viewed/', limit=20), budget_ms=100)
@@ -0,0 +1,9 @@
+from rest_framework.routers import SimpleRouter
+from rest_framework.urlpatterns import format_suffix_patterns
+
+from .views import ArticleViewSet
+
+router = SimpleRouter()
+router.register(r'articles', ArticleViewSet, basename='article')
+
+urlpatterns = format_suffix_patterns(router.urls)
@@ -0,0 +1,100 @@
+"""
+Write-behind view counters for articles.
+
+``record_view()`` only bumps a counter in this process's memory. A
+background thread adds the counts to ``Article.views`` in batched UPDATEs
+(see ``ArticleQuerySet.add_views``) every ``ARTICLE_VIEWS_FLUSH_INTERVAL``
+seconds (``0``: only when woken), as soon as
+``ARTICLE_VIEWS_FLUSH_THRESHOLD`` distinct articles are pending, and when
+the process exits. A failed flush puts the counts back so they go out with
+the next one.
+
+The first ``record_view()`` in a process starts the thread when
+``ARTICLE_VIEWS_FLUSHER`` is set (not under tests, which flush explicitly),
+so only processes serving article views run it; migrations, jobs and
+worker children never do.
+"""
+import atexit
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, transaction
+
+from .models import Article
+
+_lock = threading.Lock()
+_pending = Counter()
+# Set to make the flusher run now rather than at the next interval.
+_wake = threading.Event()
+_stop = None
+
+
+def record_view(pk):
+    with _lock:
+        _pending[pk] += 1
+        due = len(_pending) >= settings.ARTICLE_VIEWS_FLUSH_THRESHOLD
+        start_flusher = _stop is None and settings.ARTICLE_VIEWS_FLUSHER
+    if start_flusher:
+        start()
+    if due:
+        # The request that crosses the threshold doesn't pay for the flush.
+        _wake.set()
+
+
+def pending():
+    with _lock:
+        return dict(_pending)
+
+
+def flush():
+    """Write the pending counts; returns the number of views written."""
+    with _lock:
+        counts = Counter(_pending)
+        _pending.clear()
+    if not counts:
+        return 0
+    try:
+        with transaction.atomic():
+            Article.objects.add_views(counts)
+    except DatabaseError:
+        with _lock:
+            _pending.update(counts)
+        raise
+    return sum(counts.values())
+
+
+def _flush_in_background(stop):
+    while True:
+        _wake.wait(settings.ARTICLE_VIEWS_FLUSH_INTERVAL or None)
+        _wake.clear()
+        if stop.is_set():
+            return
+        try:
+            flush()
+        except DatabaseError:
+            pass
+        finally:
+            close_old_connections()
+
+
+def _flush_at_exit(stop):
+    stop.set()
+    _wake.set()
+    try:
+        flush()
+    except DatabaseError:
+        pass
+
+
+def start():
+    """Start the flush thread and the exit hook, once per process."""
+    global _stop
+    with _lock:
+        if _stop is not None:
+            return
+        _stop = threading.Event()
+    threading.Thread(
+        target=_flush_in_background, args=(_stop,), name='article-view-flusher', daemon=True
+    ).start()
+    atexit.register(_flush_at_exit, _stop)
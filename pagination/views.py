@@ -1,17 +1,23 @@
+from course.db_routers import ReplicaReadMixin
 from rest_framework import viewsets,status
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAdminUser
 from .serializers import ArticleSerializer
 from .models import Article
 from rest_framework.response import Response
 from django.core.paginator import EmptyPage, PageNotAnInteger
 from .pagination import CustomArticlePagination
+from . import batch, view_counts
 
-class ArticleViewSet(viewsets.ReadOnlyModelViewSet):
+class ArticleViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
 
     serializer_class = ArticleSerializer
     pagination_class = CustomArticlePagination
+    max_batch_size = 5000
+    max_most_viewed_limit = 100
     
     def get_queryset(self):
-        return Article.objects.filter(is_published=True).order_by('-created_at')
+        return Article.objects.filter(is_published=True).order_by('-created_at', '-id')
     
     def list(self, request, *args, **kwargs):
         try:
@@ -24,3 +30,61 @@ class ArticleViewSet(viewsets.ReadOnlyModelViewSet):
                 },
                 status=status.HTTP_404_NOT_FOUND
             )
+
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        view_counts.record_view(response.data['id'])
+        return response
+
+    @action(detail=False, url_path='most-viewed')
+    def most_viewed(self, request):
+        """Most viewed published articles, read from the views index: ``?limit=10``."""
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            limit = 10
+        limit = max(1, min(limit, self.max_most_viewed_limit))
+        articles = Article.objects.filter(is_published=True).order_by('-views', '-id')[:limit]
+        return Response(self.get_serializer(articles, many=True).data)
+
+    def batch_items(self, request, key):
+        items = request.data.get(key) if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list):
+            return None, Response({'detail': f'Expected a list, or an object with a "{key}" list.'},
+                                  status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.max_batch_size:
+            return None, Response({'detail': f'At most {self.max_batch_size} items per batch.'},
+                                  status=status.HTTP_400_BAD_REQUEST)
+        return items, None
+
+    @action(detail=False, methods=['post', 'patch'], permission_classes=[IsAdminUser])
+    def batch(self, request):
+        """
+        ``POST`` a list of articles to create them, or ``PATCH`` a list of
+        partial updates with their ``id``. Invalid items are returned in
+        ``errors`` by index; the rest are saved.
+        """
+        items, error = self.batch_items(request, 'articles')
+        if error:
+            return error
+        if request.method == 'POST':
+            ids, errors = batch.create_articles(items)
+            return Response({'created': ids, 'errors': errors},
+                            status=status.HTTP_201_CREATED if ids or not errors else status.HTTP_400_BAD_REQUEST)
+        ids, errors = batch.update_articles(items)
+        return Response({'updated': ids, 'errors': errors},
+                        status=status.HTTP_200_OK if ids or not errors else status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminUser])
+    def publish(self, request):
+        """Publish ``{"ids": [...]}``, or unpublish them with ``"is_published": false``."""
+        ids, error = self.batch_items(request, 'ids')
+        if error:
+            return error
+        if not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in ids):
+            return Response({'ids': ['Expected a list of integers.']}, status=status.HTTP_400_BAD_REQUEST)
+        is_published = request.data.get('is_published', True) if isinstance(request.data, dict) else True
+        if not isinstance(is_published, bool):
+            return Response({'is_published': ['Must be a boolean.']}, status=status.HTTP_400_BAD_REQUEST)
+        found, missing = batch.set_published(ids, is_published)
+        return Response({'updated': found, 'not_found': missing})
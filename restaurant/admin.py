@@ -1,5 +1,20 @@
+from course.admin_utils import LargeTableAdmin
 from django.contrib import admin
 from .models import Restaurant, Sale
 # Register your models here.
-admin.site.register(Restaurant)
-admin.site.register(Sale)
\ No newline at end of file
+
+
+@admin.register(Restaurant)
+class RestaurantAdmin(LargeTableAdmin):
+    list_display = ('id', 'name', 'restaurant_type', 'date_opened')
+    list_filter = ('restaurant_type',)
+    # Used by the Sale restaurant autocomplete.
+    search_fields = ('name',)
+
+
+@admin.register(Sale)
+class SaleAdmin(LargeTableAdmin):
+    list_display = ('id', 'restaurant', 'income', 'expenditure', 'profit')
+    list_select_related = ('restaurant',)
+    list_filter = ('restaurant__restaurant_type',)
+    autocomplete_fields = ('restaurant',)
@@ -18,7 +18,6 @@ from restaurant.q_filters import (
     profitable_q,
     restaurant_name_has_digit_q,
     italian_mexican_or_recent_q,
-    profitable_or_digit_name_q
 )
 
 
@@ -157,9 +156,7 @@ class Command(BaseCommand):
         
         # b. Sales where income > expenditure OR restaurant name has digits
         self.stdout.write('\nb. Profitable sales OR restaurant name has digits:')
-        complex_sales = Sale.objects.select_related('restaurant').filter(
-            profitable_or_digit_name_q
-        )
+        complex_sales = Sale.objects.profitable_or_digit_name()
         self.print_sales_results(complex_sales, 'Complex Sales Query')
 
     def demonstrate_complex_queries(self):
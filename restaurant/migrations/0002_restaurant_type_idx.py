@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='restaurant',
+            index=models.Index(fields=['restaurant_type'], name='restaurant_type_idx'),
+        ),
+    ]
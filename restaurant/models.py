@@ -1,5 +1,7 @@
 from django.db import models
 
+from .q_filters import profitable_or_digit_name_q
+
 # Create your models here.
 class Restaurant(models.Model):
     RESTAURANT_TYPE = [
@@ -15,14 +17,30 @@ class Restaurant(models.Model):
     restaurant_type = models.CharField(max_length=20, choices=RESTAURANT_TYPE)
     date_opened = models.DateField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['restaurant_type'], name='restaurant_type_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
+class SaleQuerySet(models.QuerySet):
+    def profitable_or_digit_name(self):
+        """
+        Profitable sales, or sales of a restaurant with a digit in its name,
+        with the restaurant joined in so listing its name costs no queries.
+        """
+        return self.select_related('restaurant').filter(profitable_or_digit_name_q)
+
+
 class Sale(models.Model):
     restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE, related_name='sales')
     income = models.DecimalField(max_digits=10, decimal_places=2)
     expenditure = models.DecimalField(max_digits=10, decimal_places=2)
 
+    objects = SaleQuerySet.as_manager()
+
     @property
     def profit(self):
         return self.income - self.expenditure
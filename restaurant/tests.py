@@ -1,3 +1,109 @@
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from course.admin_utils import EstimatedCountPaginator
+from course.testing import PerformanceContractMixin
+from .models import Restaurant, Sale
+
+
+class SaleAdminTests(TestCase):
+    def setUp(self):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+        self.client.force_login(admin)
+
+    def add_sales(self, count):
+        restaurants = Restaurant.objects.bulk_create(
+            Restaurant(name=f'Place {i}', restaurant_type='thai', date_opened=date(2025, 1, 1))
+            for i in range(count)
+        )
+        Sale.objects.bulk_create(
+            Sale(restaurant=restaurant, income=Decimal('10.00'), expenditure=Decimal('4.00'))
+            for restaurant in restaurants
+        )
+
+    def changelist_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/admin/restaurant/sale/')
+        self.assertEqual(response.status_code, 200)
+        return [query['sql'] for query in queries]
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        self.add_sales(3)
+        small = self.changelist_queries()
+        self.add_sales(40)
+        large = self.changelist_queries()
+
+        self.assertEqual(len(small), len(large))
+        self.assertFalse([sql for sql in large if 'COUNT(*)' in sql.upper()])
+
+    def test_edit_form_does_not_render_every_restaurant(self):
+        self.add_sales(5)
+        sale = Sale.objects.select_related('restaurant').first()
+        response = self.client.get(f'/admin/restaurant/sale/{sale.pk}/change/')
+
+        self.assertContains(response, 'admin-autocomplete')
+        self.assertNotContains(response, 'Place 4')
+        self.assertContains(response, str(sale.restaurant))
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    def test_unfiltered_count_reads_max_id(self):
+        restaurants = Restaurant.objects.bulk_create(
+            Restaurant(name=f'Place {i}', restaurant_type='thai' if i % 2 else 'french', date_opened=date(2025, 1, 1))
+            for i in range(6)
+        )
+        restaurants[0].delete()
+
+        unfiltered = EstimatedCountPaginator(Restaurant.objects.order_by('-id'), 2)
+        with self.assertNumQueries(1) as context:
+            # An overestimate after deletes: 5 rows remain.
+            self.assertEqual(unfiltered.count, restaurants[-1].pk)
+        self.assertIn('MAX', context.captured_queries[0]['sql'])
+
+        filtered = EstimatedCountPaginator(Restaurant.objects.filter(restaurant_type='thai').order_by('-id'), 2)
+        self.assertEqual(filtered.count, 3)
+
+
+class RestaurantQueryContractTests(PerformanceContractMixin, TestCase):
+    def seed(self, count):
+        kinds = ['italian', 'mexican', 'thai']
+        restaurants = Restaurant.objects.bulk_create(
+            Restaurant(name=f'Place {i}', restaurant_type=kinds[i % 3], date_opened=date(2025, 1, 1))
+            for i in range(count)
+        )
+        Sale.objects.bulk_create(
+            Sale(restaurant=restaurant, income=Decimal(income), expenditure=Decimal('40.00'))
+            for restaurant in restaurants
+            for income in ('30.00', '90.00')
+        )
+
+    def test_sales_with_restaurant_names(self):
+        def run():
+            return [(sale.restaurant.name, sale.profit) for sale in Sale.objects.profitable_or_digit_name()]
+
+        self.assertConstantQueries(self.seed, run)
+        self.assertWithinBudget(run, budget_ms=50)
+
+    def test_restaurant_admin_changelist_filtered_by_type(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'x'))
+
+        def run():
+            response = self.client.get('/admin/restaurant/restaurant/?restaurant_type__exact=italian')
+            self.assertEqual(response.status_code, 200)
+
+        self.assertConstantQueries(self.seed, run)
+        self.assertWithinBudget(run, budget_ms=250)
+
+    def test_sale_admin_changelist(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'x'))
+
+        def run():
+            self.assertEqual(self.client.get('/admin/restaurant/sale/').status_code, 200)
 
-# Create your tests here.
+        self.assertConstantQueries(self.seed, run)
+        self.assertWithinBudget(run, budget_ms=250)